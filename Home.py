@@ -1,4 +1,5 @@
 import streamlit as st
+from prewarm import prewarm
 
 st.set_page_config(
     page_title="Ascent AI - AI-Powered Personal Branding",
@@ -177,4 +178,7 @@ with st.container():
     col1, col2, col3 = st.columns([1,1,1])
     with col2:
         if st.button("🚀 Get Started Now", use_container_width=True, type="primary"):
-            st.switch_page("pages/2_Ascent_AI_App.py")
\ No newline at end of file
+            st.switch_page("pages/2_Ascent_AI_App.py")
+
+# Warm up the app's heavy dependencies in the background while the visitor reads the landing page
+prewarm()
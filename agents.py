@@ -1,35 +1,92 @@
 import os
-from crewai import Agent, LLM
-from dotenv import load_dotenv
+import threading
+import config  # noqa: F401
 
-load_dotenv()
+# Define the LLMs. crewai is slow to import, so the LLM objects are only built (once per
+# process) the first time an agent needs them.
+GEMINI_MODEL = os.getenv("ASCENT_GEMINI_MODEL", "gemini/gemini-2.5-flash-lite")
+GROQ_MODEL = os.getenv("ASCENT_GROQ_MODEL", "groq/llama-3.1-8b-instant")
+# Sends every LLM call to this OpenAI-compatible endpoint instead, e.g. a local fake LLM
+# server (benchmarks/fake_llm_server.py) with the models above set to "openai/..." names
+LLM_BASE_URL = os.getenv("ASCENT_LLM_BASE_URL")
 
-# Define the LLMs
-gemini_llm = LLM(
-    api_key=os.getenv("GEMINI_API_KEY"),
-    model="gemini/gemini-2.5-flash-lite"
-)
+_llms = {}
+_llms_lock = threading.Lock()
+
+
+def _llm(model, api_key_env):
+    with _llms_lock:
+        if model not in _llms:
+            from crewai import LLM
+
+            if LLM_BASE_URL:
+                _llms[model] = LLM(api_key=os.getenv(api_key_env) or "unused", model=model, base_url=LLM_BASE_URL)
+            else:
+                _llms[model] = LLM(api_key=os.getenv(api_key_env), model=model)
+        return _llms[model]
+
+
+def set_llm(model, llm):
+    """Replaces the LLM used for a model, e.g. with a local stand-in for offline benchmarks."""
+    with _llms_lock:
+        _llms[model] = llm
+
+
+def get_gemini_llm():
+    return _llm(GEMINI_MODEL, "GEMINI_API_KEY")
+
+
+def get_groq_llm():
+    return _llm(GROQ_MODEL, "GROQ_API_KEY")
+
+
+def fallback_llm(provider):
+    """Returns the LLM of the other provider, used to hedge slow calls."""
+    return get_groq_llm() if provider == "gemini" else get_gemini_llm()
+
+
+def __getattr__(name):
+    # Keeps `from agents import gemini_llm` working without building the LLMs at import time
+    if name == "gemini_llm":
+        return get_gemini_llm()
+    if name == "groq_llm":
+        return get_groq_llm()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def _agent(**kwargs):
+    from crewai import Agent
+
+    return Agent(**kwargs)
+
+
+def rebind_agent(agent, llm):
+    """Builds an agent with the same persona as the given one that runs on a different LLM."""
+    return _agent(
+        role=agent.role,
+        goal=agent.goal,
+        backstory=agent.backstory,
+        llm=llm,
+        verbose=False,
+        allow_delegation=False
+    )
 
-groq_llm = LLM(
-    api_key=os.getenv("GROQ_API_KEY"),
-    model="groq/llama-3.1-8b-instant"
-)
 
 class BrandingAgents:
     
     def resume_summarizer_agent(self):
-        return Agent(
+        return _agent(
             role='Professional Resume Summarizer',
             goal="Concisely summarize a user's resume or professional background, identifying key experiences and inferring their career trajectory and goals.",
             backstory="You are an expert career coach who can quickly scan a professional document and provide a reflective, insightful summary to confirm your understanding before providing advice.",
-            llm=groq_llm,
+            llm=get_groq_llm(),
             verbose=False,
             allow_delegation=False
         )
         
     def personal_branding_strategist(self):
         try:
-            return Agent(
+            return _agent(
             role='Personal Branding Strategist',
             goal="Create a tailored multi-week LinkedIn content plan to help the user build their professional brand and position themselves in relevant career circles.",
             backstory=(
@@ -37,12 +94,12 @@ class BrandingAgents:
                 "You analyze the user's background, aspirations, and uploaded documents to generate an actionable content plan "
                 "that helps them grow influence, participate in LinkedIn discussions, and become a recognized thought leader."
             ),
-            llm=gemini_llm,
+            llm=get_gemini_llm(),
             verbose=False,
             allow_delegation=False
         )
         except Exception:
-            return Agent(
+            return _agent(
                     role="Personal Branding Strategist (Grok used instead of Gemini due to error)",
                     goal="Create a tailored multi-week LinkedIn content plan to help the user build their professional brand and position themselves in relevant career circles.",
                     backstory=(
@@ -50,26 +107,26 @@ class BrandingAgents:
                         "You analyze the user's background, aspirations, and uploaded documents to generate an actionable content plan "
                         "that helps them grow influence, participate in LinkedIn discussions, and become a recognized thought leader."
                     ),
-                    llm=groq_llm,
+                    llm=get_groq_llm(),
                     verbose=False,
                     allow_delegation=False
                 )
 
     def content_ideation_agent(self):
-        return Agent(
+        return _agent(
             role='Content Ideation Agent',
             goal='Generate creative, engagement-focused LinkedIn post ideas from the approved strategy.',
             backstory=(
                 "You are a creative content expert. You turn strategic plans into compelling LinkedIn post ideas with strong hooks and discussion prompts "
                 "that are designed to attract attention and foster meaningful engagement."
             ),
-            llm=groq_llm,
+            llm=get_groq_llm(),
             verbose=False,
             allow_delegation=False
         )
 
     def linkedin_ghostwriter_agent(self):
-        return Agent(
+        return _agent(
             role='Professional LinkedIn Ghostwriter',
             goal='Draft full, polished LinkedIn posts for the user in their authentic voice.',
             backstory=(
@@ -77,33 +134,33 @@ class BrandingAgents:
                 "You use the user's resume and uploaded writing samples to capture their tone and style, "
                 "creating posts that showcase their expertise, spark conversations, and build thought leadership."
             ),
-            llm=gemini_llm,
+            llm=get_gemini_llm(),
             verbose=False,
             allow_delegation=False
         )
 
     def quality_assurance_agent(self):
-        return Agent(
+        return _agent(
             role='Quality Assurance Agent',
             goal='Review drafted LinkedIn posts for clarity, tone, and engagement impact, providing actionable feedback.',
             backstory=(
                 "You are a meticulous editor. Your job is to ensure each LinkedIn post is professional, engaging, clear, "
                 "and encourages participation in the right professional circles."
             ),
-            llm=gemini_llm,
+            llm=get_gemini_llm(),
             verbose=False,
             allow_delegation=False
         )
 
     def title_agent(self):
-        return Agent(
+        return _agent(
             role='Title Generator Agent',
             goal='Generate a concise, descriptive title for a LinkedIn branding session.',
             backstory=(
                 "You are an AI assistant skilled at summarizing LinkedIn branding sessions into short, clear titles "
                 "that capture the essence of the strategy."
             ),
-            llm=groq_llm,
+            llm=get_groq_llm(),
             verbose=False,
             allow_delegation=False
         )
@@ -0,0 +1,232 @@
+"""An HTTP API for the branding tasks, for clients other than the Streamlit app.
+
+Each operation is a POST to /v1/<operation> with a JSON body holding the task's inputs,
+named as in BrandingTasks (GET /v1/operations lists them). The answer is
+{"operation": ..., "result": ...}; idea operations return parsed ideas like the app.
+Optional fields:
+
+* "stream": true answers with newline-delimited JSON: {"delta": "..."} lines as the
+  model writes, then one {"result": ...} line, or an {"error": "..."} line.
+* "timeout": seconds before the request gives up with a 504 (default ASCENT_API_TIMEOUT).
+* "use_cache": false skips the kickoff cache.
+
+Requests are served concurrently on one event loop. The agents, tasks, rate limits,
+provider concurrency limits, kickoff cache and metrics are the same ones the app uses;
+the blocking crew runs go to a bounded thread pool. A request that times out stops
+waiting, but its crew run finishes in the background, so its answer is still cached.
+A streamed request that times out or whose client goes away abandons its crew run.
+
+    python api.py [--host 127.0.0.1] [--port 8000]
+"""
+import argparse
+import asyncio
+import inspect
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from aiohttp import web
+
+import config  # noqa: F401
+from metrics import metrics
+from pool import agent_pool, branding_tasks, pooled_agents
+from runner import parse_or_repair_ideas, run_task, stream_task
+
+# Crew runs in flight at once; further requests wait for a free thread
+MAX_WORKERS = int(os.getenv("ASCENT_API_MAX_WORKERS", 16))
+# Seconds a request may take, including the wait for a free thread, unless it asks for another timeout
+DEFAULT_TIMEOUT = float(os.getenv("ASCENT_API_TIMEOUT", 120))
+
+# operation: (agent, task, what the result is)
+OPERATIONS = {
+    "summarize": ("resume_summarizer_agent", "summarize_resume_task", "text"),
+    "outline": ("personal_branding_strategist", "intermediate_outline_task", "text"),
+    "strategy": ("personal_branding_strategist", "strategy_task", "text"),
+    "refine": ("personal_branding_strategist", "refine_strategy_task", "text"),
+    "ideation": ("content_ideation_agent", "ideation_task", "ideas"),
+    "similar_ideas": ("content_ideation_agent", "generate_similar_ideas_task", "ideas"),
+    "quick_ideas": ("content_ideation_agent", "single_post_ideas_task", "quick_ideas"),
+    "series": ("content_ideation_agent", "short_series_ideas_task", "quick_ideas"),
+    "write": ("linkedin_ghostwriter_agent", "writing_task", "text"),
+    "qa": ("quality_assurance_agent", "qa_critique_task", "text"),
+}
+OPTIONS = ("stream", "timeout", "use_cache")
+
+
+class RequestError(ValueError):
+    """Raised when a request body can't be turned into a task."""
+
+
+def task_fields(operation):
+    """Returns the required and optional body fields of an operation."""
+    parameters = list(inspect.signature(getattr(branding_tasks, OPERATIONS[operation][1])).parameters.values())[1:]
+    required = [p.name for p in parameters if p.default is inspect.Parameter.empty]
+    optional = [p.name for p in parameters if p.default is not inspect.Parameter.empty]
+    return required, optional
+
+
+def task_arguments(operation, body):
+    """Picks an operation's task arguments out of a request body."""
+    required, optional = task_fields(operation)
+    missing = [name for name in required if name not in body]
+    if missing:
+        raise RequestError(f"missing field(s): {', '.join(missing)}")
+    unknown = [name for name in body if name not in required + optional and name not in OPTIONS]
+    if unknown:
+        raise RequestError(f"unknown field(s): {', '.join(unknown)}")
+    return {name: body[name] for name in required + optional if name in body}
+
+
+def build(operation, arguments):
+    """Leases the operation's agent and builds its task, handing the agent back if the task can't be built."""
+    agent_name, task_name, _ = OPERATIONS[operation]
+    agent = getattr(pooled_agents, agent_name)()
+    try:
+        return agent, getattr(branding_tasks, task_name)(agent, **arguments)
+    except Exception:
+        agent_pool.release(agent)
+        raise
+
+
+def finish(operation, output, use_cache):
+    """Turns a task's raw output into the operation's result."""
+    kind = OPERATIONS[operation][2]
+    if kind == "text":
+        return output
+    return parse_or_repair_ideas(output, use_cache=use_cache, quick=kind == "quick_ideas")
+
+
+def run_operation(operation, arguments, use_cache):
+    agent, task = build(operation, arguments)
+    return finish(operation, run_task(agent, task, use_cache=use_cache), use_cache)
+
+
+def stream_operation(operation, arguments, use_cache, emit, stopped):
+    """Runs an operation, passing ("delta", text) and then ("result", value) or ("error", message) to `emit`."""
+    try:
+        agent, task = build(operation, arguments)
+        stream = stream_task(agent, task, use_cache=use_cache)
+        chunks = iter(stream)
+        try:
+            for chunk in chunks:
+                if stopped.is_set():
+                    return
+                emit("delta", chunk)
+        finally:
+            # A no-op once the stream is read; otherwise abandons the crew run, whose agent is discarded
+            chunks.close()
+        emit("result", finish(operation, stream.result, use_cache))
+    except Exception as e:
+        emit("error", str(e))
+
+
+def error(status, message):
+    return web.json_response({"error": message}, status=status)
+
+
+class Api:
+    """The aiohttp handlers, with the thread pool crew runs go to."""
+
+    def __init__(self, max_workers=MAX_WORKERS, timeout=DEFAULT_TIMEOUT):
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="ascent-api")
+        self.timeout = timeout
+        self.in_flight = 0
+
+    def app(self):
+        app = web.Application()
+        app.router.add_get("/health", self.health)
+        app.router.add_get("/metrics", self.metrics)
+        app.router.add_get("/v1/operations", self.operations)
+        app.router.add_post("/v1/{operation}", self.run)
+        app.on_cleanup.append(self.close)
+        return app
+
+    async def close(self, app):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+    async def health(self, request):
+        return web.json_response({"status": "ok", "in_flight": self.in_flight})
+
+    async def metrics(self, request):
+        return web.Response(text=metrics.to_prometheus(), content_type="text/plain")
+
+    async def operations(self, request):
+        listing = {}
+        for operation in OPERATIONS:
+            required, optional = task_fields(operation)
+            listing[operation] = {"required": required, "optional": optional + list(OPTIONS)}
+        return web.json_response(listing)
+
+    async def run(self, request):
+        operation = request.match_info["operation"]
+        if operation not in OPERATIONS:
+            return error(404, f"unknown operation {operation!r}; see GET /v1/operations")
+        try:
+            body = await request.json()
+            if not isinstance(body, dict):
+                raise RequestError("the body must be a JSON object")
+            arguments = task_arguments(operation, body)
+            timeout = float(body.get("timeout", self.timeout))
+        except (ValueError, TypeError) as e:
+            return error(400, str(e))
+        use_cache = body.get("use_cache", True) is not False
+
+        self.in_flight += 1
+        try:
+            if body.get("stream"):
+                return await self.stream(request, operation, arguments, use_cache, timeout)
+            loop = asyncio.get_running_loop()
+            try:
+                result = await asyncio.wait_for(
+                    loop.run_in_executor(self.executor, run_operation, operation, arguments, use_cache), timeout
+                )
+            except asyncio.TimeoutError:
+                return error(504, f"{operation} timed out after {timeout:g}s")
+            except Exception as e:
+                return error(500, f"{operation} failed: {e}")
+            return web.json_response({"operation": operation, "result": result})
+        finally:
+            self.in_flight -= 1
+
+    async def stream(self, request, operation, arguments, use_cache, timeout):
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        queue = asyncio.Queue()
+        stopped = threading.Event()
+
+        def emit(kind, value):
+            if not stopped.is_set():
+                loop.call_soon_threadsafe(queue.put_nowait, (kind, value))
+
+        response = web.StreamResponse(headers={"Content-Type": "application/x-ndjson", "Cache-Control": "no-cache"})
+        await response.prepare(request)
+        loop.run_in_executor(self.executor, stream_operation, operation, arguments, use_cache, emit, stopped)
+        try:
+            while True:
+                try:
+                    kind, value = await asyncio.wait_for(queue.get(), max(0.0, deadline - loop.time()))
+                except asyncio.TimeoutError:
+                    kind, value = "error", f"{operation} timed out after {timeout:g}s"
+                await response.write((json.dumps({kind: value}, ensure_ascii=False) + "\n").encode())
+                if kind != "delta":
+                    break
+            await response.write_eof()
+        finally:
+            # Also reached when the client goes away; the crew run is then abandoned at its next chunk
+            stopped.set()
+        return response
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=MAX_WORKERS, help="crew runs in flight at once")
+    parser.add_argument("--timeout", type=float, default=DEFAULT_TIMEOUT, help="default request timeout in seconds")
+    args = parser.parse_args()
+    web.run_app(Api(args.workers, args.timeout).app(), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
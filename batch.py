@@ -0,0 +1,125 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import config  # noqa: F401
+from jobs import job_queue
+from pool import branding_tasks, pooled_agents
+from runner import run_task
+
+DEFAULT_MAX_WORKERS = int(os.getenv("ASCENT_BATCH_MAX_WORKERS", 8))
+# How long per-theme idea requests are collected before they are sent as one task (0 sends each at once)
+THEME_BATCH_WINDOW_SECONDS = float(os.getenv("ASCENT_THEME_BATCH_WINDOW", 2.0))
+
+
+def draft_and_critique(agents, tasks, idea, use_cache=True):
+    """Runs the ghostwriter → QA chain for a single idea and returns (draft, critique)."""
+    writer_agent = agents.linkedin_ghostwriter_agent()
+    draft = run_task(writer_agent, tasks.writing_task(writer_agent, idea), use_cache=use_cache)
+    qa_agent = agents.quality_assurance_agent()
+    critique = run_task(qa_agent, tasks.qa_critique_task(qa_agent, draft), use_cache=use_cache)
+    return draft, critique
+
+
+def draft_ideas(agents, tasks, ideas, max_workers=DEFAULT_MAX_WORKERS):
+    """Drafts and critiques every idea on a bounded worker pool.
+
+    Yields (idea, draft, critique, error) tuples in completion order, so callers can
+    collect results as they finish. Per-provider limits are enforced inside run_task.
+    """
+    if not ideas:
+        return
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(ideas)), thread_name_prefix="ascent-draft") as executor:
+        futures = {executor.submit(draft_and_critique, agents, tasks, idea): idea for idea in ideas}
+        for future in as_completed(futures):
+            idea = futures[future]
+            try:
+                draft, critique = future.result()
+                yield idea, draft, critique, None
+            except Exception as e:
+                yield idea, None, None, e
+
+
+def _theme_key(theme):
+    return theme.strip().strip("*").strip().casefold()
+
+
+def split_theme_ideas(requests, ideas_dict):
+    """Splits the {theme: ideas} output of a theme_ideas_batch_task back into its requests.
+
+    Returns a list of (request, ideas). Themes are matched ignoring case and markdown bold.
+    When several requests share a theme, its ideas are handed out in request order, each
+    taking the number it asked for and the last one taking any extras.
+    """
+    by_theme = {}
+    for theme, ideas in ideas_dict.items():
+        by_theme.setdefault(_theme_key(theme), []).extend(ideas)
+    if len(requests) == 1 and len(by_theme) == 1:
+        # A single request can't be misfiled, whatever the model called the theme
+        by_theme = {_theme_key(requests[0]["theme"]): next(iter(by_theme.values()))}
+
+    results = []
+    for index, request in enumerate(requests):
+        key = _theme_key(request["theme"])
+        available = by_theme.get(key, [])
+        is_last = not any(_theme_key(later["theme"]) == key for later in requests[index + 1:])
+        taken = available if is_last else available[:request["count"]]
+        by_theme[key] = available[len(taken):]
+        results.append((request, taken))
+    return results
+
+
+class ThemeIdeaBatcher:
+    """Collects per-theme idea requests and sends each session's requests as one multi-theme task.
+
+    The first request of a session opens a short window; requests arriving before it closes
+    (e.g. "More like this" clicked on several themes) join the same batch, so the strategy is
+    sent once and the ideas come back in one round trip. The batch runs as a "theme_ideas"
+    job with the requests in its meta.
+    """
+
+    def __init__(self, agents=pooled_agents, tasks=branding_tasks, jobs=job_queue, window_seconds=THEME_BATCH_WINDOW_SECONDS):
+        self.agents = agents
+        self.tasks = tasks
+        self.jobs = jobs
+        self.window_seconds = window_seconds
+        self._batches = {}
+        self._lock = threading.Lock()
+
+    def add(self, session_id, context, request):
+        """Queues a request ({"theme", "mode": "new"|"similar", "count", "idea", "replace"}) for a session."""
+        with self._lock:
+            batch = self._batches.get(session_id)
+            if batch is None:
+                batch = self._batches[session_id] = {"context": context, "requests": []}
+                if self.window_seconds > 0:
+                    timer = threading.Timer(self.window_seconds, self.flush, args=(session_id,))
+                    timer.daemon = True
+                    timer.start()
+            if request not in batch["requests"]:
+                batch["requests"].append(request)
+        if self.window_seconds <= 0:
+            self.flush(session_id)
+
+    def pending(self, session_id):
+        """Returns the requests of a session that are waiting for the window to close."""
+        with self._lock:
+            batch = self._batches.get(session_id)
+            return list(batch["requests"]) if batch else []
+
+    def flush(self, session_id):
+        """Sends a session's queued requests now. Returns the job ID, or None if nothing was queued."""
+        with self._lock:
+            batch = self._batches.pop(session_id, None)
+        if not batch:
+            return None
+        agent = self.agents.content_ideation_agent()
+        task = self.tasks.theme_ideas_batch_task(agent, batch["context"], batch["requests"])
+        return self.jobs.submit(session_id, "theme_ideas", agent, task, use_cache=False, requests=batch["requests"])
+
+    def discard(self, session_id):
+        with self._lock:
+            self._batches.pop(session_id, None)
+
+
+# Shared by every session served from this process
+theme_idea_batcher = ThemeIdeaBatcher()
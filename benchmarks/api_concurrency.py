@@ -0,0 +1,165 @@
+"""Measures api.py's throughput and latency with many requests in flight, against the fake LLM server.
+
+Starts benchmarks/fake_llm_server.py and api.py as separate processes, with api.py's
+models pointed at the fake server over HTTP, so the whole path is exercised: request
+parsing, the thread pool, crewai, the provider limits and the HTTP calls to the model.
+For each concurrency level it sends a mix of write, QA, outline and quick ideas requests
+(half of them streamed) with the kickoff cache bypassed, and reports requests per second,
+latency percentiles and, for streamed requests, the time to the first delta.
+
+Both fake models are served as one "openai" provider, so the app's limit of LLM calls in
+flight per provider (4 by default) caps throughput unless --provider-concurrency raises it.
+
+    python benchmarks/api_concurrency.py [--concurrency 1,4,16] [--requests 64] [--provider-concurrency 4]
+                                         [--ttft 0.3] [--tokens-per-second 200]
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+import aiohttp
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+CONTEXT = {
+    "user_context": "Ten years building data products; led a team of twelve through two acquisitions.",
+    "target_role": "AI Product Manager",
+    "target_audience": "Tech executives and VCs",
+    "positioning": "Innovative and data-driven",
+}
+REQUESTS = [
+    ("write", {"context": "Why our best hires failed the take-home test"}),
+    ("qa", {"context": "Most roadmaps are wish lists. Here is how we cut ours in half."}),
+    ("outline", {**CONTEXT, "platform": "LinkedIn", "duration": "4"}),
+    ("quick_ideas", {**CONTEXT, "topic": "pricing experiments", "num_ideas": 5}),
+]
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, round(q / 100 * len(ordered)) - 1))] if ordered else 0.0
+
+
+async def wait_until_up(session, url, process, timeout=120):
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"{url} exited with {process.returncode}")
+        try:
+            async with session.get(url) as response:
+                if response.status < 500:
+                    return
+        except aiohttp.ClientError:
+            pass
+        await asyncio.sleep(0.2)
+    raise RuntimeError(f"{url} did not come up within {timeout}s")
+
+
+async def send(session, base, operation, body, stream):
+    """Sends one request; returns (seconds, seconds to the first delta or None, ok)."""
+    start = time.perf_counter()
+    first = None
+    async with session.post(f"{base}/v1/{operation}", json={**body, "stream": stream, "use_cache": False}) as response:
+        if not stream:
+            ok = response.status == 200 and "result" in await response.json()
+            return time.perf_counter() - start, None, ok
+        ok = False
+        async for line in response.content:
+            message = json.loads(line)
+            if "delta" in message and first is None:
+                first = time.perf_counter() - start
+            ok = "result" in message
+    return time.perf_counter() - start, first, ok
+
+
+async def run_level(session, base, concurrency, count, rng):
+    jobs = [(*rng.choice(REQUESTS), i % 2 == 1) for i in range(count)]
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(job):
+        async with semaphore:
+            return await send(session, base, *job)
+
+    start = time.perf_counter()
+    results = await asyncio.gather(*(one(job) for job in jobs), return_exceptions=True)
+    elapsed = time.perf_counter() - start
+    done = [r for r in results if not isinstance(r, BaseException) and r[2]]
+    latencies = [r[0] for r in done]
+    first_deltas = [r[1] for r in done if r[1] is not None]
+    return {
+        "concurrency": concurrency,
+        "requests": count,
+        "failed": count - len(done),
+        "requests_per_s": round(len(done) / elapsed, 2),
+        "p50_s": round(percentile(latencies, 50), 3),
+        "p95_s": round(percentile(latencies, 95), 3),
+        "first_delta_p50_s": round(percentile(first_deltas, 50), 3),
+    }
+
+
+async def benchmark(args):
+    fake_port, api_port = free_port(), free_port()
+    env = {
+        **os.environ,
+        "ASCENT_LLM_BASE_URL": f"http://127.0.0.1:{fake_port}/v1",
+        "ASCENT_GEMINI_MODEL": "openai/fake-gemini",
+        "ASCENT_GROQ_MODEL": "openai/fake-groq",
+        "ASCENT_CACHE_PATH": os.path.join(tempfile.mkdtemp(), "kickoff_cache.sqlite3"),
+        "ASCENT_API_MAX_WORKERS": str(max(int(n) for n in args.concurrency.split(","))),
+    }
+    if args.provider_concurrency:
+        env["ASCENT_DEFAULT_MAX_CONCURRENCY"] = str(args.provider_concurrency)
+    for name in ("GEMINI_RPM", "GEMINI_TPM", "GROQ_RPM", "GROQ_TPM"):
+        env.setdefault(name, "0")
+    processes = [
+        subprocess.Popen([sys.executable, os.path.join(HERE, "fake_llm_server.py"), "--port", str(fake_port),
+                          "--ttft", str(args.ttft), "--tokens-per-second", str(args.tokens_per_second)], env=env),
+        subprocess.Popen([sys.executable, os.path.join(ROOT, "api.py"), "--port", str(api_port)], env=env, cwd=ROOT,
+                         stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL),
+    ]
+    base = f"http://127.0.0.1:{api_port}"
+    try:
+        async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=600)) as session:
+            await wait_until_up(session, f"http://127.0.0.1:{fake_port}/v1/chat/completions", processes[0])
+            await wait_until_up(session, f"{base}/health", processes[1])
+            # crewai's imports and first call would otherwise count against the first level
+            await send(session, base, *REQUESTS[0], False)
+            print(f"{args.requests} requests per level, fake LLM with {args.ttft}s time to first token and {args.tokens_per_second:.0f} tokens/s\n")
+            print(f"{'in flight':>9} {'req/s':>7} {'p50':>7} {'p95':>7} {'first delta':>12} {'failed':>7}")
+            rng = random.Random(args.seed)
+            for concurrency in (int(n) for n in args.concurrency.split(",")):
+                level = await run_level(session, base, concurrency, args.requests, rng)
+                print(f"{concurrency:>9} {level['requests_per_s']:>7.2f} {level['p50_s']:>6.2f}s {level['p95_s']:>6.2f}s "
+                      f"{level['first_delta_p50_s']:>11.2f}s {level['failed']:>7}")
+    finally:
+        for process in processes:
+            process.terminate()
+            process.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--concurrency", default="1,4,16", help="comma-separated numbers of requests in flight at once")
+    parser.add_argument("--requests", type=int, default=64, help="requests sent per level")
+    parser.add_argument("--provider-concurrency", type=int, help="LLM calls in flight to the fake provider (default: the app's)")
+    parser.add_argument("--ttft", type=float, default=0.3)
+    parser.add_argument("--tokens-per-second", type=float, default=200)
+    parser.add_argument("--seed", type=int, default=0)
+    asyncio.run(benchmark(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""Measures how many people per hour cohort.py gets through, by number of workers, against the fake LLM.
+
+Generates a cohort of synthetic resumes and a CSV in a temporary folder and runs the whole
+pipeline (summary, profile, outline, strategy, title, ideas and drafts) for it with
+fake_llm's stand-in LLM, once per number of workers. Each run starts from an empty kickoff
+cache and output file. A final run resumes a cohort that was interrupted halfway through,
+to show that finished steps aren't repeated.
+
+    python benchmarks/cohort_throughput.py [--people 40] [--workers 1,4,8,16] [--ttft 0.3] [--tokens-per-second 200]
+"""
+import argparse
+import csv
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.environ["ASCENT_CACHE_PATH"] = os.path.join(tempfile.mkdtemp(), "kickoff_cache.sqlite3")
+for name in ("GEMINI_RPM", "GEMINI_TPM", "GROQ_RPM", "GROQ_TPM"):
+    os.environ.setdefault(name, "0")
+
+import fake_llm  # noqa: E402
+import cohort  # noqa: E402
+from runner import kickoff_cache  # noqa: E402
+
+ROLES = ["AI Product Manager", "Staff Data Scientist", "Engineering Manager", "Head of Design", "Developer Advocate"]
+
+
+def make_cohort(directory, people):
+    with open(os.path.join(directory, "cohort.csv"), "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["id", "resume", "target_role", "target_audience", "positioning", "duration", "writing_samples"])
+        for i in range(people):
+            with open(os.path.join(directory, f"person{i}.txt"), "w", encoding="utf-8") as resume:
+                resume.write(f"Person {i}\n{i % 12 + 3} years in {ROLES[i % len(ROLES)].lower()} work.\n" + "Led a team that shipped a product.\n" * 40)
+            samples = ""
+            if i % 2:
+                samples = f"sample{i}.md"
+                with open(os.path.join(directory, samples), "w", encoding="utf-8") as sample:
+                    sample.write("Here is what I learned from three failed launches.\n" * 20)
+            writer.writerow([f"person-{i}", f"person{i}.txt", ROLES[i % len(ROLES)], "Hiring managers at tech companies", "Data-driven", str(4 + i % 4), samples])
+
+
+def fresh_run(people, directory, workers, drafts):
+    """Runs the cohort from scratch and returns the summary."""
+    kickoff_cache.clear()
+    output = os.path.join(directory, f"results-{workers}.jsonl")
+    for path in (output, output + ".checkpoints"):
+        if os.path.isdir(path):
+            shutil.rmtree(path)
+        elif os.path.exists(path):
+            os.remove(path)
+    return run(people, directory, output, workers, drafts), output
+
+
+def run(people, directory, output, workers, drafts):
+    """Runs the cohort and returns its summary with the number of LLM calls it made."""
+    start = time.perf_counter()
+    summary = cohort.run_cohort(people, directory, output, output + ".checkpoints", workers=workers, drafts=drafts, log=lambda message: None)
+    summary["llm_calls"] = len(fake_llm.calls_between(start, time.perf_counter()))
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--people", type=int, default=40)
+    parser.add_argument("--workers", default="1,4,8,16")
+    parser.add_argument("--drafts", type=int, default=3)
+    parser.add_argument("--ttft", type=float, default=0.3)
+    parser.add_argument("--tokens-per-second", type=float, default=200)
+    args = parser.parse_args()
+
+    fake_llm.install(ttft=args.ttft, tokens_per_second=args.tokens_per_second)
+    directory = tempfile.mkdtemp()
+    make_cohort(directory, args.people)
+    people = cohort.read_cohort(os.path.join(directory, "cohort.csv"), directory)
+
+    print(f"{args.people} people, {args.drafts} drafts each, fake LLM with {args.ttft}s time to first token and {args.tokens_per_second:.0f} tokens/s\n")
+    print(f"{'workers':>7} {'elapsed':>9} {'people/hour':>12} {'LLM calls':>10} {'failed':>7}")
+    for workers in (int(n) for n in args.workers.split(",")):
+        summary, _ = fresh_run(people, directory, workers, args.drafts)
+        print(f"{workers:>7} {summary['elapsed_seconds']:>8.1f}s {summary['people_per_hour']:>12.0f} {summary['llm_calls']:>10} {len(summary['failed']):>7}")
+
+    # Interrupt a run halfway by failing every ideation call, then rerun it
+    workers = max(int(n) for n in args.workers.split(","))
+    run_ideas_task = cohort.run_ideas_task
+    cohort.run_ideas_task = lambda *a, **k: (_ for _ in ()).throw(RuntimeError("interrupted"))
+    interrupted, output = fresh_run(people, directory, workers, args.drafts)
+    cohort.run_ideas_task = run_ideas_task
+    kickoff_cache.clear()
+    resumed = run(people, directory, output, workers, args.drafts)
+    print(f"\nInterrupted before ideation: {len(interrupted['failed'])} failed after {interrupted['llm_calls']} LLM calls. "
+          f"Rerun: {resumed['completed']} completed with {resumed['llm_calls']} LLM calls in {resumed['elapsed_seconds']:.1f}s, "
+          "without repeating the summary, profile, outline, strategy or title steps.")
+
+
+if __name__ == "__main__":
+    main()
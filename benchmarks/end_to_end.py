@@ -0,0 +1,310 @@
+"""Drives the whole app offline against a fake LLM and reports the cost of every state transition.
+
+Runs pages/2_Ascent_AI_App.py with streamlit's AppTest and swaps the Gemini and Groq LLMs
+for fake_llm's deterministic stand-in, so no keys or network are needed. One simulated
+user walks the brand strategy flow (awaiting_resume_choice through post_drafted, with a
+resume upload, an outline refinement, a strategy refinement and a draft refinement) and
+then the Quick Ideas flow. AppTest reruns the whole page on every interaction, so a second
+user answers the target role with a run of just the strategy section, as a browser does,
+and the run fails if that run doesn't merge the distilled profile or the outline is built
+without it. For each transition it reports:
+
+* script_s: time spent running the page script (every AppTest run of the transition)
+* wall_s: time until the transition's end state was reached, background jobs included
+* llm_wait_s: total time of the fake LLM calls that finished during the transition
+* mem_current_mb / mem_peak_mb: Python heap after and at most during it (tracemalloc)
+
+--json writes the report as JSON. --baseline compares it with an earlier report and exits
+with status 1 when a transition's script time or peak memory grew by more than
+--tolerance, so it can gate changes in CI.
+
+    python benchmarks/end_to_end.py [--ttft 0.3] [--tokens-per-second 200] [--json report.json]
+                                    [--baseline report.json] [--tolerance 0.25]
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+import uuid
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.environ["ASCENT_SESSION_DB_PATH"] = os.path.join(tempfile.mkdtemp(), "sessions.sqlite3")
+os.environ["ASCENT_CACHE_PATH"] = os.path.join(tempfile.mkdtemp(), "kickoff_cache.sqlite3")
+os.environ["ASCENT_PREWARM"] = "0"
+# The fake LLM has no provider limits; set these to benchmark the rate limiter too
+for name in ("GEMINI_RPM", "GEMINI_TPM", "GROQ_RPM", "GROQ_TPM"):
+    os.environ.setdefault(name, "0")
+
+import fake_llm  # noqa: E402
+from streamlit.testing.v1 import AppTest  # noqa: E402
+from jobs import job_queue  # noqa: E402
+from user_profile import profile_is_current  # noqa: E402
+
+MB = 1024 * 1024
+POLL_SECONDS = 0.05
+RESUME = b"""Jane Doe - Senior Product Manager
+8 years in B2B SaaS. Led the analytics platform from 0 to 40k weekly users.
+Skills: discovery, experimentation, pricing, SQL, stakeholder alignment."""
+WRITING_SAMPLE = b"Shipping is a habit. Here is what three failed launches taught me about focus."
+
+
+def page_with_section_reruns(page):
+    """The app page followed by a button whose callback reruns only the page section named in session_state.
+
+    Clicking it along with a widget of that section gives the run a browser makes when the
+    widget is used: just the section's fragment, with the widget's new value.
+    """
+    import runpy
+    import streamlit as st
+
+    try:
+        runpy.run_path(page, run_name="__main__")
+    finally:
+        st.button("Rerun section", key="rerun_section", on_click=lambda: st.rerun(st.session_state.rerun_section_name))
+
+
+class Driver:
+    """Runs one simulated user through the app and records every transition."""
+
+    def __init__(self, timeout, section_reruns=False):
+        self.timeout = timeout
+        self.transitions = []
+        page = os.path.join(ROOT, "pages", "2_Ascent_AI_App.py")
+        if section_reruns:
+            self.at = AppTest.from_function(page_with_section_reruns, args=(page,), default_timeout=timeout)
+        else:
+            self.at = AppTest.from_file(page, default_timeout=timeout)
+        self.at.session_state["owner_id"] = str(uuid.uuid4())
+        self._script_seconds = 0.0
+        self._runs = 0
+
+    def run(self, element=None):
+        """Runs the page once, after interacting with `element` if given."""
+        start = time.perf_counter()
+        (element or self.at).run()
+        self._script_seconds += time.perf_counter() - start
+        self._runs += 1
+        if self.at.exception:
+            raise RuntimeError(self.at.exception[0].message)
+
+    @property
+    def session(self):
+        state = self.at.session_state
+        if "sessions" not in state or not state.current_session_id:
+            return {}
+        return state.sessions.get(state.current_session_id) or {}
+
+    @property
+    def state(self):
+        return self.session.get("conversation_state")
+
+    def transition(self, flow, name, action, done):
+        """Performs `action`, reruns the page until `done()` holds and records the transition."""
+        before = self.state
+        self._script_seconds, self._runs = 0.0, 0
+        if tracemalloc.is_tracing():
+            tracemalloc.reset_peak()
+        start = time.perf_counter()
+        action()
+        while not done():
+            if time.perf_counter() - start > self.timeout:
+                raise TimeoutError(f"{flow}/{name} did not finish (state {self.state})")
+            time.sleep(POLL_SECONDS)
+            self.run()
+        end = time.perf_counter()
+        current, peak = tracemalloc.get_traced_memory() if tracemalloc.is_tracing() else (0, 0)
+        calls = fake_llm.calls_between(start, end)
+        self.transitions.append({
+            "flow": flow,
+            "name": name,
+            "from_state": before,
+            "to_state": self.state,
+            "runs": self._runs,
+            "script_s": round(self._script_seconds, 4),
+            "wall_s": round(end - start, 4),
+            "llm_calls": len(calls),
+            "llm_wait_s": round(sum(call_end - call_start for _, call_start, call_end in calls), 4),
+            "mem_current_mb": round(current / MB, 2),
+            "mem_peak_mb": round(peak / MB, 2),
+        })
+
+    def click(self, label=None, key=None, sidebar=False):
+        buttons = self.at.sidebar.button if sidebar else self.at.button
+        if key:
+            return lambda: self.run(self.at.button(key=key).click())
+        return lambda: self.run(next(b for b in buttons if b.label == label).click())
+
+    def chat(self, text):
+        return lambda: self.run(self.at.chat_input[0].set_value(text))
+
+    def upload(self, name, content):
+        return lambda: self.run(self.at.file_uploader[0].set_value((name, content, "text/plain")))
+
+    def in_section(self, section, stage):
+        """Returns an action that runs just one page section, after `stage()` has set a widget value in it.
+
+        Needs a Driver made with section_reruns=True. AppTest then only holds what the section
+        drew, so the next interaction needs a plain run first to draw the whole page.
+        """
+        def action():
+            stage()
+            self.at.session_state["rerun_section_name"] = section
+            self.run(self.at.button(key="rerun_section").click())
+        return action
+
+    def in_state(self, state, **lengths):
+        """Returns a check that the session reached `state` and its lists reached the given lengths."""
+        def check():
+            return self.state == state and all(len(self.session.get(key, [])) >= n for key, n in lengths.items())
+        return check
+
+
+def strategy_flow(d):
+    d.transition("strategy", "open_page", d.run, lambda: True)
+    d.transition("strategy", "new_session", d.click("📝 Start Brand Strategy", sidebar=True), d.in_state("awaiting_resume_choice"))
+    d.transition("strategy", "choose_upload", d.click("📄 Upload Resume"), d.in_state("awaiting_resume_upload"))
+    d.transition("strategy", "upload_resume", d.upload("resume.txt", RESUME), d.in_state("awaiting_confirmation"))
+    d.transition("strategy", "confirm_summary", d.chat("Yes, and I love mentoring."), d.in_state("awaiting_target"))
+    d.transition("strategy", "target_role", d.chat("AI Product Manager"), d.in_state("awaiting_audience"))
+    d.transition("strategy", "audience", d.chat("Hiring managers at AI startups"), d.in_state("awaiting_positioning"))
+    d.transition("strategy", "positioning", d.chat("Data-driven and approachable"), d.in_state("awaiting_samples"))
+    d.transition("strategy", "writing_samples", d.upload("sample.txt", WRITING_SAMPLE), d.in_state("awaiting_duration"))
+    d.transition("strategy", "duration_and_outline", d.chat("4 weeks"), d.in_state("awaiting_outline_approval"))
+    versions = len(d.session["strategy_history"])
+    d.transition("strategy", "refine_outline", d.chat("Make it bolder"), d.in_state("awaiting_outline_approval", strategy_history=versions + 1))
+    d.transition("strategy", "approve_outline", d.chat("looks good"), d.in_state("awaiting_refinement"))
+    versions = len(d.session["strategy_history"])
+    d.transition("strategy", "refine_strategy", d.chat("More data stories please"), d.in_state("awaiting_refinement", strategy_history=versions + 1))
+    d.transition("strategy", "approve_strategy", d.chat("looks good"), lambda: d.state == "strategy_approved" and bool(d.session.get("post_ideas")))
+    theme = next(iter(d.session["post_ideas"]))
+    d.transition("strategy", "write_post", d.click(key=f"write_{theme}_0"), lambda: d.state == "post_drafted" and bool(d.session.get("draft")))
+    draft = d.session["draft"]
+
+    def refine_draft():
+        area = next(a for a in d.at.text_area if a.label.startswith("✏️"))
+        area.input("Shorter, with a question at the end")
+        d.run(next(b for b in d.at.button if b.label == "✨ Refine Draft").click())
+    d.transition("strategy", "refine_draft", refine_draft, lambda: d.session.get("draft") != draft)
+
+
+def quick_ideas_flow(d):
+    d.transition("quick_ideas", "new_quick_session", d.click("✨ Quick Ideas", sidebar=True), d.in_state("quick_ideas_start"))
+
+    def generate():
+        next(t for t in d.at.text_input if t.label.startswith("What topic")).input("Pricing experiments")
+        d.run(next(b for b in d.at.button if b.label == "🚀 Generate Ideas").click())
+    d.transition("quick_ideas", "generate_ideas", generate, lambda: bool(d.session.get("quick_ideas")))
+    count = len(d.session["quick_ideas"])
+    d.transition("quick_ideas", "more_like_this", d.click(key="current_idea_more_0"), lambda: len(d.session["quick_ideas"]) > count)
+    d.transition("quick_ideas", "write_post", d.click(key="current_idea_write_0"), lambda: d.state == "post_drafted" and bool(d.session.get("draft")))
+
+
+def section_flow(d):
+    """Answers the target role with a run of just the strategy section, then goes on to the post ideas.
+
+    The profile job finishes while the user reads the summary, so with no full page run in
+    between only that section run can merge it, as happens in a browser.
+    """
+    d.transition("sections", "open_page", d.run, lambda: True)
+    d.transition("sections", "new_session", d.click("📝 Start Brand Strategy", sidebar=True), d.in_state("awaiting_resume_choice"))
+    d.transition("sections", "choose_upload", d.click("📄 Upload Resume"), d.in_state("awaiting_resume_upload"))
+    d.transition("sections", "upload_resume", d.upload("resume.txt", RESUME), d.in_state("awaiting_confirmation"))
+    # Other notes than the strategy flow's, so the profile isn't a cache hit that finishes before the next run
+    d.transition("sections", "confirm_summary", d.chat("Yes, and I run a product meetup."), d.in_state("awaiting_target"))
+    for job in job_queue.pending(d.at.session_state.current_session_id, ("profile",)):
+        job.wait(d.timeout)
+    if "profile" in d.session:
+        raise RuntimeError("the profile was merged before the section run that should merge it")
+    d.transition("sections", "target_role", d.in_section("strategy", lambda: d.at.chat_input[0].set_value("AI Product Manager")), d.in_state("awaiting_audience"))
+    if not profile_is_current(d.session):
+        raise RuntimeError("a run of just the strategy section did not merge the finished profile job")
+    d.run()
+    d.transition("sections", "audience", d.chat("Hiring managers at AI startups"), d.in_state("awaiting_positioning"))
+    d.transition("sections", "positioning", d.chat("Data-driven and approachable"), d.in_state("awaiting_samples"))
+    d.transition("sections", "skip_samples", d.click("Skip for now"), d.in_state("awaiting_duration"))
+    d.transition("sections", "duration_and_outline", d.chat("4 weeks"), d.in_state("awaiting_outline_approval"))
+    if not profile_is_current(d.session):
+        raise RuntimeError("the outline was built without the distilled profile")
+    # Each approval adopts the step speculated from it; the flow ends once none is left running
+    d.transition("sections", "approve_outline", d.chat("looks good"), d.in_state("awaiting_refinement"))
+    d.transition("sections", "approve_strategy", d.chat("looks good"), lambda: d.state == "strategy_approved" and bool(d.session.get("post_ideas")))
+
+
+def compare(report, baseline, tolerance):
+    """Returns a description of every transition whose script time or peak memory regressed beyond the tolerance."""
+    previous = {(t["flow"], t["name"]): t for t in baseline["transitions"]}
+    regressions = []
+    for t in report["transitions"]:
+        old = previous.get((t["flow"], t["name"]))
+        if not old:
+            continue
+        for field in ("script_s", "mem_peak_mb"):
+            # Ignore noise on transitions too small to matter
+            floor = 0.05 if field == "script_s" else 1.0
+            if t[field] > max(old[field], floor) * (1 + tolerance):
+                regressions.append(f"{t['flow']}/{t['name']}: {field} {old[field]} -> {t[field]}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--ttft", type=float, default=0.3, help="median time to first token, seconds")
+    parser.add_argument("--ttft-sigma", type=float, default=0.3, help="lognormal sigma of the time to first token")
+    parser.add_argument("--tokens-per-second", type=float, default=200)
+    parser.add_argument("--tokens-per-second-sd", type=float, default=40)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--timeout", type=float, default=120, help="seconds to wait for any one transition")
+    parser.add_argument("--no-tracemalloc", action="store_true", help="skip memory tracing, which slows the script down")
+    parser.add_argument("--json", help="write the report to this file ('-' for stdout)")
+    parser.add_argument("--baseline", help="an earlier --json report to compare with")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    args = parser.parse_args()
+
+    fake_llm.install(ttft=args.ttft, ttft_sigma=args.ttft_sigma, tokens_per_second=args.tokens_per_second,
+                     tokens_per_second_sd=args.tokens_per_second_sd, seed=args.seed)
+    if not args.no_tracemalloc:
+        tracemalloc.start()
+    driver = Driver(args.timeout)
+    strategy_flow(driver)
+    quick_ideas_flow(driver)
+    section_driver = Driver(args.timeout, section_reruns=True)
+    section_flow(section_driver)
+    driver.transitions += section_driver.transitions
+
+    report = {
+        "config": {k: v for k, v in vars(args).items() if k not in ("json", "baseline")},
+        "transitions": driver.transitions,
+        "totals": {
+            field: round(sum(t[field] for t in driver.transitions), 4)
+            for field in ("script_s", "wall_s", "llm_wait_s", "llm_calls")
+        },
+    }
+    out = sys.stderr if args.json == "-" else sys.stdout
+    print(f"{'transition':<36} {'runs':>4} {'script':>8} {'wall':>8} {'llm wait':>9} {'calls':>5} {'mem':>8} {'peak':>8}", file=out)
+    for t in driver.transitions:
+        print(f"{t['flow'] + '/' + t['name']:<36} {t['runs']:>4} {t['script_s']:>7.2f}s {t['wall_s']:>7.2f}s {t['llm_wait_s']:>8.2f}s "
+              f"{t['llm_calls']:>5} {t['mem_current_mb']:>6.1f}MB {t['mem_peak_mb']:>6.1f}MB", file=out)
+    totals = report["totals"]
+    print(f"{'total':<36} {'':>4} {totals['script_s']:>7.2f}s {totals['wall_s']:>7.2f}s {totals['llm_wait_s']:>8.2f}s {totals['llm_calls']:>5}", file=out)
+
+    if args.json == "-":
+        json.dump(report, sys.stdout, indent=2)
+    elif args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            regressions = compare(report, json.load(f), args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,195 @@
+"""A deterministic local stand-in for the Gemini and Groq LLMs, for offline benchmarks.
+
+install() builds one FakeLLM per model in agents.py and swaps it in, so every agent the
+app builds afterwards talks to it instead of a provider. A FakeLLM answers each task with
+plausible output in the format the app expects (strategies with weekly themes, idea JSON,
+posts, critiques), chosen from the prompt alone, so the same prompt always gets the same
+answer. It waits a time to first token drawn from a lognormal distribution and then emits
+the answer at a token rate drawn from a normal distribution, both seeded by the prompt, and
+streams the answer in chunks when crewai asks for a stream. fake_llm_server.py serves the
+same answers over HTTP, for processes that can't be patched.
+
+    import fake_llm
+    fake_llm.install(ttft=0.3, tokens_per_second=200)
+"""
+import ast
+import json
+import math
+import os
+import random
+import re
+import sys
+import threading
+import time
+import zlib
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from crewai.llms.base_llm import BaseLLM, llm_call_context  # noqa: E402
+import agents  # noqa: E402
+
+WORDS = (
+    "roadmap hiring pricing retention churn feedback launch metrics culture remote leadership mentoring "
+    "burnout promotion interview negotiation budget forecast experiment dashboard analytics customer "
+    "partner investor founder engineer designer startup platform workflow automation security quality "
+    "focus habit failure lesson success growth onboarding discovery prototype research storytelling "
+    "community ownership tradeoff alignment velocity craft strategy data model evaluation privacy trust"
+).split()
+OPENERS = ["Why", "How I learned", "The hidden cost of", "A contrarian take on", "3 lessons on", "What nobody tells you about", "The playbook for"]
+DAYS = ["Monday", "Wednesday", "Friday"]
+
+# Every call any FakeLLM answered: (task name, start, end) in time.perf_counter() seconds
+_calls = []
+_calls_lock = threading.Lock()
+
+
+def calls_between(start, end):
+    """Returns the (task, start, end) of the calls that finished between two perf_counter() times."""
+    with _calls_lock:
+        return [call for call in _calls if start <= call[2] <= end]
+
+
+def words(rng, count):
+    return " ".join(rng.sample(WORDS, count))
+
+
+def idea(rng):
+    return f"{rng.choice(OPENERS)} {words(rng, 7)}"
+
+
+def _themes_json(themes, rng):
+    return json.dumps({"themes": [{"theme": theme, "ideas": [idea(rng) for _ in range(count)]} for theme, count in themes]})
+
+
+def _weeks(prompt):
+    match = re.search(r"(\d+)[- ]weeks?", prompt)
+    return min(int(match.group(1)), 12) if match else 4
+
+
+def strategy(prompt, rng):
+    weeks = []
+    for week in range(1, _weeks(prompt) + 1):
+        days = "\n".join(f"- {day}: {idea(rng)}" for day in DAYS)
+        weeks.append(f"**Week {week}: {words(rng, 3).title()}**\n{days}")
+    return "\n\n".join(weeks)
+
+
+def _requested_themes(task_name, prompt):
+    """Returns (theme, number of ideas) for the themes an idea task asks for, when it names them."""
+    if task_name == "theme_ideas_batch_task":
+        return [(theme, int(count)) for theme, count in re.findall(r"^\s*\d+\. THEME: (.+?) - (\d+) new ideas", prompt, re.MULTILINE)]
+    if task_name == "refine_selected_ideas_across_themes_task":
+        return [(theme, 1) for theme in dict.fromkeys(re.findall(r"THEME: (.*?)\\n- ", prompt))]
+    if task_name == "regenerate_ideas_for_all_unselected_topics_task":
+        match = re.search(r"UNSELECTED IDEAS TO REGENERATE:\s*(\[.*?\])\s*$", prompt, re.MULTILINE)
+        return [(theme, 3) for theme in ast.literal_eval(match.group(1))] if match else []
+    if task_name == "ideation_task":
+        return [(theme.strip(), 3) for theme in dict.fromkeys(re.findall(r"\*\*Week \d+: ([^*]+)\*\*", prompt))]
+    return []
+
+
+def respond(task_name, prompt, rng):
+    """Returns the answer to a task, in the format the app expects from it."""
+    if task_name == "summarize_resume_task":
+        return (f"I see you've spent years working on {words(rng, 4)}. It looks like you're aiming for a role in {words(rng, 2)}.\n\n"
+                "Did I get that right? Is there anything else you would like to add that the resume doesn't cover such as "
+                "things you're interested in, your hobbies, or specific aspirations?")
+    if task_name == "distill_profile_task":
+        return json.dumps({
+            "skills": rng.sample(WORDS, 5), "years_experience": rng.randint(3, 15), "industry": "Technology",
+            "goals": [words(rng, 4)], "notable_metrics": [f"Grew {rng.choice(WORDS)} by {rng.randint(10, 90)}%"], "interests": rng.sample(WORDS, 3),
+        })
+    if task_name in ("intermediate_outline_task", "strategy_task", "refine_strategy_task"):
+        return strategy(prompt, rng)
+    if task_name == "title_task":
+        return words(rng, 4).title()
+    if task_name in ("writing_task", "refine_writing_task"):
+        return "\n\n".join(f"{idea(rng)}. {words(rng, 12).capitalize()}." for _ in range(5)) + "\n\nWhat's your take? #leadership"
+    if task_name == "qa_critique_task":
+        return "\n".join(f"- Make the {rng.choice(WORDS)} point more specific with {words(rng, 3)}." for _ in range(3))
+    if task_name == "single_post_ideas_task":
+        match = re.search(r"generate (\d+) distinct", prompt)
+        return json.dumps({"ideas": [idea(rng) for _ in range(int(match.group(1)) if match else 3)]})
+    if task_name == "short_series_ideas_task":
+        return json.dumps({"ideas": [f"Part {part}: {idea(rng)}" for part in range(1, 4)]})
+    themes = _requested_themes(task_name, prompt) or [(words(rng, 2).title(), 3)]
+    return _themes_json(themes, rng)
+
+
+# Phrases that identify each task's prompt, for callers that only see the prompt (fake_llm_server)
+TASK_MARKERS = (
+    ("summarize_resume_task", "Summarize the provided resume"),
+    ("distill_profile_task", "Distill the user's resume"),
+    ("intermediate_outline_task", "intermediate-level outline"),
+    ("refine_strategy_task", "You are refining a personal branding content strategy"),
+    ("strategy_task", "comprehensive background and writing samples"),
+    ("fix_ideas_output_task", "was supposed to be a JSON object of LinkedIn post ideas"),
+    ("ideation_task", "for EACH of the following daily themes"),
+    ("title_task", "extract a single, concise title"),
+    ("refine_writing_task", "Refine the following draft of a LinkedIn post"),
+    ("writing_task", "Write a full, ready-to-publish LinkedIn post"),
+    ("qa_critique_task", "Review the following drafted LinkedIn post"),
+    ("single_post_ideas_task", "distinct, concise, one-liner LinkedIn post ideas"),
+    ("short_series_ideas_task", "cohesive 3-part LinkedIn post series"),
+)
+
+
+def guess_task(prompt):
+    """Returns the name of the task a prompt was rendered from, or "unnamed_task"."""
+    return next((name for name, marker in TASK_MARKERS if marker in prompt), "unnamed_task")
+
+
+def rng_for(seed, model, prompt):
+    return random.Random(zlib.crc32(f"{seed}:{model}:{prompt}".encode()))
+
+
+def sample_timing(rng, ttft, ttft_sigma, tokens_per_second, tokens_per_second_sd):
+    """Returns a call's time to first token (lognormal around `ttft`) and its token rate (normal)."""
+    return ttft * math.exp(rng.gauss(0, ttft_sigma)), max(1.0, rng.gauss(tokens_per_second, tokens_per_second_sd))
+
+
+def record_call(task_name, start):
+    with _calls_lock:
+        _calls.append((task_name, start, time.perf_counter()))
+
+
+class FakeLLM(BaseLLM):
+    """An LLM that answers locally after a simulated, prompt-seeded delay."""
+
+    ttft: float = 0.3
+    ttft_sigma: float = 0.3
+    tokens_per_second: float = 200.0
+    tokens_per_second_sd: float = 40.0
+    seed: int = 0
+
+    def call(self, messages, tools=None, callbacks=None, available_functions=None, from_task=None, from_agent=None, response_model=None):
+        start = time.perf_counter()
+        prompt = messages if isinstance(messages, str) else "\n".join(str(m.get("content", "")) for m in messages)
+        task_name = getattr(from_task, "name", None) or "unnamed_task"
+        rng = rng_for(self.seed, self.model, prompt)
+        answer = respond(task_name, prompt, rng)
+        text = f"Thought: I now know the final answer\nFinal Answer: {answer}"
+
+        ttft, rate = sample_timing(rng, self.ttft, self.ttft_sigma, self.tokens_per_second, self.tokens_per_second_sd)
+        time.sleep(ttft)
+        if self._effective_stream():
+            # Stream events need the call ID a provider call would have set up
+            with llm_call_context():
+                for chunk in re.findall(r"\S+\s*", text):
+                    time.sleep(len(chunk) / 4 / rate)
+                    self._emit_stream_chunk_event(chunk, from_task=from_task, from_agent=from_agent)
+        else:
+            time.sleep(len(text) / 4 / rate)
+
+        prompt_tokens, completion_tokens = len(prompt) // 4, len(text) // 4
+        self._track_token_usage_internal({
+            "prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens, "total_tokens": prompt_tokens + completion_tokens,
+        })
+        record_call(task_name, start)
+        return text
+
+
+def install(**distribution):
+    """Swaps a FakeLLM in for each model in agents.py; call it before the app builds any agent."""
+    for model in (agents.GEMINI_MODEL, agents.GROQ_MODEL):
+        agents.set_llm(model, FakeLLM(model=model, **distribution))
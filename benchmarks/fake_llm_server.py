@@ -0,0 +1,85 @@
+"""An OpenAI-compatible HTTP server that answers like fake_llm, for testing the app's processes end to end.
+
+Serves POST /v1/chat/completions, streamed (server-sent events) or not, with fake_llm's
+answers and latency model. The task is recognised from the prompt. Point the app, api.py
+or cohort.py at it with:
+
+    ASCENT_LLM_BASE_URL=http://127.0.0.1:8901/v1 ASCENT_GEMINI_MODEL=openai/fake-gemini ASCENT_GROQ_MODEL=openai/fake-groq
+
+    python benchmarks/fake_llm_server.py [--port 8901] [--ttft 0.3] [--tokens-per-second 200] [--seed 0]
+"""
+import argparse
+import asyncio
+import json
+import re
+import time
+import uuid
+
+from aiohttp import web
+
+import fake_llm
+
+
+def make_app(ttft=0.3, ttft_sigma=0.3, tokens_per_second=200.0, tokens_per_second_sd=40.0, seed=0):
+    async def chat_completions(request):
+        start = time.perf_counter()
+        body = await request.json()
+        model = body.get("model", "fake")
+        prompt = "\n".join(str(message.get("content") or "") for message in body.get("messages", []))
+        task_name = fake_llm.guess_task(prompt)
+        rng = fake_llm.rng_for(seed, model, prompt)
+        text = f"Thought: I now know the final answer\nFinal Answer: {fake_llm.respond(task_name, prompt, rng)}"
+        first_token, rate = fake_llm.sample_timing(rng, ttft, ttft_sigma, tokens_per_second, tokens_per_second_sd)
+        usage = {"prompt_tokens": len(prompt) // 4, "completion_tokens": len(text) // 4, "total_tokens": (len(prompt) + len(text)) // 4}
+        completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+        await asyncio.sleep(first_token)
+
+        if not body.get("stream"):
+            await asyncio.sleep(len(text) / 4 / rate)
+            fake_llm.record_call(task_name, start)
+            return web.json_response({
+                "id": completion_id, "object": "chat.completion", "created": int(time.time()), "model": model,
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": text}, "finish_reason": "stop"}],
+                "usage": usage,
+            })
+
+        response = web.StreamResponse(headers={"Content-Type": "text/event-stream", "Cache-Control": "no-cache"})
+        await response.prepare(request)
+
+        async def send(delta, finish_reason=None, **extra):
+            chunk = {
+                "id": completion_id, "object": "chat.completion.chunk", "created": int(time.time()), "model": model,
+                "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}], **extra,
+            }
+            await response.write(f"data: {json.dumps(chunk)}\n\n".encode())
+
+        await send({"role": "assistant", "content": ""})
+        for piece in re.findall(r"\S+\s*", text):
+            await asyncio.sleep(len(piece) / 4 / rate)
+            await send({"content": piece})
+        await send({}, "stop", usage=usage)
+        await response.write(b"data: [DONE]\n\n")
+        fake_llm.record_call(task_name, start)
+        return response
+
+    app = web.Application()
+    app.router.add_post("/v1/chat/completions", chat_completions)
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8901)
+    parser.add_argument("--ttft", type=float, default=0.3)
+    parser.add_argument("--ttft-sigma", type=float, default=0.3)
+    parser.add_argument("--tokens-per-second", type=float, default=200)
+    parser.add_argument("--tokens-per-second-sd", type=float, default=40)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    app = make_app(args.ttft, args.ttft_sigma, args.tokens_per_second, args.tokens_per_second_sd, args.seed)
+    web.run_app(app, host=args.host, port=args.port, print=None)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""Compares the script time of app page interactions when they rerun the whole page vs. only their own section.
+
+Seeds a throwaway session store with a long session (a 60-turn chat, 8 strategy versions,
+48 post ideas, 20 quick ideas, 10 saved drafts) and 30 more sessions for the sidebar,
+opens it in pages/2_Ascent_AI_App.py with streamlit's AppTest and repeats interactions
+that each belong to one page section.
+
+AppTest always reruns the whole script, which is what every interaction did before the
+sidebar and tabs became fragments, so the full run is the "before" time. The "after"
+time is the script time of the section the interaction belongs to, as recorded by the
+page (the same code a fragment-only rerun executes). In a browser, the Metrics page shows
+the times of actual fragment runs.
+
+    python benchmarks/fragment_reruns.py [--repeats 10]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import uuid
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.environ["ASCENT_SESSION_DB_PATH"] = os.path.join(tempfile.mkdtemp(), "sessions.sqlite3")
+os.environ.setdefault("ASCENT_CACHE_PATH", os.path.join(tempfile.mkdtemp(), "kickoff_cache.sqlite3"))
+# The background import of crewai would otherwise compete with the timed reruns
+os.environ["ASCENT_PREWARM"] = "0"
+
+from streamlit.testing.v1 import AppTest  # noqa: E402
+import metrics as metrics_module  # noqa: E402
+from session_store import session_store  # noqa: E402
+from versions import version_store  # noqa: E402
+
+STRATEGY = "\n".join(f"**Week {week}: Theme {week}**\n- Monday: A story post about lesson {week}\n- Thursday: A data post about metric {week}" for week in range(1, 13))
+
+
+def long_session():
+    strategy_history, base_id = [], None
+    for version in range(1, 9):
+        base_id = version_store.put(f"{STRATEGY}\n\nRevision {version}", base_id)
+        strategy_history.append({"version": version, "timestamp": "2025-01-01 09:00:00", "content_id": base_id})
+    messages = []
+    for turn in range(30):
+        messages.append({"role": "user", "content": f"Feedback {turn}: make week {turn % 12 + 1} more specific."})
+        messages.append({"role": "assistant", "content": f"Here is the update:\n\n---\n\n{STRATEGY}\n\n---\n\nHow does this look?"})
+    return {
+        "title": "Long session",
+        "conversation_state": "post_drafted",
+        "context": {"target_role": "AI Product Manager", "target_audience": "Tech leaders", "positioning": "Data-driven"},
+        "messages": messages,
+        "strategy_history": strategy_history,
+        "post_ideas": {
+            f"Theme {theme}": [{"text": f"Idea {idea} about theme {theme}: what I learned shipping it", "checked": False} for idea in range(6)]
+            for theme in range(8)
+        },
+        "quick_ideas": [{"text": f"Quick idea {i} on hiring and culture", "checked": False} for i in range(20)],
+        "draft_history": [{"timestamp": "2025-01-01 10:00:00", "content": f"Draft {i}\n\n" + "A line of the post.\n" * 20} for i in range(10)],
+        "draft": "The current draft.\n" * 20,
+        "selected_idea": "Idea 0 about theme 0: what I learned shipping it",
+    }
+
+
+def open_session(owner, session_id):
+    at = AppTest.from_file(os.path.join(ROOT, "pages", "2_Ascent_AI_App.py"), default_timeout=120)
+    at.session_state["owner_id"] = owner
+    at.run()
+    at.button(key=f"load_{session_id}").click().run()
+    assert not at.exception, at.exception
+    return at
+
+
+def interactions(at):
+    """Yields (name, section, action) for interactions that each change one section."""
+    checked = [False, False]
+
+    def toggle_post_idea():
+        checked[0] = not checked[0]
+        at.checkbox(key="check_Theme 0_0").set_value(checked[0]).run()
+
+    def toggle_quick_idea():
+        checked[1] = not checked[1]
+        at.checkbox(key="current_idea_check_0").set_value(checked[1]).run()
+
+    def page_history():
+        key = "history_next" if not at.button(key="history_next").disabled else "history_prev"
+        at.button(key=key).click().run()
+
+    def open_strategy_version():
+        at.session_state["view_strategy_1"] = not at.session_state["view_strategy_1"] if "view_strategy_1" in at.session_state else True
+        at.run()
+
+    def restore_draft():
+        at.button(key="restore_0").click().run()
+
+    yield "toggle a post idea", "posts", toggle_post_idea
+    yield "toggle a quick idea", "quick_ideas", toggle_quick_idea
+    yield "page the session history", "sidebar", page_history
+    yield "open a strategy version", "strategy", open_strategy_version
+    yield "restore a saved draft", "writer", restore_draft
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeats", type=int, default=10)
+    args = parser.parse_args()
+
+    owner, session_id = str(uuid.uuid4()), str(uuid.uuid4())
+    for i in range(30):
+        session_store.save(str(uuid.uuid4()), {"title": f"Session {i}", "conversation_state": "strategy_approved", "messages": []}, owner=owner)
+    session_store.save(session_id, long_session(), owner=owner)
+    at = open_session(owner, session_id)
+
+    print(f"{'interaction':<26} {'section':>12} {'whole page':>11} {'section only':>13} {'saved':>6}")
+    for name, section, action in interactions(at):
+        # The page reads metrics.metrics on every run, so a fresh registry holds just this interaction's runs
+        metrics_module.metrics = metrics_module.MetricsRegistry(jsonl_path=None)
+        for _ in range(args.repeats):
+            action()
+            assert not at.exception, at.exception
+        times = {(row["section"], row["scope"]): row["p50_ms"] for row in metrics_module.metrics.render_summary()}
+        page_ms, section_ms = times[("page", "page")], times[(section, "page")]
+        print(f"{name:<26} {section:>12} {page_ms:>9.1f}ms {section_ms:>11.1f}ms {1 - section_ms / page_ms:>6.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""Benchmarks the streaming idea parsers against parse_ideas/parse_quick_ideas.
+
+Builds a corpus of ideation outputs in the shapes the ideator produces (preambles, bold
+or repeated themes, wrapped ideas, blank lines, mixed-case markers), splits each one
+into token-sized chunks and compares:
+
+* batch: parse_ideas on the complete text, once
+* reparse: parse_ideas on the accumulated text after every chunk, i.e. progressive
+  rendering without an incremental parser
+* stream: IdeaStreamParser.feed for every chunk, then close()
+
+Every streamed result is checked against parse_ideas (and parse_quick_ideas for bulleted lists).
+
+    python benchmarks/idea_parsing.py [--outputs 2000] [--seed 7]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from idea_parsing import IdeaStreamParser, QuickIdeaStreamParser, parse_ideas, parse_quick_ideas  # noqa: E402
+
+WORDS = (
+    "why most teams get onboarding wrong the hidden cost of context switching what I learned shipping "
+    "an AI feature in 30 days a contrarian take on roadmaps three metrics every PM should track"
+).split()
+PREAMBLES = ["", "Here are your post ideas:\n\n", "Thought: I now know the final answer\n", "Sure! Based on the approved strategy:\n"]
+MARKERS = ["THEME: ", "THEME:", "Theme: ", "**THEME:** "]
+
+
+def make_output(rnd):
+    """Returns one synthetic ideation output."""
+    parts = [rnd.choice(PREAMBLES)]
+    themes = [" ".join(rnd.choices(WORDS, k=rnd.randint(2, 5))).title() for _ in range(rnd.randint(3, 6))]
+    if rnd.random() < 0.1:
+        themes.append(themes[0])  # the model occasionally repeats a theme
+    for theme in themes:
+        parts.append(f"{rnd.choice(MARKERS)}{theme}\n")
+        for _ in range(rnd.randint(3, 8)):
+            parts.append(f"- {' '.join(rnd.choices(WORDS, k=rnd.randint(8, 20)))}\n")
+            if rnd.random() < 0.15:
+                parts.append(f"  {' '.join(rnd.choices(WORDS, k=rnd.randint(4, 10)))}\n")  # wrapped idea
+        parts.append("\n" if rnd.random() < 0.7 else "")
+    return "".join(parts)
+
+
+def make_list_output(rnd):
+    """Returns one synthetic quick-ideas output (a bulleted list)."""
+    lines = [f"- {' '.join(rnd.choices(WORDS, k=rnd.randint(8, 20)))}" for _ in range(rnd.randint(1, 10))]
+    return rnd.choice(PREAMBLES) + "\n".join(lines)
+
+
+def chunked(rnd, text):
+    """Splits text into pieces of 1-12 characters, roughly the size of streamed tokens."""
+    chunks, i = [], 0
+    while i < len(text):
+        size = rnd.randint(1, 12)
+        chunks.append(text[i:i + size])
+        i += size
+    return chunks
+
+
+def stream(parser_cls, chunks):
+    parser = parser_cls()
+    for chunk in chunks:
+        parser.feed(chunk)
+    parser.close()
+    return parser.ideas
+
+
+def reparse(parse, chunks):
+    text = ""
+    for chunk in chunks:
+        text += chunk
+        result = parse(text)
+    return result
+
+
+def _time(fn, items):
+    start = time.perf_counter()
+    results = [fn(item) for item in items]
+    return time.perf_counter() - start, results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--outputs", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rnd = random.Random(args.seed)
+    print(f"{'parser':>12} {'corpus':>8} {'chunks':>8} {'batch':>10} {'reparse':>10} {'stream':>10} {'vs reparse':>10}")
+    for name, make, parse, parser_cls in (
+        ("themes", make_output, parse_ideas, IdeaStreamParser),
+        ("quick list", make_list_output, parse_quick_ideas, QuickIdeaStreamParser),
+    ):
+        texts = [make(rnd) for _ in range(args.outputs)]
+        chunk_lists = [chunked(rnd, text) for text in texts]
+        size_mb = sum(len(text) for text in texts) / 1e6
+
+        batch_seconds, expected = _time(parse, texts)
+        stream_seconds, actual = _time(lambda chunks: stream(parser_cls, chunks), chunk_lists)
+        if actual != expected:
+            raise SystemExit(f"{parser_cls.__name__} differs from {parse.__name__}")
+        # Re-parsing after every chunk is quadratic, so it is timed on a sample and scaled up
+        sample = chunk_lists[:max(1, len(chunk_lists) // 10)]
+        reparse_seconds, _ = _time(lambda chunks: reparse(parse, chunks), sample)
+        reparse_seconds *= len(chunk_lists) / len(sample)
+
+        print(
+            f"{name:>12} {size_mb:>6.1f}MB {sum(map(len, chunk_lists)):>8} "
+            f"{size_mb / batch_seconds:>6.1f}MB/s {size_mb / reparse_seconds:>6.2f}MB/s {size_mb / stream_seconds:>6.1f}MB/s "
+            f"{reparse_seconds / stream_seconds:>9.0f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,269 @@
+"""Load-tests one app process with many simultaneous users to find how many it can serve.
+
+Each simulated user gets its own session, built like create_mock_session() but scaled up
+(by default 1,000 post ideas, a 200-message transcript, 8 strategy versions, 100 quick
+ideas and 10 saved drafts), opens it in pages/2_Ascent_AI_App.py with streamlit's AppTest
+and then replays a weighted mix of clicks with random think time in between: toggling post
+and quick ideas, opening strategy versions, searching the session history and writing a
+post, which waits for fake_llm's stand-in LLM like a browser waiting for the draft.
+
+For each number of users it reports:
+
+* throughput: script runs per second across all users
+* rerun latency percentiles: from a user's click until their page finished rerunning
+* per-session memory: the Python heap each opened session adds (tracemalloc, while the
+  sessions are opened, so the latency phase runs untraced but opening is slower than
+  usual) and the process peak RSS
+
+AppTest installs a process-wide runtime for the duration of every run, so the script runs
+of different users are serialized with a lock. A real worker interleaves them on the GIL
+instead, which gives about the same throughput for this CPU-bound script; the latencies
+include the time a click waits behind other users' reruns in both cases.
+
+The capacity is the most users whose p95 rerun latency stays within --p95-budget, and the
+number of sessions that fit in --memory-budget-mb at the measured per-session memory.
+
+    python benchmarks/load_test.py [--users 1,2,4,8] [--duration 60] [--ideas 1000] [--turns 100]
+                                   [--think 2] [--p95-budget 1.0] [--memory-budget-mb 2048] [--json report.json]
+"""
+import argparse
+import json
+import os
+import random
+import resource
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+import uuid
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.environ["ASCENT_SESSION_DB_PATH"] = os.path.join(tempfile.mkdtemp(), "sessions.sqlite3")
+os.environ["ASCENT_CACHE_PATH"] = os.path.join(tempfile.mkdtemp(), "kickoff_cache.sqlite3")
+os.environ["ASCENT_PREWARM"] = "0"
+for name in ("GEMINI_RPM", "GEMINI_TPM", "GROQ_RPM", "GROQ_TPM"):
+    os.environ.setdefault(name, "0")
+
+import fake_llm  # noqa: E402
+from streamlit.testing.v1 import AppTest  # noqa: E402
+from session_store import session_store  # noqa: E402
+from versions import version_store  # noqa: E402
+
+MB = 1024 * 1024
+IDEAS_PER_THEME = 50
+DRAFT_TIMEOUT = 60
+STRATEGY = "\n".join(
+    f"**Week {week}: Theme {week}**\n- Monday: A story post about lesson {week}\n- Thursday: A data post about metric {week}"
+    for week in range(1, 13)
+)
+
+# AppTest swaps a process-wide runtime in and out around every run
+run_lock = threading.Lock()
+
+
+def mock_session(ideas, turns, rng):
+    """Returns a session shaped like create_mock_session()'s, scaled up to `ideas` post ideas and `turns` chat turns."""
+    strategy_history, base_id = [], None
+    for version in range(1, 9):
+        base_id = version_store.put(f"{STRATEGY}\n\nRevision {version} for {rng.random()}", base_id)
+        strategy_history.append({"version": version, "timestamp": "2025-01-01 09:00:00", "content_id": base_id})
+    messages = [{"role": "assistant", "content": "Mock session loaded. Ready for testing!"}]
+    for turn in range(turns):
+        messages.append({"role": "user", "content": f"Feedback {turn}: make week {turn % 12 + 1} more specific about {fake_llm.words(rng, 3)}."})
+        messages.append({"role": "assistant", "content": f"Here is the update:\n\n---\n\n{fake_llm.strategy('4 weeks', rng)}\n\n---\n\nHow does this look?"})
+    themes = max(1, ideas // IDEAS_PER_THEME)
+    return {
+        "title": "Load Test Session",
+        "messages": messages,
+        "conversation_state": "post_drafted",
+        "context": {
+            "user_context": "Sample user background.",
+            "target_role": "AI Product Manager",
+            "target_audience": "Tech executives and VCs",
+            "positioning": "Innovative and data-driven",
+            "duration": "4",
+            "platform": "LinkedIn",
+        },
+        "strategy_history": strategy_history,
+        "post_ideas": {
+            f"Theme {theme}: {fake_llm.words(rng, 2)}": [
+                {"text": fake_llm.idea(rng), "checked": False} for _ in range(ideas // themes)
+            ]
+            for theme in range(themes)
+        },
+        "quick_ideas": [{"text": fake_llm.idea(rng), "checked": False} for _ in range(100)],
+        "draft_history": [{"timestamp": "2025-01-01 10:00:00", "content": f"Draft {i}\n\n" + "A line of the post.\n" * 20} for i in range(10)],
+        "draft": "The current draft.\n" * 20,
+        "selected_idea": None,
+    }
+
+
+class User:
+    """One simulated browser session."""
+
+    def __init__(self, ideas, turns, seed):
+        self.rng = random.Random(seed)
+        owner, self.session_id = str(uuid.uuid4()), str(uuid.uuid4())
+        session_store.save(self.session_id, mock_session(ideas, turns, self.rng), owner=owner)
+        self.at = AppTest.from_file(os.path.join(ROOT, "pages", "2_Ascent_AI_App.py"), default_timeout=300)
+        self.at.session_state["owner_id"] = owner
+        self.latencies = []
+        self.errors = 0
+        self.run()
+        self.run(self.at.button(key=f"load_{self.session_id}").click())
+
+    @property
+    def session(self):
+        return self.at.session_state.sessions[self.session_id]
+
+    def run(self, element=None):
+        """Reruns the page, after interacting with `element` if given, and records the latency."""
+        start = time.perf_counter()
+        with run_lock:
+            (element or self.at).run()
+        self.latencies.append(time.perf_counter() - start)
+        if self.at.exception:
+            self.errors += 1
+
+    def toggle_post_idea(self):
+        theme = self.rng.choice(list(self.session["post_ideas"]))
+        i = self.rng.randrange(len(self.session["post_ideas"][theme]))
+        checkbox = self.at.checkbox(key=f"check_{theme}_{i}")
+        self.run(checkbox.set_value(not checkbox.value))
+
+    def toggle_quick_idea(self):
+        checkbox = self.at.checkbox(key=f"current_idea_check_{self.rng.randrange(len(self.session['quick_ideas']))}")
+        self.run(checkbox.set_value(not checkbox.value))
+
+    def open_strategy_version(self):
+        key = f"view_strategy_{self.rng.randint(1, len(self.session['strategy_history']))}"
+        self.at.session_state[key] = not self.at.session_state[key] if key in self.at.session_state else True
+        self.run()
+
+    def search_history(self):
+        self.run(self.at.text_input(key="history_search").input(self.rng.choice(["", "load", "test", "session"])))
+
+    def write_post(self):
+        draft = self.session["draft"]
+        theme = self.rng.choice(list(self.session["post_ideas"]))
+        self.run(self.at.button(key=f"write_{theme}_0").click())
+        # The browser shows a spinner and picks the draft up on its next rerun
+        deadline = time.perf_counter() + DRAFT_TIMEOUT
+        while self.session["draft"] == draft and time.perf_counter() < deadline:
+            time.sleep(0.25)
+            self.run()
+
+    ACTIONS = [
+        (toggle_post_idea, 40),
+        (toggle_quick_idea, 20),
+        (open_strategy_version, 15),
+        (search_history, 15),
+        (write_post, 10),
+    ]
+
+    def browse(self, until, think):
+        """Clicks around until the deadline, waiting a random think time between clicks."""
+        actions, weights = zip(*self.ACTIONS)
+        while time.perf_counter() < until:
+            time.sleep(self.rng.expovariate(1 / think))
+            if time.perf_counter() >= until:
+                break
+            try:
+                self.rng.choices(actions, weights)[0](self)
+            except Exception:
+                self.errors += 1
+
+
+def percentile(values, q):
+    return statistics.quantiles(values, n=100, method="inclusive")[q - 1] if len(values) > 1 else (values[0] if values else 0.0)
+
+
+def run_level(users, args, seed):
+    """Opens `users` sessions, lets them browse for the duration and returns the level's measurements."""
+    traced = not args.no_tracemalloc
+    if traced:
+        tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0] if traced else 0
+    open_started = time.perf_counter()
+    sims = [User(args.ideas, args.turns, seed * 1000 + u) for u in range(users)]
+    open_seconds = time.perf_counter() - open_started
+    per_session_mb = (tracemalloc.get_traced_memory()[0] - before) / MB / users if traced else None
+    if traced:
+        tracemalloc.stop()
+    for sim in sims:
+        sim.latencies.clear()
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=sim.browse, args=(start + args.duration, args.think)) for sim in sims]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    latencies = [latency for sim in sims for latency in sim.latencies]
+    return {
+        "users": users,
+        "runs": len(latencies),
+        "errors": sum(sim.errors for sim in sims),
+        "throughput_runs_per_s": round(len(latencies) / elapsed, 2),
+        "p50_s": round(percentile(latencies, 50), 3),
+        "p95_s": round(percentile(latencies, 95), 3),
+        "p99_s": round(percentile(latencies, 99), 3),
+        "open_s_per_session": round(open_seconds / users, 3),
+        "session_mb": round(per_session_mb, 2) if per_session_mb is not None else None,
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", default="1,2,4,8", help="comma-separated numbers of simultaneous users to test")
+    parser.add_argument("--duration", type=float, default=60, help="seconds each number of users browses for")
+    parser.add_argument("--ideas", type=int, default=1000, help="post ideas in each session")
+    parser.add_argument("--turns", type=int, default=100, help="chat turns (two messages each) in each session")
+    parser.add_argument("--think", type=float, default=2.0, help="mean think time between a user's clicks, seconds")
+    parser.add_argument("--ttft", type=float, default=0.3, help="median time to first token of the fake LLM, seconds")
+    parser.add_argument("--tokens-per-second", type=float, default=200)
+    parser.add_argument("--p95-budget", type=float, default=1.0, help="highest acceptable p95 rerun latency, seconds")
+    parser.add_argument("--memory-budget-mb", type=float, default=2048, help="memory available to sessions in one worker")
+    parser.add_argument("--no-tracemalloc", action="store_true", help="skip the per-session memory measurement")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="write the report to this file ('-' for stdout)")
+    args = parser.parse_args()
+
+    fake_llm.install(ttft=args.ttft, tokens_per_second=args.tokens_per_second, seed=args.seed)
+    out = sys.stderr if args.json == "-" else sys.stdout
+    print(f"{'users':>5} {'runs':>6} {'runs/s':>7} {'p50':>7} {'p95':>7} {'p99':>7} {'open':>7} {'session':>9} {'peak RSS':>9} {'errors':>6}", file=out)
+    # Imports, crewai's first call and streamlit's caches would otherwise count against the first level
+    User(args.ideas, args.turns, -1).write_post()
+    levels = []
+    for users in (int(n) for n in args.users.split(",")):
+        level = run_level(users, args, args.seed + users)
+        levels.append(level)
+        session_mb = f"{level['session_mb']:.1f}MB" if level["session_mb"] is not None else "-"
+        print(f"{users:>5} {level['runs']:>6} {level['throughput_runs_per_s']:>7.2f} {level['p50_s']:>6.2f}s {level['p95_s']:>6.2f}s "
+              f"{level['p99_s']:>6.2f}s {level['open_s_per_session']:>6.2f}s {session_mb:>9} {level['peak_rss_mb']:>7.0f}MB {level['errors']:>6}", file=out)
+
+    within_budget = [level["users"] for level in levels if level["p95_s"] <= args.p95_budget]
+    session_mb = max((level["session_mb"] for level in levels if level["session_mb"]), default=None)
+    capacity = {
+        "users_within_p95_budget": max(within_budget, default=0),
+        "sessions_within_memory_budget": int(args.memory_budget_mb / session_mb) if session_mb else None,
+    }
+    print(f"\nCapacity: {capacity['users_within_p95_budget']} simultaneous users within a {args.p95_budget:.1f}s p95 rerun latency"
+          + (f"; {capacity['sessions_within_memory_budget']} open sessions within {args.memory_budget_mb:.0f}MB" if session_mb else ""), file=out)
+
+    report = {"config": {k: v for k, v in vars(args).items() if k != "json"}, "levels": levels, "capacity": capacity}
+    if args.json == "-":
+        json.dump(report, sys.stdout, indent=2)
+    elif args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
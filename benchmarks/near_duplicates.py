@@ -0,0 +1,83 @@
+"""Times the near-duplicate check for new ideas and measures how well it separates paraphrases.
+
+For sessions holding 1k-10k existing ideas it times one check of a batch of new ideas
+with cold signatures (every text hashed for the first time) and with warm ones (what
+every later rerun pays). It then scores synthetic paraphrases (words dropped, reordered,
+inflected or padded with filler) and unrelated ideas at the configured threshold.
+
+    python benchmarks/near_duplicates.py [--new 10] [--pairs 2000] [--seed 7]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import similarity  # noqa: E402
+
+WORDS = (
+    "onboarding roadmap hiring pricing retention churn feedback launch metrics culture remote leadership "
+    "mentoring burnout promotion interview negotiation budget forecast experiment dashboard analytics "
+    "customer partner investor founder engineer designer manager startup enterprise platform workflow "
+    "automation security compliance quality speed focus habit failure lesson mistake success growth"
+).split()
+OPENERS = ["Why", "How", "What I learned about", "The hidden cost of", "A contrarian take on", "3 lessons on"]
+FILLER = ["really", "actually", "today", "in 2025", "for real", "honestly"]
+
+
+def make_idea(rnd):
+    return f"{rnd.choice(OPENERS)} {' '.join(rnd.sample(WORDS, rnd.randint(5, 9)))}"
+
+
+def paraphrase(rnd, text):
+    words = text.split()
+    for _ in range(rnd.randint(1, 2)):
+        edit = rnd.random()
+        if edit < 0.3 and len(words) > 4:
+            words.pop(rnd.randrange(len(words)))
+        elif edit < 0.55:
+            i = rnd.randrange(len(words) - 1)
+            words[i], words[i + 1] = words[i + 1], words[i]
+        elif edit < 0.8:
+            i = rnd.randrange(len(words))
+            words[i] += "s"
+        else:
+            words.insert(rnd.randrange(len(words)), rnd.choice(FILLER))
+    return " ".join(words)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--new", type=int, default=10, help="new ideas per check")
+    parser.add_argument("--pairs", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+    rnd = random.Random(args.seed)
+
+    print(f"{'existing':>8} {'cold':>9} {'warm':>9}")
+    for count in (1000, 5000, 10000):
+        existing = [make_idea(rnd) for _ in range(count)]
+        new = [make_idea(rnd) for _ in range(args.new)]
+        similarity.signature.cache_clear()
+        start = time.perf_counter()
+        similarity.find_near_duplicates(new, existing)
+        cold = time.perf_counter() - start
+        start = time.perf_counter()
+        similarity.find_near_duplicates(new, existing)
+        warm = time.perf_counter() - start
+        print(f"{count:>8} {cold * 1000:>7.1f}ms {warm * 1000:>7.1f}ms")
+
+    originals = [make_idea(rnd) for _ in range(args.pairs)]
+    paraphrases = [paraphrase(rnd, text) for text in originals]
+    unrelated = [make_idea(rnd) for _ in range(args.pairs)]
+    same = [similarity.similarity_matrix([a], [b])[0, 0] for a, b in zip(originals, paraphrases)]
+    different = [similarity.similarity_matrix([a], [b])[0, 0] for a, b in zip(originals, unrelated)]
+    threshold = similarity.DUPLICATE_THRESHOLD
+    print(f"\nthreshold {threshold}: paraphrases caught {sum(s >= threshold for s in same) / len(same):.1%}, "
+          f"unrelated ideas flagged {sum(s >= threshold for s in different) / len(different):.2%}")
+
+
+if __name__ == "__main__":
+    main()
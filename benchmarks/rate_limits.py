@@ -0,0 +1,121 @@
+"""Simulates a burst of sessions against a rate-limited provider, with and without ratelimit.RateLimiter.
+
+The fake provider answers after a fixed latency and rejects calls beyond its
+requests-per-minute budget with a 429, which the client retries with exponential backoff
+the way the LLM client does. Time is scaled down so a "minute" lasts a few seconds.
+
+    python benchmarks/rate_limits.py [--sessions 40] [--calls 3] [--rpm 30] [--minute 3]
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import ratelimit  # noqa: E402
+from metrics import percentile  # noqa: E402
+
+MODEL = "fake/model"
+
+
+class RateLimited(Exception):
+    pass
+
+
+class FakeProvider:
+    """Accepts at most `rpm` calls in any sliding window of `minute` seconds."""
+
+    def __init__(self, rpm, minute, latency):
+        self.rpm = rpm
+        self.minute = minute
+        self.latency = latency
+        self.accepted = deque()
+        self.rejections = 0
+        self._lock = threading.Lock()
+
+    def call(self):
+        now = time.monotonic()
+        with self._lock:
+            while self.accepted and self.accepted[0] <= now - self.minute:
+                self.accepted.popleft()
+            if len(self.accepted) >= self.rpm:
+                self.rejections += 1
+                raise RateLimited()
+            self.accepted.append(now)
+        time.sleep(self.latency)
+
+
+def call_with_retries(provider, retries, backoff):
+    for attempt in range(retries + 1):
+        try:
+            return provider.call()
+        except RateLimited:
+            if attempt == retries:
+                raise
+            time.sleep(backoff * 2 ** attempt)
+
+
+def run(args, limiter):
+    provider = FakeProvider(args.rpm, args.minute, args.latency)
+    latencies, failures = [], 0
+    lock = threading.Lock()
+
+    def session():
+        nonlocal failures
+        for _ in range(args.calls):
+            start = time.perf_counter()
+            try:
+                if limiter:
+                    limiter.acquire(MODEL, 1)
+                call_with_retries(provider, args.retries, args.backoff)
+                with lock:
+                    latencies.append(time.perf_counter() - start)
+            except RateLimited:
+                with lock:
+                    failures += 1
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.sessions) as executor:
+        for _ in range(args.sessions):
+            executor.submit(session)
+    elapsed = time.perf_counter() - start
+    return {
+        "completed": len(latencies),
+        "failed": failures,
+        "429s": provider.rejections,
+        "per_minute": len(latencies) / elapsed * args.minute,
+        "p50": percentile(latencies, 50),
+        "p95": percentile(latencies, 95),
+        "elapsed": elapsed,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=40)
+    parser.add_argument("--calls", type=int, default=3, help="calls per session")
+    parser.add_argument("--rpm", type=int, default=30)
+    parser.add_argument("--minute", type=float, default=3.0, help="length of a simulated minute in seconds")
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--retries", type=int, default=3)
+    parser.add_argument("--backoff", type=float, default=0.1)
+    args = parser.parse_args()
+
+    limiter = ratelimit.RateLimiter(limits={MODEL: (args.rpm, 0)}, path=None, window_seconds=args.minute)
+
+    print(f"{args.sessions} sessions x {args.calls} calls, provider limit {args.rpm} per {args.minute:.0f}s 'minute'")
+    print(f"{'mode':>10} {'completed':>9} {'failed':>6} {'429s':>6} {'per min':>8} {'p50':>7} {'p95':>7} {'elapsed':>8}")
+    for mode, rate_limiter in (("herd", None), ("limited", limiter)):
+        r = run(args, rate_limiter)
+        print(
+            f"{mode:>10} {r['completed']:>9} {r['failed']:>6} {r['429s']:>6} {r['per_minute']:>8.1f} "
+            f"{r['p50'] or 0:>6.2f}s {r['p95'] or 0:>6.2f}s {r['elapsed']:>7.1f}s"
+        )
+
+
+if __name__ == "__main__":
+    main()
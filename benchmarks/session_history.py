@@ -0,0 +1,69 @@
+"""Times an app page rerun with a long session history, paginated vs. listing every session.
+
+Seeds a throwaway session store with N sessions for one owner, then renders
+pages/2_Ascent_AI_App.py headlessly with streamlit's AppTest and times reruns with the
+default page size and with a page size large enough to list the whole history (what the
+sidebar did before it was paginated).
+
+    python benchmarks/session_history.py [--sessions 50 200 1000] [--reruns 5]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+import uuid
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.environ["ASCENT_SESSION_DB_PATH"] = os.path.join(tempfile.mkdtemp(), "sessions.sqlite3")
+os.environ.setdefault("ASCENT_CACHE_PATH", os.path.join(tempfile.mkdtemp(), "kickoff_cache.sqlite3"))
+# The background import of crewai would otherwise compete with the timed reruns
+os.environ["ASCENT_PREWARM"] = "0"
+
+from streamlit.testing.v1 import AppTest  # noqa: E402
+from session_store import session_store  # noqa: E402
+
+
+def seed(owner, count):
+    for i in range(count):
+        session_store.save(str(uuid.uuid4()), {
+            "title": f"Session {i}: {uuid.uuid4().hex[:8]}",
+            "conversation_state": "strategy_approved",
+            "messages": [{"role": "assistant", "content": "Hi"}],
+            "post_ideas": {"Theme": [{"text": f"Idea {i}", "checked": False}]},
+        }, owner=owner)
+
+
+def time_reruns(owner, page_size, reruns):
+    os.environ["ASCENT_SESSION_PAGE_SIZE"] = str(page_size)
+    at = AppTest.from_file(os.path.join(ROOT, "pages", "2_Ascent_AI_App.py"), default_timeout=120)
+    at.session_state["owner_id"] = owner
+    at.run()
+    samples = []
+    for _ in range(reruns):
+        start = time.perf_counter()
+        at.run()
+        samples.append(time.perf_counter() - start)
+    buttons = sum(1 for button in at.sidebar.button if (button.key or "").startswith("load_"))
+    return min(samples), buttons
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, nargs="+", default=[50, 200, 1000])
+    parser.add_argument("--reruns", type=int, default=5)
+    args = parser.parse_args()
+
+    default_page_size = int(os.getenv("ASCENT_SESSION_PAGE_SIZE", 20))
+    print(f"{'sessions':>8} {'mode':>10} {'listed':>6} {'rerun':>9}")
+    for count in args.sessions:
+        owner = str(uuid.uuid4())
+        seed(owner, count)
+        for mode, page_size in (("all", count), ("paginated", default_page_size)):
+            seconds, listed = time_reruns(owner, page_size, args.reruns)
+            print(f"{count:>8} {mode:>10} {listed:>6} {seconds * 1000:>7.0f}ms")
+
+
+if __name__ == "__main__":
+    main()
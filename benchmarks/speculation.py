@@ -0,0 +1,92 @@
+"""Measures how long approving the outline and the strategy keeps a user waiting, with and without speculation.
+
+Drives pages/2_Ascent_AI_App.py with streamlit's AppTest against fake_llm's stand-in LLM,
+as end_to_end.py does, up to the outline. The simulated user reads each outline and
+strategy for --review seconds and then approves it, and the benchmark records the wait
+from the approval until the detailed strategy, or the post ideas, are shown. A second
+user gives feedback on the outline and the strategy before approving them, which shows
+the LLM calls spent on speculation that was cancelled.
+
+    python benchmarks/speculation.py [--review 3] [--ttft 0.3] [--tokens-per-second 200]
+"""
+import argparse
+import time
+
+# end_to_end sets up the environment (temporary stores, no rate limits) before the app's modules load
+from end_to_end import RESUME, WRITING_SAMPLE, Driver
+import fake_llm  # noqa: E402
+import jobs  # noqa: E402
+from runner import kickoff_cache  # noqa: E402
+
+
+def reach_outline(d):
+    d.run()
+    d.transition("setup", "new_session", d.click("📝 Start Brand Strategy", sidebar=True), d.in_state("awaiting_resume_choice"))
+    d.transition("setup", "choose_upload", d.click("📄 Upload Resume"), d.in_state("awaiting_resume_upload"))
+    d.transition("setup", "upload_resume", d.upload("resume.txt", RESUME), d.in_state("awaiting_confirmation"))
+    for answer, state in (
+        ("Yes, and I love mentoring.", "awaiting_target"),
+        ("AI Product Manager", "awaiting_audience"),
+        ("Hiring managers at AI startups", "awaiting_positioning"),
+        ("Data-driven and approachable", "awaiting_samples"),
+    ):
+        d.transition("setup", state, d.chat(answer), d.in_state(state))
+    d.transition("setup", "writing_samples", d.upload("sample.txt", WRITING_SAMPLE), d.in_state("awaiting_duration"))
+    d.transition("setup", "outline", d.chat("4 weeks"), d.in_state("awaiting_outline_approval"))
+
+
+def review(d, seconds):
+    """Lets the user read what is shown; the page reruns now and then, as the browser's polling would."""
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        time.sleep(min(1.0, max(0.0, end - time.perf_counter())))
+        d.run()
+
+
+def user(speculative, feedback, review_seconds, timeout):
+    """Walks one user from the outline to the post ideas and returns the approval waits and LLM calls."""
+    jobs.SPECULATIVE = speculative
+    jobs.speculation_outcomes.clear()
+    # Every user sends the same prompts, which must not be answered from the previous user's cache
+    kickoff_cache.clear()
+    d = Driver(timeout)
+    reach_outline(d)
+    start = time.perf_counter()
+    review(d, review_seconds)
+    if feedback:
+        versions = len(d.session["strategy_history"])
+        d.transition("flow", "outline_feedback", d.chat("Make it bolder"), d.in_state("awaiting_outline_approval", strategy_history=versions + 1))
+        review(d, review_seconds)
+    d.transition("flow", "approve_outline", d.chat("looks good"), d.in_state("awaiting_refinement"))
+    review(d, review_seconds)
+    if feedback:
+        versions = len(d.session["strategy_history"])
+        d.transition("flow", "strategy_feedback", d.chat("More data stories please"), d.in_state("awaiting_refinement", strategy_history=versions + 1))
+        review(d, review_seconds)
+    d.transition("flow", "approve_strategy", d.chat("looks good"), lambda: d.state == "strategy_approved" and bool(d.session.get("post_ideas")))
+    waits = {t["name"]: t["wall_s"] for t in d.transitions if t["name"].startswith("approve")}
+    # Cancelled speculation stops streaming, but the calls it started still count
+    return waits, len(fake_llm.calls_between(start, time.perf_counter())), dict(jobs.speculation_outcomes)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--review", type=float, default=3, help="seconds the user reads each outline and strategy")
+    parser.add_argument("--ttft", type=float, default=0.3)
+    parser.add_argument("--tokens-per-second", type=float, default=200)
+    parser.add_argument("--timeout", type=float, default=120)
+    args = parser.parse_args()
+
+    fake_llm.install(ttft=args.ttft, tokens_per_second=args.tokens_per_second)
+    print(f"Fake LLM with {args.ttft}s time to first token and {args.tokens_per_second:.0f} tokens/s; {args.review:g}s to read each step\n")
+    print(f"{'user':<30} {'approve outline':>16} {'approve strategy':>17} {'LLM calls':>10}  speculation")
+    for feedback in (False, True):
+        for speculative in (False, True):
+            waits, calls, outcomes = user(speculative, feedback, args.review, args.timeout)
+            name = f"{'feedback first' if feedback else 'approves at once'}, {'speculative' if speculative else 'on demand'}"
+            outcome_text = ", ".join(f"{k} {v}" for k, v in sorted(outcomes.items())) or "-"
+            print(f"{name:<30} {waits['approve_outline']:>15.2f}s {waits['approve_strategy']:>16.2f}s {calls:>10}  {outcome_text}")
+
+
+if __name__ == "__main__":
+    main()
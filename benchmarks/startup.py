@@ -0,0 +1,79 @@
+"""Measures cold-start cost: module import time and time-to-first-render for both pages.
+
+Every sample runs in a fresh interpreter so nothing is imported ahead of time. Page renders
+use Streamlit's AppTest, so no server or browser is needed, and pre-warming is disabled so
+the background warm-up thread does not compete with the measurement.
+
+    python benchmarks/startup.py [--runs 5] [--json]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MODULES = ["streamlit", "agents", "tasks", "utils", "runner", "pool", "jobs", "crewai"]
+PAGES = {"Home": "Home.py", "App": os.path.join("pages", "2_Ascent_AI_App.py")}
+
+IMPORT_SNIPPET = """
+import sys, time
+sys.path.insert(0, {root!r})
+start = time.perf_counter()
+import {module}
+print(time.perf_counter() - start)
+"""
+
+# streamlit itself is imported before the timer starts; it is measured separately above
+RENDER_SNIPPET = """
+import sys, time
+sys.path.insert(0, {root!r})
+from streamlit.testing.v1 import AppTest
+start = time.perf_counter()
+at = AppTest.from_file({path!r}, default_timeout=300)
+at.run()
+elapsed = time.perf_counter() - start
+if at.exception:
+    raise SystemExit(at.exception[0].message)
+print(elapsed)
+"""
+
+
+def _sample(snippet):
+    env = dict(os.environ, ASCENT_PREWARM="0")
+    result = subprocess.run([sys.executable, "-c", snippet], capture_output=True, text=True, cwd=ROOT, env=env)
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1] if result.stderr.strip() else "benchmark sample failed")
+    return float(result.stdout.strip().splitlines()[-1])
+
+
+def _summarize(samples):
+    return {"median_ms": statistics.median(samples) * 1000, "min_ms": min(samples) * 1000, "max_ms": max(samples) * 1000}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5, help="fresh-interpreter samples per measurement")
+    parser.add_argument("--json", action="store_true", help="print machine-readable results")
+    args = parser.parse_args()
+
+    results = {"imports": {}, "first_render": {}}
+    for module in MODULES:
+        results["imports"][module] = _summarize([_sample(IMPORT_SNIPPET.format(root=ROOT, module=module)) for _ in range(args.runs)])
+    for name, path in PAGES.items():
+        full_path = os.path.join(ROOT, path)
+        results["first_render"][name] = _summarize([_sample(RENDER_SNIPPET.format(root=ROOT, path=full_path)) for _ in range(args.runs)])
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    for section, rows in results.items():
+        print(f"\n{section.replace('_', ' ').title()}")
+        for name, summary in rows.items():
+            print(f"  {name:<10} median {summary['median_ms']:8.1f} ms   (min {summary['min_ms']:.1f}, max {summary['max_ms']:.1f})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""Compares per-theme idea requests sent one by one with the same requests batched into one task.
+
+For 1..N themes it builds the prompts the app would send, either one
+generate_new_ideas_for_theme_task / generate_similar_ideas_task per theme or a single
+theme_ideas_batch_task, and reports the calls, prompt tokens (about four characters per
+token) and a modelled latency: each call pays a fixed round trip plus its output tokens
+at the given decode speed.
+
+    python benchmarks/theme_batching.py [--themes 5] [--strategy-words 1500] [--round-trip 1.5] [--tokens-per-second 150]
+"""
+import argparse
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tasks import BrandingTasks  # noqa: E402
+
+WORDS = "week post hook audience story data lesson framework career product launch team growth insight".split()
+# A one-liner idea in the JSON output, in tokens
+IDEA_TOKENS = 25
+
+
+def prompt_tokens(task):
+    return (len(task.description) + len(task.expected_output)) // 4
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--themes", type=int, default=5)
+    parser.add_argument("--strategy-words", type=int, default=1500)
+    parser.add_argument("--round-trip", type=float, default=1.5, help="seconds per call before the first token")
+    parser.add_argument("--tokens-per-second", type=float, default=150)
+    args = parser.parse_args()
+
+    rnd = random.Random(7)
+    strategy = " ".join(rnd.choices(WORDS, k=args.strategy_words))
+    tasks = BrandingTasks()
+    themes = [f"Theme {i + 1}: {' '.join(rnd.choices(WORDS, k=4)).title()}" for i in range(args.themes)]
+
+    print(f"{'themes':>6} {'mode':>9} {'calls':>5} {'prompt tok':>10} {'latency':>8}")
+    for count in range(1, args.themes + 1):
+        requests = []
+        for i, theme in enumerate(themes[:count]):
+            if i % 2:
+                requests.append({"theme": theme, "mode": "similar", "count": 3, "idea": f"An idea about {theme}", "replace": []})
+            else:
+                requests.append({"theme": theme, "mode": "new", "count": 3, "idea": None, "replace": []})
+        separate = [
+            tasks.generate_similar_ideas_task(None, strategy, r["theme"], r["idea"]) if r["mode"] == "similar"
+            else tasks.generate_new_ideas_for_theme_task(None, strategy, r["theme"], r["count"])
+            for r in requests
+        ]
+        batched = [tasks.theme_ideas_batch_task(None, strategy, requests)]
+        output_seconds = [r["count"] * IDEA_TOKENS / args.tokens_per_second for r in requests]
+        for mode, calls, latency in (
+            ("separate", separate, sum(args.round_trip + seconds for seconds in output_seconds)),
+            ("batched", batched, args.round_trip + sum(output_seconds)),
+        ):
+            print(f"{count:>6} {mode:>9} {len(calls):>5} {sum(map(prompt_tokens, calls)):>10} {latency:>7.1f}s")
+
+
+if __name__ == "__main__":
+    main()
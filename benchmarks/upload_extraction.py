@@ -0,0 +1,111 @@
+"""Benchmarks PDF text extraction on synthetic multi-hundred-page documents.
+
+Compares the original approach (serial extraction with repeated string concatenation)
+against pdf_extraction.extract_text, both on first upload and on re-upload of the same
+file, and checks that both produce identical text.
+
+    python benchmarks/upload_extraction.py [--pages 200 400 800] [--runs 3]
+"""
+import argparse
+import io
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pdf_extraction  # noqa: E402
+
+WORDS = "strategy product growth leadership data insight launch roadmap customer platform metrics team".split()
+
+
+def make_pdf(num_pages, lines_per_page=45):
+    """Builds a PDF whose pages are filled with plain Helvetica text."""
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        None,  # page tree, filled in once the page object numbers are known
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    page_refs = []
+    for page in range(num_pages):
+        lines = []
+        for line in range(lines_per_page):
+            words = " ".join(WORDS[(page + line + i) % len(WORDS)] for i in range(12))
+            lines.append(f"({page + 1}.{line + 1} {words}) Tj T*")
+        stream = ("BT /F1 9 Tf 11 TL 40 800 Td " + " ".join(lines) + " ET").encode("latin-1")
+        objects.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+        content_ref = len(objects)
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 842] /Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % content_ref
+        )
+        page_refs.append(len(objects))
+    kids = b" ".join(b"%d 0 R" % ref for ref in page_refs)
+    objects[1] = b"<< /Type /Pages /Kids [" + kids + b"] /Count %d >>" % num_pages
+
+    out = io.BytesIO()
+    out.write(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(out.tell())
+        out.write(b"%d 0 obj\n" % number + body + b"\nendobj\n")
+    xref = out.tell()
+    out.write(b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1))
+    for offset in offsets:
+        out.write(b"%010d 00000 n \n" % offset)
+    out.write(b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref))
+    return out.getvalue()
+
+
+def baseline_extract(data):
+    """The original process_uploaded_files loop: serial pages and repeated +=."""
+    from pypdf import PdfReader
+
+    combined_text = ""
+    pdf_reader = PdfReader(io.BytesIO(data))
+    for page in pdf_reader.pages:
+        combined_text += page.extract_text() + "\n\n"
+    return combined_text
+
+
+def _time(fn, runs):
+    samples = []
+    result = None
+    for _ in range(runs):
+        start = time.perf_counter()
+        result = fn()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pages", type=int, nargs="+", default=[200, 400, 800])
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    # Start the worker processes up front so pool start-up is not billed to the first document
+    pdf_extraction._get_executor().submit(int).result()
+
+    print(f"workers: {pdf_extraction.MAX_WORKERS}")
+    print(f"{'pages':>6} {'size':>9} {'baseline':>10} {'pipeline':>10} {'speedup':>8} {'re-upload':>10}")
+    for num_pages in args.pages:
+        data = make_pdf(num_pages)
+        baseline_seconds, expected = _time(lambda: baseline_extract(data), args.runs)
+
+        def cold():
+            pdf_extraction._text_cache.clear()
+            return pdf_extraction.extract_text(data, "application/pdf")
+
+        pipeline_seconds, actual = _time(cold, args.runs)
+        if actual != expected:
+            raise SystemExit(f"extracted text differs from the baseline for {num_pages} pages")
+        cached_seconds, _ = _time(lambda: pdf_extraction.extract_text(data, "application/pdf"), args.runs)
+        print(
+            f"{num_pages:>6} {len(data) / 1024:>7.0f}KB {baseline_seconds * 1000:>8.0f}ms {pipeline_seconds * 1000:>8.0f}ms "
+            f"{baseline_seconds / pipeline_seconds:>7.1f}x {cached_seconds * 1000:>8.2f}ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
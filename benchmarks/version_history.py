@@ -0,0 +1,91 @@
+"""Measures the size of a long strategy and draft history stored as full copies vs. as compressed deltas.
+
+Simulates a session that refines a synthetic 12-week content plan N times (each round
+rewrites a few weeks, and every version is also echoed in a chat message) and saves a
+draft after every round, some of them unchanged. Compares the bytes the full copies take
+with what versions.py stores, and times rebuilding the oldest and newest versions from a
+cold cache.
+
+    python benchmarks/version_history.py [--iterations 30] [--weeks 12]
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from versions import VersionStore  # noqa: E402
+
+WORDS = ("audience engagement leadership storytelling insight launch metrics hiring culture product "
+         "growth lessons mentoring roadmap customers data strategy craft community").split()
+
+
+def paragraph(rng, sentences=4):
+    return " ".join(" ".join(rng.choice(WORDS) for _ in range(12)).capitalize() + "." for _ in range(sentences))
+
+
+def plan(rng, weeks):
+    return {week: f"### Week {week}\n\n**Theme:** {paragraph(rng, 1)}\n\n{paragraph(rng)}\n\n{paragraph(rng)}\n" for week in range(1, weeks + 1)}
+
+
+def render(sections):
+    return "## 12-Week Content Plan\n\n" + "\n".join(sections[week] for week in sorted(sections))
+
+
+def simulate(iterations, weeks, seed=7):
+    """Returns the strategy versions and drafts a session accumulates over `iterations` rounds."""
+    rng = random.Random(seed)
+    sections = plan(rng, weeks)
+    strategies, drafts, draft = [], [], paragraph(rng, 8)
+    for _ in range(iterations):
+        for week in rng.sample(sorted(sections), 2):
+            sections[week] = sections[week].split("\n\n", 2)[0] + f"\n\n{paragraph(rng, 1)}\n\n{paragraph(rng)}\n\n{paragraph(rng)}\n"
+        strategies.append(render(sections))
+        if rng.random() < 0.7:
+            draft = draft + "\n\n" + paragraph(rng, 2)
+        drafts.append(draft)
+    return strategies, drafts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=30)
+    parser.add_argument("--weeks", type=int, default=12)
+    args = parser.parse_args()
+
+    strategies, drafts = simulate(args.iterations, args.weeks)
+    # Before: each strategy version sat in the history and again in its chat message
+    full_bytes = sum(2 * len(text.encode("utf-8")) for text in strategies) + sum(len(text.encode("utf-8")) for text in drafts)
+
+    path = os.path.join(tempfile.mkdtemp(), "versions.sqlite3")
+    store = VersionStore(path)
+    start = time.perf_counter()
+    strategy_ids, draft_ids = [], []
+    for text in strategies:
+        strategy_ids.append(store.put(text, strategy_ids[-1] if strategy_ids else None))
+    for text in drafts:
+        draft_ids.append(store.put(text, draft_ids[-1] if draft_ids else None))
+    put_seconds = time.perf_counter() - start
+    stats = store.stats()
+
+    print(f"{args.iterations} refinements of a {args.weeks}-week plan, {len(drafts)} draft saves")
+    print(f"  full copies:   {full_bytes / 1024:>8.1f} KiB")
+    print(f"  delta store:   {stats['stored_bytes'] / 1024:>8.1f} KiB "
+          f"({stats['versions']} distinct texts, {stats['deltas']} deltas, {full_bytes / max(stats['stored_bytes'], 1):.1f}x smaller)")
+    print(f"  storing:       {put_seconds * 1000:>8.1f} ms total")
+
+    for label, key, expected in (("oldest", strategy_ids[0], strategies[0]), ("newest", strategy_ids[-1], strategies[-1])):
+        cold = VersionStore(path)
+        start = time.perf_counter()
+        text = cold.get(key)
+        seconds = time.perf_counter() - start
+        assert text == expected
+        print(f"  rebuild {label}: {seconds * 1000:>7.2f} ms (cold cache)")
+
+
+if __name__ == "__main__":
+    main()
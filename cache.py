@@ -0,0 +1,120 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import config  # noqa: F401
+
+DEFAULT_CACHE_PATH = os.getenv("ASCENT_CACHE_PATH", os.path.join(".cache", "kickoff_cache.sqlite3"))
+DEFAULT_MAX_BYTES = int(os.getenv("ASCENT_CACHE_MAX_BYTES", 64 * 1024 * 1024))
+DEFAULT_TTL_SECONDS = int(os.getenv("ASCENT_CACHE_TTL_SECONDS", 7 * 24 * 60 * 60))
+
+
+class KickoffCache:
+    """A persistent, content-addressed cache of crew kickoff results.
+
+    Entries live in a small SQLite file so they survive restarts and are shared by every
+    session served from the same process. The cache is bounded by total payload size
+    (least-recently-used entries are evicted first) and every entry carries a TTL.
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, max_bytes=DEFAULT_MAX_BYTES, ttl_seconds=DEFAULT_TTL_SECONDS):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self.bypasses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS entries (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL,
+                expires_at REAL NOT NULL
+            )"""
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_entries_accessed ON entries (accessed_at)")
+        self._conn.commit()
+
+    @staticmethod
+    def make_key(role, model, description, expected_output):
+        """Builds the content address for a task run by a given agent role and model."""
+        payload = json.dumps([role, model, description, expected_output], ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key):
+        """Returns the cached value for the key, or None if it is missing or expired."""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute("SELECT value, expires_at FROM entries WHERE key = ?", (key,)).fetchone()
+            if row is None or row[1] < now:
+                if row is not None:
+                    self._conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+                    self._conn.commit()
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE entries SET accessed_at = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            self.hits += 1
+            return row[0]
+
+    def set(self, key, value, ttl_seconds=None):
+        """Stores a value and evicts the least-recently-used entries if the cache is over budget."""
+        now = time.time()
+        ttl = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        size = len(value.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO entries (key, value, size, created_at, accessed_at, expires_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (key, value, size, now, now, now + ttl),
+            )
+            self._evict(now)
+            self._conn.commit()
+
+    def record_bypass(self):
+        with self._lock:
+            self.bypasses += 1
+
+    def _evict(self, now):
+        self._conn.execute("DELETE FROM entries WHERE expires_at < ?", (now,))
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for key, size in self._conn.execute("SELECT key, size FROM entries ORDER BY accessed_at ASC").fetchall():
+            self._conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+            self.evictions += 1
+            total -= size
+            if total <= self.max_bytes:
+                break
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM entries")
+            self._conn.commit()
+
+    def stats(self):
+        """Returns hit/miss counters along with the current size of the cache."""
+        with self._lock:
+            entries, total = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries").fetchone()
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "bypasses": self.bypasses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "entries": entries,
+                "bytes": total,
+            }
@@ -0,0 +1,316 @@
+"""Runs the branding pipeline headlessly for a whole cohort, from a folder of resumes and a CSV.
+
+The CSV has one row per person with the columns resume (a file in the resume folder),
+target_role, target_audience, positioning and duration, and optionally id (defaults to the
+resume's file name), platform (defaults to LinkedIn) and writing_samples (file names in the
+resume folder, separated by ";"). Each person goes through the same steps as in the app:
+resume summary, profile, outline, detailed strategy, title, post ideas and drafts of the
+first few ideas, each draft with its QA critique.
+
+People run in parallel on a bounded thread pool. Every LLM call goes through run_task, so
+the provider rate limits, concurrency limits and kickoff cache apply as in the app. Each
+finished step is checkpointed, so a rerun after a crash or failure picks every person up
+where they stopped; a checkpoint made from a different CSV row or different files is
+discarded and the person starts over. People already in the output file are skipped. Results are appended
+to the output file as one JSON line per person.
+
+    python cohort.py --resumes resumes/ --csv cohort.csv --output results.jsonl [--workers 8] [--drafts 3]
+"""
+import argparse
+import csv
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import config  # noqa: F401
+from batch import draft_ideas
+from pdf_extraction import extract_file_text
+from pool import branding_tasks, pooled_agents
+from runner import run_ideas_task, run_task
+from user_profile import format_profile, parse_profile
+
+REQUIRED_COLUMNS = ("resume", "target_role", "target_audience", "positioning", "duration")
+STEPS = ("summary", "profile", "outline", "strategy", "title", "ideas", "drafts")
+MIME_TYPES = {".pdf": "application/pdf", ".md": "text/markdown"}
+# People processed at once; LLM calls are further bounded per provider inside run_task
+DEFAULT_WORKERS = int(os.getenv("ASCENT_COHORT_WORKERS", 8))
+# Ideas drafted (and critiqued) per person
+DEFAULT_DRAFTS = int(os.getenv("ASCENT_COHORT_DRAFTS", 3))
+
+
+class CohortError(ValueError):
+    """Raised when the cohort CSV or resume folder can't be used."""
+
+
+class LocalFile:
+    """A file on disk with the interface extract_file_text expects from a Streamlit upload."""
+
+    def __init__(self, path):
+        self.name = os.path.basename(path)
+        self.type = MIME_TYPES.get(os.path.splitext(path)[1].lower(), "text/plain")
+        with open(path, "rb") as f:
+            self._data = f.read()
+        self.size = len(self._data)
+
+    def getbuffer(self):
+        return memoryview(self._data)
+
+
+def read_cohort(csv_path, resume_dir):
+    """Returns one dict per CSV row, with its id and the paths of its files checked."""
+    with open(csv_path, newline="", encoding="utf-8-sig") as f:
+        reader = csv.DictReader(f)
+        missing = [column for column in REQUIRED_COLUMNS if column not in (reader.fieldnames or [])]
+        if missing:
+            raise CohortError(f"{csv_path} is missing the column(s): {', '.join(missing)}")
+        people, seen = [], set()
+        for line, row in enumerate(reader, start=2):
+            row = {key: (value or "").strip() for key, value in row.items() if key}
+            person_id = row.get("id") or os.path.splitext(row["resume"])[0]
+            if person_id in seen:
+                raise CohortError(f"{csv_path}:{line}: duplicate id {person_id!r}")
+            seen.add(person_id)
+            files = [row["resume"]] + [name.strip() for name in row.get("writing_samples", "").split(";") if name.strip()]
+            for name in files:
+                if not os.path.isfile(os.path.join(resume_dir, name)):
+                    raise CohortError(f"{csv_path}:{line}: {name} not found in {resume_dir}")
+            people.append({**row, "id": person_id, "platform": row.get("platform") or "LinkedIn"})
+    return people
+
+
+class Checkpoints:
+    """Keeps each person's finished steps in a JSON file of their own, written atomically.
+
+    The file name is the id with unsafe characters replaced, plus a hash of the id itself,
+    so ids that only differ in those characters don't share a file.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, person_id):
+        safe = "".join(c if c.isascii() and (c.isalnum() or c in "-_.") else "_" for c in person_id)
+        digest = hashlib.sha1(person_id.encode("utf-8")).hexdigest()[:8]
+        return os.path.join(self.directory, f"{safe}-{digest}.json")
+
+    def load(self, person_id):
+        try:
+            with open(self._path(person_id), encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {"steps": {}}
+
+    def save(self, person_id, state):
+        path = self._path(person_id)
+        with open(path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(state, f, ensure_ascii=False)
+        os.replace(path + ".tmp", path)
+
+
+def _read_files(resume_dir, names):
+    """Returns the combined text of files in the resume folder; a file that can't be read fails the person."""
+    texts = []
+    for name in names:
+        try:
+            texts.append(extract_file_text(LocalFile(os.path.join(resume_dir, name))))
+        except Exception as e:
+            raise RuntimeError(f"could not read {name}: {e}") from e
+    return "".join(texts)
+
+
+def _fingerprint(person, *texts):
+    """Returns a hash of a person's CSV row and file contents, which their checkpoint must match to be reused."""
+    digest = hashlib.sha256(json.dumps(person, sort_keys=True).encode("utf-8"))
+    for text in texts:
+        digest.update(b"\0" + text.encode("utf-8"))
+    return digest.hexdigest()
+
+
+def _pick_ideas(post_ideas, count):
+    """Picks `count` ideas, going round the themes so each one gets a draft before any gets two."""
+    picked, themes = [], [list(ideas) for ideas in post_ideas.values()]
+    while len(picked) < count and any(themes):
+        for ideas in themes:
+            if ideas and len(picked) < count:
+                picked.append(ideas.pop(0)["text"])
+    return picked
+
+
+def run_person(person, resume_dir, checkpoints, drafts=DEFAULT_DRAFTS):
+    """Runs the pipeline for one person, skipping the steps their checkpoint already has, and returns their result."""
+    resume_text = _read_files(resume_dir, [person["resume"]])
+    if not resume_text.strip():
+        raise RuntimeError(f"no text could be read from {person['resume']}")
+    names = [name.strip() for name in person.get("writing_samples", "").split(";") if name.strip()]
+    writing_samples = _read_files(resume_dir, names) if names else ""
+
+    fingerprint = _fingerprint(person, resume_text, writing_samples)
+    state = checkpoints.load(person["id"])
+    if state.get("fingerprint") != fingerprint:
+        # Made from another CSV row or other files (or before checkpoints had a fingerprint)
+        state = {"fingerprint": fingerprint, "steps": {}}
+    steps = state["steps"]
+    agents, tasks = pooled_agents, branding_tasks
+
+    def step(name, run):
+        if name not in steps:
+            start = time.perf_counter()
+            try:
+                output = run()
+            except Exception as e:
+                raise RuntimeError(f"{name} step failed: {e}") from e
+            steps[name] = {"output": output, "seconds": round(time.perf_counter() - start, 3)}
+            checkpoints.save(person["id"], state)
+        return steps[name]["output"]
+
+    def summarize():
+        agent = agents.resume_summarizer_agent()
+        return run_task(agent, tasks.summarize_resume_task(agent, resume_text))
+
+    def distill():
+        agent = agents.resume_summarizer_agent()
+        return parse_profile(run_task(agent, tasks.distill_profile_task(agent, resume_text)))
+
+    summary = step("summary", summarize)
+    profile = step("profile", distill)
+    # Prompts use the distilled profile in place of the raw resume, as in the app
+    context = {
+        "user_context": format_profile(profile) if profile else resume_text,
+        "target_role": person["target_role"],
+        "target_audience": person["target_audience"],
+        "platform": person["platform"],
+        "duration": person["duration"],
+        "positioning": person["positioning"],
+    }
+
+    def outline():
+        agent = agents.personal_branding_strategist()
+        return run_task(agent, tasks.intermediate_outline_task(agent, **context))
+
+    def strategy():
+        agent = agents.personal_branding_strategist()
+        return run_task(agent, tasks.strategy_task(agent, **context, writing_samples=writing_samples))
+
+    outline_text = step("outline", outline)
+    strategy_text = step("strategy", strategy)
+
+    def title():
+        agent = agents.title_agent()
+        return run_task(agent, tasks.title_task(agent, strategy_text)).strip()
+
+    def ideas():
+        agent = agents.content_ideation_agent()
+        return run_ideas_task(agent, tasks.ideation_task(agent, strategy_text))
+
+    title_text = step("title", title)
+    post_ideas = step("ideas", ideas)
+
+    def draft():
+        results = []
+        for idea, draft_text, critique, error in draft_ideas(agents, tasks, _pick_ideas(post_ideas, drafts), max_workers=max(drafts, 1)):
+            if error:
+                raise error
+            results.append({"idea": idea, "draft": draft_text, "critique": critique})
+        return results
+
+    post_drafts = step("drafts", draft)
+    return {
+        "id": person["id"],
+        "target_role": person["target_role"],
+        "target_audience": person["target_audience"],
+        "positioning": person["positioning"],
+        "duration": person["duration"],
+        "platform": person["platform"],
+        "title": title_text,
+        "summary": summary,
+        "profile": profile,
+        "outline": outline_text,
+        "strategy": strategy_text,
+        "post_ideas": post_ideas,
+        "drafts": post_drafts,
+        "step_seconds": {name: steps[name]["seconds"] for name in STEPS},
+    }
+
+
+def finished_ids(output_path):
+    """Returns the ids already written to the output file."""
+    ids = set()
+    if os.path.exists(output_path):
+        with open(output_path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    ids.add(json.loads(line)["id"])
+                except (ValueError, KeyError):
+                    continue  # A line cut short by a crash; that person runs again
+    return ids
+
+
+def run_cohort(people, resume_dir, output_path, checkpoint_dir, workers=DEFAULT_WORKERS, drafts=DEFAULT_DRAFTS, log=print):
+    """Runs every person not yet in the output file and returns counts and throughput."""
+    done = finished_ids(output_path)
+    todo = [person for person in people if person["id"] not in done]
+    checkpoints = Checkpoints(checkpoint_dir)
+    write_lock = threading.Lock()
+    failed = {}
+    completed = 0
+    start = time.perf_counter()
+
+    with open(output_path, "a", encoding="utf-8") as output, ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="ascent-cohort") as executor:
+        futures = {executor.submit(run_person, person, resume_dir, checkpoints, drafts): person for person in todo}
+        for future in as_completed(futures):
+            person = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                failed[person["id"]] = str(e)
+                log(f"[{completed + len(failed)}/{len(todo)}] {person['id']}: FAILED: {e}")
+                continue
+            with write_lock:
+                output.write(json.dumps(result, ensure_ascii=False) + "\n")
+                output.flush()
+            completed += 1
+            log(f"[{completed + len(failed)}/{len(todo)}] {person['id']}: done in {sum(result['step_seconds'].values()):.1f}s of steps")
+
+    elapsed = time.perf_counter() - start
+    return {
+        "people": len(people),
+        "skipped": len(people) - len(todo),
+        "completed": completed,
+        "failed": failed,
+        "elapsed_seconds": round(elapsed, 2),
+        "people_per_hour": round(completed / elapsed * 3600, 1) if elapsed and completed else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--resumes", required=True, help="folder with the resumes and writing samples named in the CSV")
+    parser.add_argument("--csv", required=True, help="one row per person: resume, target_role, target_audience, positioning, duration")
+    parser.add_argument("--output", required=True, help="JSONL file the results are appended to")
+    parser.add_argument("--checkpoints", help="folder for per-person checkpoints (default: <output>.checkpoints)")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="people processed at once")
+    parser.add_argument("--drafts", type=int, default=DEFAULT_DRAFTS, help="ideas drafted per person")
+    args = parser.parse_args()
+
+    try:
+        people = read_cohort(args.csv, args.resumes)
+    except CohortError as e:
+        parser.error(str(e))
+    log = lambda message: print(message, file=sys.stderr, flush=True)
+    summary = run_cohort(people, args.resumes, args.output, args.checkpoints or f"{args.output}.checkpoints", args.workers, args.drafts, log=log)
+    log(
+        f"{summary['completed']} completed, {len(summary['failed'])} failed, {summary['skipped']} already done "
+        f"in {summary['elapsed_seconds']:.0f}s ({summary['people_per_hour']:.0f} people/hour)"
+    )
+    if summary["failed"]:
+        log("Rerun the same command to retry the failed people from their last finished step.")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
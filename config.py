@@ -0,0 +1,8 @@
+"""Loads the settings kept in .env into the environment.
+
+Modules read their settings with os.getenv when they are imported, so each one that
+does imports this module first. Variables already set in the environment win over .env.
+"""
+from dotenv import load_dotenv
+
+load_dotenv()
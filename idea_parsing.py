@@ -0,0 +1,411 @@
+import ast
+import json
+import re
+from collections import Counter
+
+THEME_MARKER = re.compile(r'THEME:', re.IGNORECASE)
+UNCATEGORIZED_THEME = "Uncategorized Ideas"
+
+# JSON schemas the idea tasks are asked to follow in structured mode
+IDEAS_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "themes": {
+            "type": "array",
+            "minItems": 1,
+            "items": {
+                "type": "object",
+                "properties": {
+                    "theme": {"type": "string", "minLength": 1},
+                    "ideas": {"type": "array", "minItems": 1, "items": {"type": "string", "minLength": 1}},
+                },
+                "required": ["theme", "ideas"],
+            },
+        },
+    },
+    "required": ["themes"],
+}
+QUICK_IDEAS_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "ideas": {"type": "array", "minItems": 1, "items": {"type": "string", "minLength": 1}},
+    },
+    "required": ["ideas"],
+}
+# How each idea output was turned into ideas: valid JSON, JSON fixed locally, the legacy
+# THEME:/- layout, or not at all (the caller then asks the model to fix it)
+format_outcomes = Counter()
+CODE_FENCE = re.compile(r"```(?:json)?\s*(.*?)(?:```|$)", re.DOTALL | re.IGNORECASE)
+SMART_QUOTES = str.maketrans({"\u201c": '"', "\u201d": '"', "\u201e": '"'})
+MAX_TRUNCATION_RETRIES = 3
+
+
+class IdeaFormatError(ValueError):
+    """Raised when an idea task's output cannot be turned into ideas, even after local repair."""
+
+
+def parse_ideas(text):
+    """Parses the AI's text output into a dictionary of themes and ideas."""
+    ideas_dict = {}
+    current_theme = None
+    sections = re.split(r'THEME:\s*', text, flags=re.IGNORECASE)[1:]
+
+    for section in sections:
+        lines = section.strip().split('\n')
+
+        if len(lines) > 0 and not lines[0].strip().startswith('-'):
+            current_theme = lines[0].strip()
+            lines = lines[1:]
+        else:
+            last_line = lines[-1].strip() if lines else ""
+            if "THEME:" in last_line:
+                current_theme = last_line.replace("THEME:", "").strip()
+                lines.pop()
+            else:
+                current_theme = "Uncategorized Ideas"
+
+        if current_theme not in ideas_dict:
+            ideas_dict[current_theme] = []
+
+        for line in lines:
+            line = line.strip()
+            if line.startswith('- '):
+                idea = line[2:].strip()
+                ideas_dict[current_theme].append({"text": idea, "checked": False})
+            elif len(ideas_dict[current_theme]) > 0:
+                ideas_dict[current_theme][-1]["text"] += " " + line
+    return ideas_dict
+
+
+def parse_quick_ideas(text):
+    """Parses a simple bulleted list of ideas with no theme header."""
+    ideas_list = []
+    lines = text.strip().split('\n')
+    for line in lines:
+        line = line.strip()
+        if line.startswith('- '):
+            idea = line[2:].strip()
+            ideas_list.append({"text": idea, "checked": False})
+    return ideas_list
+
+
+class IdeaStreamParser:
+    """Parses THEME/idea output incrementally, as the LLM streams it.
+
+    feed() takes text chunks of any size and returns the events they completed:
+    ("theme", name) when a theme header has been read and ("idea", theme, idea) once an
+    idea can no longer grow. `ideas` always holds everything parsed so far, and after
+    close() it equals parse_ideas() of the whole text. Non-bullet lines that come before
+    the first idea of a theme are collected in `dropped_lines` instead of vanishing.
+    """
+
+    def __init__(self):
+        self.ideas = {}
+        self.dropped_lines = []
+        self.consumed = 0
+        self._buffer = ""
+        self._in_section = False
+        self._theme = None
+        self._blank_lines = 0
+        self._open_idea = None
+
+    def feed(self, chunk):
+        """Adds a chunk of streamed text and returns the events it completed."""
+        self.consumed += len(chunk)
+        if '\n' not in chunk and ':' not in chunk:
+            # Neither a line nor a THEME: marker can have been completed
+            self._buffer += chunk
+            return []
+        events = []
+        parts = THEME_MARKER.split(self._buffer + chunk)
+        for i, part in enumerate(parts):
+            if i > 0:
+                self._end_section(events)
+                self._in_section = True
+            lines = part.split('\n')
+            # Only the text after the last marker can still be extended by the next chunk
+            self._buffer = lines.pop() if i == len(parts) - 1 else ""
+            for line in lines:
+                self._line(line, events)
+        return events
+
+    def close(self):
+        """Parses whatever is left once the stream has ended and returns the final events."""
+        events = []
+        self._line(self._buffer, events)
+        self._buffer = ""
+        self._end_section(events)
+        self._in_section = False
+        return events
+
+    def _line(self, line, events):
+        if not self._in_section:
+            return  # Anything before the first THEME: is preamble
+        line = line.strip()
+        if self._theme is None:
+            # The header is the first non-blank line, unless that line is already an idea
+            if not line:
+                return
+            if not line.startswith('-'):
+                self._start_theme(line, events)
+                return
+            self._start_theme(UNCATEGORIZED_THEME, events)
+        if not line:
+            # Blank lines only count once more text follows them in the same section
+            self._blank_lines += 1
+            return
+        for _ in range(self._blank_lines):
+            self._continue_idea("")
+        self._blank_lines = 0
+        if line.startswith('- '):
+            self._emit_open_idea(events)
+            idea = {"text": line[2:].strip(), "checked": False}
+            self.ideas[self._theme].append(idea)
+            self._open_idea = (self._theme, idea)
+        elif not self._continue_idea(line):
+            self.dropped_lines.append(line)
+
+    def _start_theme(self, theme, events):
+        self._theme = theme
+        self.ideas.setdefault(theme, [])
+        events.append(("theme", theme))
+
+    def _continue_idea(self, text):
+        theme_ideas = self.ideas[self._theme]
+        if not theme_ideas:
+            return False
+        theme_ideas[-1]["text"] += " " + text
+        return True
+
+    def _emit_open_idea(self, events):
+        if self._open_idea is not None:
+            events.append(("idea",) + self._open_idea)
+            self._open_idea = None
+
+    def _end_section(self, events):
+        if self._in_section and self._theme is None:
+            # A section with nothing but whitespace still creates an (empty) theme
+            self._start_theme("", events)
+        self._emit_open_idea(events)
+        self._theme = None
+        self._blank_lines = 0
+
+
+class QuickIdeaStreamParser:
+    """Parses a streamed bulleted list of ideas incrementally.
+
+    feed() returns ("idea", idea) events as soon as each bullet line is complete; after
+    close(), `ideas` equals parse_quick_ideas() of the whole text.
+    """
+
+    def __init__(self):
+        self.ideas = []
+        self.dropped_lines = []
+        self.consumed = 0
+        self._buffer = ""
+
+    def feed(self, chunk):
+        """Adds a chunk of streamed text and returns the ideas it completed."""
+        self.consumed += len(chunk)
+        if '\n' not in chunk:
+            self._buffer += chunk
+            return []
+        events = []
+        lines = (self._buffer + chunk).split('\n')
+        self._buffer = lines.pop()
+        for line in lines:
+            self._line(line, events)
+        return events
+
+    def close(self):
+        """Parses the last line once the stream has ended and returns the final events."""
+        events = []
+        self._line(self._buffer, events)
+        self._buffer = ""
+        return events
+
+    def _line(self, line, events):
+        line = line.strip()
+        if line.startswith('- '):
+            idea = {"text": line[2:].strip(), "checked": False}
+            self.ideas.append(idea)
+            events.append(("idea", idea))
+        elif line:
+            self.dropped_lines.append(line)
+
+
+def _close_json(text):
+    """Removes trailing commas from JSON and closes any string, array or object left open.
+
+    Returns the repaired text, whether a string had to be closed, and the positions of the
+    commas outside strings, which are the places a truncated document can be cut back to.
+    """
+    out, stack, commas = [], [], []
+    in_string = escaped = False
+    for i, char in enumerate(text):
+        if in_string:
+            out.append(char)
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+            continue
+        if char == '"':
+            in_string = True
+        elif char in "[{":
+            stack.append("]" if char == "[" else "}")
+        elif char in "]}":
+            while out and (out[-1].isspace() or out[-1] == ","):
+                out.pop()
+            if stack:
+                stack.pop()
+        elif char == ",":
+            commas.append(i)
+        out.append(char)
+    if in_string:
+        out.append('"')
+    while out and (out[-1].isspace() or out[-1] in ",:"):
+        out.pop()
+    return "".join(out) + "".join(reversed(stack)), in_string, commas
+
+
+def load_json_leniently(text, keep_partial=False):
+    """Parses JSON produced by an LLM, repairing the usual ways it goes wrong.
+
+    Handles code fences and surrounding prose, trailing commas, output cut off mid-way
+    (cut back to the last complete element, or with keep_partial the unfinished string is
+    kept), curly quotes and Python-style single quotes. Raises ValueError if nothing parses.
+    """
+    fenced = CODE_FENCE.search(text)
+    if fenced:
+        text = fenced.group(1)
+    start = min((i for i in (text.find("{"), text.find("[")) if i != -1), default=-1)
+    if start == -1:
+        raise ValueError("no JSON object in the output")
+    text = text[start:].strip()
+    try:
+        return json.loads(text)
+    except ValueError:
+        pass
+
+    for candidate in (text, text.translate(SMART_QUOTES)):
+        closed, truncated_string, commas = _close_json(candidate)
+        if keep_partial or not truncated_string:
+            try:
+                return json.loads(closed)
+            except ValueError:
+                pass
+        for cut in reversed(commas[-MAX_TRUNCATION_RETRIES:]):
+            try:
+                return json.loads(_close_json(candidate[:cut])[0])
+            except ValueError:
+                pass
+    try:
+        return ast.literal_eval(text)
+    except (ValueError, SyntaxError):
+        raise ValueError("the output is not valid JSON and could not be repaired") from None
+
+
+def _idea_texts(items):
+    if not isinstance(items, list):
+        raise IdeaFormatError("'ideas' must be a list of strings")
+    texts = []
+    for item in items:
+        if isinstance(item, dict):
+            item = item.get("text") or item.get("idea") or ""
+        if isinstance(item, str) and item.strip():
+            texts.append(item.strip())
+    return texts
+
+
+def ideas_from_json(data):
+    """Validates JSON against IDEAS_SCHEMA and returns it as the {theme: [idea, ...]} dict the app uses.
+
+    Near misses are accepted: a bare list of theme objects, a single theme object, a
+    {theme: [ideas]} mapping, "name" instead of "theme" and ideas given as {"text": ...}
+    objects. Themes without ideas are left out.
+    """
+    if isinstance(data, dict) and isinstance(data.get("themes"), list):
+        data = data["themes"]
+    elif isinstance(data, dict) and "ideas" in data:
+        data = [data]  # A single theme object
+    if isinstance(data, dict):
+        data = [{"theme": theme, "ideas": ideas} for theme, ideas in data.items()]
+    if not isinstance(data, list):
+        raise IdeaFormatError("expected an object with a 'themes' list")
+
+    ideas_dict = {}
+    for entry in data:
+        if not isinstance(entry, dict):
+            raise IdeaFormatError("every entry of 'themes' must be an object with 'theme' and 'ideas'")
+        theme = str(entry.get("theme") or entry.get("name") or "").strip() or UNCATEGORIZED_THEME
+        texts = _idea_texts(entry.get("ideas", []))
+        if texts:
+            ideas_dict.setdefault(theme, []).extend({"text": text, "checked": False} for text in texts)
+    if not ideas_dict:
+        raise IdeaFormatError("the output contains no ideas")
+    return ideas_dict
+
+
+def quick_ideas_from_json(data):
+    """Validates JSON against QUICK_IDEAS_SCHEMA and returns the list of idea dicts the app uses."""
+    if isinstance(data, dict) and "ideas" in data:
+        data = data["ideas"]
+    elif isinstance(data, dict) and "themes" in data:
+        data = [idea["text"] for ideas in ideas_from_json(data).values() for idea in ideas]
+    texts = _idea_texts(data)
+    if not texts:
+        raise IdeaFormatError("the output contains no ideas")
+    return [{"text": text, "checked": False} for text in texts]
+
+
+def _parse_output(text, from_json, parse_layout):
+    try:
+        data = json.loads(text)
+        outcome = "json"
+    except ValueError:
+        try:
+            data = load_json_leniently(text)
+            outcome = "json_repaired"
+        except ValueError:
+            data = None
+    if data is not None:
+        try:
+            result = from_json(data)
+            format_outcomes[outcome] += 1
+            return result
+        except IdeaFormatError:
+            pass
+    # Older prompts (and models that ignore the format) use the THEME:/- layout
+    result = parse_layout(text)
+    if result and (not isinstance(result, dict) or any(result.values())):
+        format_outcomes["layout"] += 1
+        return result
+    format_outcomes["unparseable"] += 1
+    raise IdeaFormatError("the output is neither valid JSON ideas nor the THEME:/- layout")
+
+
+def parse_ideas_output(text):
+    """Returns the {theme: ideas} dict from a themed idea task's output, JSON or THEME:/- layout.
+
+    Raises IdeaFormatError if no ideas can be recovered locally.
+    """
+    return _parse_output(text, ideas_from_json, parse_ideas)
+
+
+def parse_quick_ideas_output(text):
+    """Returns the list of ideas from a quick idea task's output, JSON or bulleted list.
+
+    Raises IdeaFormatError if no ideas can be recovered locally.
+    """
+    return _parse_output(text, quick_ideas_from_json, parse_quick_ideas)
+
+
+def parse_partial_ideas(text):
+    """Best-effort {theme: ideas} dict from the JSON streamed so far, for progress previews."""
+    try:
+        return ideas_from_json(load_json_leniently(text, keep_partial=True))
+    except ValueError:
+        return {}
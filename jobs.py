@@ -0,0 +1,186 @@
+import os
+import threading
+import time
+import uuid
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+import config  # noqa: F401
+from pool import agent_pool
+from runner import stream_task
+
+DEFAULT_MAX_WORKERS = int(os.getenv("ASCENT_JOB_MAX_WORKERS", 16))
+# Start the step a user is likely to approve next (the detailed strategy while they review the
+# outline, the post ideas while they review the strategy) before they approve it
+SPECULATIVE = os.getenv("ASCENT_SPECULATIVE", "1") != "0"
+# Finished jobs that nobody collected (e.g. the browser tab was closed) are dropped after this long
+FINISHED_JOB_TTL_SECONDS = 60 * 60
+
+# What became of speculative jobs: started, then used (finished or still running when approved) or cancelled
+speculation_outcomes = Counter()
+
+
+class Job:
+    """A single agent task running off the Streamlit script thread."""
+
+    def __init__(self, session_id, kind, agent, task, use_cache=True, meta=None, speculative=False):
+        self.id = str(uuid.uuid4())
+        self.session_id = session_id
+        self.kind = kind
+        self.agent = agent
+        self.task = task
+        self.use_cache = use_cache
+        self.meta = meta or {}
+        self.speculative = speculative
+        self.cancelled = False
+        self.status = "queued"
+        self.result = None
+        self.error = None
+        self.created_at = time.time()
+        self.finished_at = None
+        self._chunks = []
+        self._finished = threading.Event()
+
+    @property
+    def partial(self):
+        """The output streamed so far."""
+        return "".join(self._chunks)
+
+    @property
+    def done(self):
+        return self.status in ("done", "failed")
+
+    def wait(self, timeout=None):
+        """Blocks until the job has stopped, for at most `timeout` seconds; returns whether it is done."""
+        self._finished.wait(timeout)
+        return self.done
+
+    def run(self):
+        if self.cancelled:
+            agent_pool.release(self.agent)
+            self._finished.set()
+            return
+        self.status = "running"
+        try:
+            task_stream = stream_task(self.agent, self.task, use_cache=self.use_cache)
+            chunks = iter(task_stream)
+            for chunk in chunks:
+                if self.cancelled:
+                    # Abandons the crew run; crewai may still be running the agent, so the
+                    # stream discards it instead of handing it back to the pool
+                    chunks.close()
+                    self.status = "cancelled"
+                    return
+                self._chunks.append(chunk)
+            self.result = task_stream.result
+            self.status = "done"
+        except Exception as e:
+            self.error = e
+            self.status = "failed"
+        finally:
+            self.finished_at = time.time()
+            self._finished.set()
+
+
+class JobQueue:
+    """Runs BrandingTasks tasks on a shared worker pool and keeps their status and results.
+
+    Jobs are keyed by the session they belong to, so the UI can poll for and merge the
+    results into the right session regardless of which session the user is looking at.
+
+    A speculative job runs a step before the user has asked for it. It is left out of
+    pending() and pop_finished() until promote() adopts it; if the user asks for something
+    else, cancel_speculative() stops it.
+    """
+
+    def __init__(self, max_workers=DEFAULT_MAX_WORKERS):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="ascent-job")
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def submit(self, session_id, kind, agent, task, use_cache=True, speculative=False, **meta):
+        """Queues a task for a session and returns the job ID."""
+        job = Job(session_id, kind, agent, task, use_cache=use_cache, meta=meta, speculative=speculative)
+        with self._lock:
+            self._prune()
+            self._jobs[job.id] = job
+        if speculative:
+            speculation_outcomes["started"] += 1
+        self._executor.submit(job.run)
+        return job.id
+
+    def speculating(self, session_id, kind, inputs):
+        """Whether a speculative job of this kind is already running from these inputs for the session."""
+        with self._lock:
+            return any(self._is_speculation(job, session_id, kind) and job.meta.get("inputs") == inputs for job in self._jobs.values())
+
+    def promote(self, session_id, kind, inputs):
+        """Adopts the session's speculative job of this kind if it was started from the same inputs.
+
+        The adopted job is then merged like any other. Returns whether there was one; other
+        speculative jobs of the kind are cancelled.
+        """
+        promoted = None
+        with self._lock:
+            for job in [job for job in self._jobs.values() if self._is_speculation(job, session_id, kind)]:
+                if promoted is None and job.meta.get("inputs") == inputs and job.status != "failed":
+                    job.speculative = False
+                    promoted = job
+                    speculation_outcomes["used_finished" if job.done else "used_running"] += 1
+                else:
+                    self._cancel(job)
+        return promoted is not None
+
+    def cancel_speculative(self, session_id, kinds=None):
+        """Stops a session's speculative jobs: queued ones never start and running ones stop streaming."""
+        with self._lock:
+            for job in [job for job in self._jobs.values() if self._is_speculation(job, session_id) and (kinds is None or job.kind in kinds)]:
+                self._cancel(job)
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def pending(self, session_id, kinds=None):
+        """Returns a session's jobs whose results have not been merged yet, optionally filtered by kind."""
+        with self._lock:
+            return [
+                job for job in self._jobs.values()
+                if job.session_id == session_id and not job.speculative and (kinds is None or job.kind in kinds)
+            ]
+
+    def pop_finished(self, session_id, kinds=None):
+        """Removes and returns a session's finished jobs in the order they were submitted, optionally filtered by kind."""
+        with self._lock:
+            finished = [
+                job for job in self._jobs.values()
+                if job.session_id == session_id and job.done and not job.speculative and (kinds is None or job.kind in kinds)
+            ]
+            for job in finished:
+                del self._jobs[job.id]
+        return sorted(finished, key=lambda job: job.created_at)
+
+    def discard(self, session_id, kinds=None):
+        """Forgets a session's jobs; running jobs finish but their results are dropped, and speculative ones are cancelled."""
+        with self._lock:
+            for job in [job for job in self._jobs.values() if job.session_id == session_id and (kinds is None or job.kind in kinds)]:
+                if job.speculative:
+                    self._cancel(job)
+                else:
+                    del self._jobs[job.id]
+
+    def _is_speculation(self, job, session_id, kind=None):
+        return job.speculative and job.session_id == session_id and (kind is None or job.kind == kind)
+
+    def _cancel(self, job):
+        job.cancelled = True
+        del self._jobs[job.id]
+        speculation_outcomes["cancelled"] += 1
+
+    def _prune(self):
+        cutoff = time.time() - FINISHED_JOB_TTL_SECONDS
+        for job_id in [job_id for job_id, job in self._jobs.items() if job.done and job.finished_at < cutoff]:
+            del self._jobs[job_id]
+
+
+# Shared by every session served from this process
+job_queue = JobQueue()
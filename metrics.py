@@ -0,0 +1,185 @@
+import json
+import math
+import os
+import threading
+import time
+from collections import defaultdict, deque
+import config  # noqa: F401
+
+# USD per million tokens (input, output)
+MODEL_PRICES = {
+    "gemini/gemini-2.5-flash-lite": (0.10, 0.40),
+    "groq/llama-3.1-8b-instant": (0.05, 0.08),
+}
+LATENCY_BUCKETS = (0.25, 0.5, 1, 2, 5, 10, 20, 30, 60, 120)
+MAX_RECENT_RECORDS = 10000
+MAX_RENDER_SAMPLES = 1000
+METRICS_JSONL_PATH = os.getenv("ASCENT_METRICS_JSONL")
+
+
+def estimate_cost(model, prompt_tokens, completion_tokens):
+    input_price, output_price = MODEL_PRICES.get(model, (0.0, 0.0))
+    return (prompt_tokens * input_price + completion_tokens * output_price) / 1_000_000
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a list of numbers."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = min(len(ordered) - 1, max(0, math.ceil(pct / 100 * len(ordered)) - 1))
+    return ordered[rank]
+
+
+class MetricsRegistry:
+    """An in-process registry of per-task execution metrics.
+
+    Every task run records its agent role, model, token usage, wall time, time to first
+    token, retries and outcome. Recent records are kept for percentile summaries, while
+    cumulative counters and latency histograms back the Prometheus export.
+    """
+
+    def __init__(self, jsonl_path=METRICS_JSONL_PATH, max_records=MAX_RECENT_RECORDS):
+        self.jsonl_path = jsonl_path
+        self._records = deque(maxlen=max_records)
+        self._lock = threading.Lock()
+        self._counts = defaultdict(int)
+        self._tokens = defaultdict(int)
+        self._cost = defaultdict(float)
+        self._duration_sum = defaultdict(float)
+        self._buckets = defaultdict(lambda: [0] * len(LATENCY_BUCKETS))
+        # Script time of app page runs, per (section, "page" or "fragment")
+        self._renders = defaultdict(lambda: deque(maxlen=MAX_RENDER_SAMPLES))
+
+    def record(self, task, role, model, wall_seconds, ttft_seconds=None, prompt_tokens=0, completion_tokens=0, retries=0, outcome="ok"):
+        provider = model.split("/", 1)[0]
+        entry = {
+            "timestamp": time.time(),
+            "task": task,
+            "role": role,
+            "model": model,
+            "provider": provider,
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "wall_seconds": wall_seconds,
+            "ttft_seconds": wall_seconds if ttft_seconds is None else ttft_seconds,
+            "retries": retries,
+            "outcome": outcome,
+            "cost_usd": estimate_cost(model, prompt_tokens, completion_tokens),
+        }
+        labels = (task, provider, model, outcome)
+        with self._lock:
+            self._records.append(entry)
+            self._counts[labels] += 1
+            self._tokens[labels + ("prompt",)] += prompt_tokens
+            self._tokens[labels + ("completion",)] += completion_tokens
+            self._cost[labels] += entry["cost_usd"]
+            self._duration_sum[labels] += wall_seconds
+            buckets = self._buckets[labels]
+            for i, bound in enumerate(LATENCY_BUCKETS):
+                if wall_seconds <= bound:
+                    buckets[i] += 1
+            if self.jsonl_path:
+                with open(self.jsonl_path, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(entry) + "\n")
+        return entry
+
+    def record_render(self, section, seconds, scope):
+        """Records how long a page section (or the whole page) took to run, in a full page run or in a run of just its fragment."""
+        with self._lock:
+            self._renders[(section, scope)].append(seconds)
+
+    def render_summary(self):
+        """Summarizes recent script times per page section and run scope."""
+        with self._lock:
+            renders = {key: list(samples) for key, samples in self._renders.items()}
+        return [
+            {
+                "section": section,
+                "scope": scope,
+                "runs": len(samples),
+                "p50_ms": percentile(samples, 50) * 1000,
+                "p95_ms": percentile(samples, 95) * 1000,
+            }
+            for (section, scope), samples in sorted(renders.items())
+        ]
+
+    def records(self):
+        with self._lock:
+            return list(self._records)
+
+    def latencies(self, task, model):
+        """Returns the wall times of recent successful provider calls for a task type and model."""
+        return [
+            e["wall_seconds"] for e in self.records()
+            if e["task"] == task and e["model"] == model and e["outcome"] == "ok"
+        ]
+
+    def summary(self, group_by="task"):
+        """Summarizes recent records per task type (or per provider): counts, latency percentiles, tokens and cost."""
+        groups = defaultdict(list)
+        for entry in self.records():
+            groups[entry[group_by]].append(entry)
+        rows = []
+        for key, entries in sorted(groups.items()):
+            # Cache hits never reach a provider and cancelled hedges never finish, so both are
+            # left out of the latency distribution
+            timed = [e for e in entries if e["outcome"] not in ("cache_hit", "cancelled")]
+            walls = [e["wall_seconds"] for e in timed]
+            ttfts = [e["ttft_seconds"] for e in timed]
+            rows.append({
+                group_by: key,
+                "calls": len(entries),
+                "cache_hits": sum(1 for e in entries if e["outcome"] == "cache_hit"),
+                "errors": sum(1 for e in entries if e["outcome"] == "error"),
+                "cancelled": sum(1 for e in entries if e["outcome"] == "cancelled"),
+                "p50_s": percentile(walls, 50),
+                "p95_s": percentile(walls, 95),
+                "p99_s": percentile(walls, 99),
+                "p50_ttft_s": percentile(ttfts, 50),
+                "prompt_tokens": sum(e["prompt_tokens"] for e in entries),
+                "completion_tokens": sum(e["completion_tokens"] for e in entries),
+                "cost_usd": sum(e["cost_usd"] for e in entries),
+            })
+        return rows
+
+    def to_jsonl(self):
+        return "".join(json.dumps(entry) + "\n" for entry in self.records())
+
+    def to_prometheus(self):
+        """Renders the cumulative counters and latency histograms in the Prometheus text format."""
+        def fmt(labels):
+            task, provider, model, outcome = labels[:4]
+            return f'task="{task}",provider="{provider}",model="{model}",outcome="{outcome}"'
+
+        with self._lock:
+            lines = [
+                "# HELP ascent_task_runs_total Branding task executions.",
+                "# TYPE ascent_task_runs_total counter",
+            ]
+            lines += [f"ascent_task_runs_total{{{fmt(labels)}}} {count}" for labels, count in self._counts.items()]
+            lines += [
+                "# HELP ascent_task_tokens_total Tokens used by branding tasks.",
+                "# TYPE ascent_task_tokens_total counter",
+            ]
+            lines += [f'ascent_task_tokens_total{{{fmt(labels)},type="{labels[4]}"}} {count}' for labels, count in self._tokens.items()]
+            lines += [
+                "# HELP ascent_task_cost_usd_total Estimated provider cost of branding tasks.",
+                "# TYPE ascent_task_cost_usd_total counter",
+            ]
+            lines += [f"ascent_task_cost_usd_total{{{fmt(labels)}}} {cost:.8f}" for labels, cost in self._cost.items()]
+            lines += [
+                "# HELP ascent_task_duration_seconds Wall time of branding tasks.",
+                "# TYPE ascent_task_duration_seconds histogram",
+            ]
+            for labels, buckets in self._buckets.items():
+                for bound, count in zip(LATENCY_BUCKETS, buckets):
+                    lines.append(f'ascent_task_duration_seconds_bucket{{{fmt(labels)},le="{bound}"}} {count}')
+                lines.append(f'ascent_task_duration_seconds_bucket{{{fmt(labels)},le="+Inf"}} {self._counts[labels]}')
+                lines.append(f"ascent_task_duration_seconds_sum{{{fmt(labels)}}} {self._duration_sum[labels]:.6f}")
+                lines.append(f"ascent_task_duration_seconds_count{{{fmt(labels)}}} {self._counts[labels]}")
+        return "\n".join(lines) + "\n"
+
+
+# Shared by every session served from this process
+metrics = MetricsRegistry()
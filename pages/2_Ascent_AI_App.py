@@ -1,19 +1,41 @@
+import functools
+import json
 import os
+import time
 import streamlit as st
-from dotenv import load_dotenv
-from crewai import Crew, Process
-from agents import BrandingAgents
-from tasks import BrandingTasks
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+import config  # noqa: F401
 from utils import process_uploaded_files
+from runner import run_ideas_task, run_task, stream_task
+from prewarm import prewarm
+from batch import draft_ideas, split_theme_ideas, theme_idea_batcher
+from jobs import SPECULATIVE, job_queue
+from metrics import metrics
+from pool import pooled_agents, branding_tasks
+from idea_parsing import IdeaFormatError, IdeaStreamParser, parse_ideas_output, parse_partial_ideas
+from similarity import DUPLICATE_MODE, DUPLICATE_TOP_UP, filter_new_ideas
+from session_store import RETENTION_DAYS, session_store
+from session_memory import session_memory
+from versions import version_store
+from user_profile import context_fingerprint, parse_profile, profile_context, profile_is_current
 import uuid
-import re
 from datetime import datetime
 
-# Load environment variables
-load_dotenv()
+# How often the page polls for background jobs while any are in flight (seconds)
+JOB_POLL_INTERVAL = 1.0
+STRATEGY_JOB_KINDS = ("strategy", "refined_strategy", "ideas")
+IDEA_JOB_KINDS = ("ideas", "theme_ideas")
+DRAFT_JOB_KINDS = ("draft", "qa")
+# How long the outline waits for the distilled profile before sending the raw background instead (seconds)
+PROFILE_WAIT_SECONDS = float(os.getenv("ASCENT_PROFILE_WAIT_SECONDS", 20))
+# Sessions listed per page of the sidebar history
+SESSION_PAGE_SIZE = int(os.getenv("ASCENT_SESSION_PAGE_SIZE", 20))
+# Browser cookie holding the ID the stored sessions belong to
+OWNER_COOKIE = "ascent_owner"
 
 # --- PAGE CONFIGURATION ---
 st.set_page_config(page_title="Ascent AI", page_icon="🚀", layout="wide")
+page_started = time.perf_counter()
 
 st.markdown("""
 <style>
@@ -25,8 +47,32 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 # --- SESSION STATE INITIALIZATION ---
+# Sessions are stored in session_store; only the open one and any with work in flight are kept here,
+# and session_memory releases even those from tabs left idle or over their user's memory budget
 if "sessions" not in st.session_state:
     st.session_state.sessions = {}
+# Identifies whose sessions the history shows. It is kept in a cookie so it survives a reload
+# without ever appearing in a link that could be shared; older links carried it as ?owner=
+try:
+    # Only a well-formed ID is taken from the cookie
+    cookie_owner = str(uuid.UUID(str(st.context.cookies.get(OWNER_COOKIE))))
+except ValueError:
+    cookie_owner = None
+if "owner_id" not in st.session_state:
+    st.session_state.owner_id = cookie_owner or str(uuid.uuid4())
+if "owner" in st.query_params:
+    del st.query_params["owner"]
+if cookie_owner != st.session_state.owner_id and not st.session_state.get("owner_cookie_set"):
+    max_age = int(RETENTION_DAYS * 86400) or 10 * 365 * 86400
+    st.html(
+        f"<script>document.cookie = '{OWNER_COOKIE}={st.session_state.owner_id}; max-age={max_age}; path=/; SameSite=Strict'"
+        " + (location.protocol === 'https:' ? '; Secure' : '');</script>",
+        unsafe_allow_javascript=True,
+    )
+    st.session_state.owner_cookie_set = True
+# Identifies this browser tab to session_memory
+if "tab_id" not in st.session_state:
+    st.session_state.tab_id = str(uuid.uuid4())
 if "current_session_id" not in st.session_state:
     st.session_state.current_session_id = None
 if "editing_session_id" not in st.session_state:
@@ -35,13 +81,51 @@ if "active_tab" not in st.session_state:
     st.session_state.active_tab = "📝 Brand Strategy"
 if "qa_critique" not in st.session_state:
     st.session_state.qa_critique = ""
+if "idea_parsers" not in st.session_state:
+    st.session_state.idea_parsers = {}
+if "history_page" not in st.session_state:
+    st.session_state.history_page = 0
 
 
 # --- HELPER FUNCTIONS ---
 def get_current_session():
-    if st.session_state.current_session_id:
-        return st.session_state.sessions.get(st.session_state.current_session_id)
-    return None
+    session_id = st.session_state.current_session_id
+    if not session_id:
+        return None
+    if session_id not in st.session_state.sessions:
+        session = session_store.load(session_id)
+        if session is None:
+            st.session_state.current_session_id = None
+            return None
+        st.session_state.sessions[session_id] = session
+    return st.session_state.sessions[session_id]
+
+def has_work_in_flight(session_id):
+    return bool(job_queue.pending(session_id) or theme_idea_batcher.pending(session_id))
+
+def persist_sessions():
+    """Saves what changed in the sessions held in memory and drops the ones that are no longer needed.
+
+    A session stays in memory while it is open or has background work whose result has
+    to be merged into it; the others are reloaded from session_store when opened again.
+    """
+    for session_id, session in list(st.session_state.sessions.items()):
+        session_store.save(session_id, session, owner=st.session_state.owner_id)
+        if session_id != st.session_state.current_session_id and not has_work_in_flight(session_id):
+            del st.session_state.sessions[session_id]
+            session_store.forget(session_id)
+
+def delete_unused_versions():
+    """Deletes the stored versions that no saved session refers to any more."""
+    version_store.sweep(session_store.content_ids())
+
+def begin_memory_accounting():
+    """Registers this tab's sessions with session_memory, dropping any it released since the last run."""
+    session_memory.begin(st.session_state.tab_id, st.session_state.owner_id, st.session_state.sessions, has_work_in_flight)
+
+def end_memory_accounting():
+    """Reports this tab's sessions to session_memory, which may release idle or over-budget sessions of any tab."""
+    session_memory.end(st.session_state.tab_id, st.session_state.current_session_id, has_work_in_flight)
 
 def new_session():
     session_id = str(uuid.uuid4())
@@ -122,55 +206,379 @@ def create_mock_session():
     st.rerun()
 
 
-def parse_ideas(text):
-    """Parses the AI's text output into a dictionary of themes and ideas."""
-    ideas_dict = {}
-    current_theme = None
-    sections = re.split(r'THEME:\s*', text, flags=re.IGNORECASE)[1:]
-    
-    for section in sections:
-        lines = section.strip().split('\n')
-        
-        if len(lines) > 0 and not lines[0].strip().startswith('-'):
-            current_theme = lines[0].strip()
-            lines = lines[1:]
+def write_task_stream(agent, task, use_cache=True):
+    """Renders the task's output token by token as it arrives and returns the final string."""
+    task_stream = stream_task(agent, task, use_cache=use_cache)
+    st.write_stream(task_stream)
+    return task_stream.result
+
+def request_profile(session_id, session):
+    """Distills the session's background into a compact profile in the background.
+
+    Does nothing if the current profile already matches the background or is being distilled.
+    """
+    user_context = session["context"].get("user_context", "")
+    if not user_context or profile_is_current(session):
+        return
+    source_hash = context_fingerprint(user_context)
+    if any(job.meta.get("source_hash") == source_hash for job in job_queue.pending(session_id, ("profile",))):
+        return
+    summarizer_agent = agents.resume_summarizer_agent()
+    profile_task = tasks.distill_profile_task(summarizer_agent, user_context)
+    job_queue.submit(session_id, "profile", summarizer_agent, profile_task, source_hash=source_hash)
+
+def apply_profile(session_id, session, timeout=PROFILE_WAIT_SECONDS):
+    """Merges the session's distilled profile, waiting up to `timeout` seconds for one still being distilled.
+
+    Called before the outline, the largest prompt, rather than relying on some earlier
+    run having merged the profile job.
+    """
+    deadline = time.monotonic() + timeout
+    for job in job_queue.pending(session_id, ("profile",)):
+        job.wait(max(0.0, deadline - time.monotonic()))
+    for job in job_queue.pop_finished(session_id, ("profile",)):
+        apply_job_result(session_id, session, job)
+
+def task_context(session, exclude=()):
+    """Returns the session's context for task prompts, using the distilled profile in place of the raw background."""
+    context = {k: v for k, v in session["context"].items() if k not in exclude}
+    if "user_context" in context:
+        context["user_context"] = profile_context(session)
+    return context
+
+def next_step_inputs(session, kind):
+    """Identifies what the strategy or ideas job would be built from right now."""
+    if kind == "strategy":
+        return context_fingerprint(json.dumps(task_context(session), sort_keys=True))
+    return context_fingerprint(current_strategy(session))
+
+def next_step_task(session, kind):
+    """Builds the agent and task of the detailed strategy or post ideas step."""
+    if kind == "strategy":
+        agent = agents.personal_branding_strategist()
+        return agent, tasks.strategy_task(agent, **task_context(session))
+    agent = agents.content_ideation_agent()
+    return agent, tasks.ideation_task(agent, current_strategy(session))
+
+def speculate(session_id, session, kind):
+    """Starts the step the user is likely to approve next in the background.
+
+    Its result is only merged if start_next_step() adopts it, once the user approves.
+    """
+    if not SPECULATIVE:
+        return
+    inputs = next_step_inputs(session, kind)
+    if job_queue.speculating(session_id, kind, inputs):
+        return
+    # What was speculated from earlier inputs (e.g. before the profile was distilled) no longer applies
+    job_queue.cancel_speculative(session_id, (kind,))
+    job_queue.submit(session_id, kind, *next_step_task(session, kind), speculative=True, inputs=inputs)
+
+def start_next_step(session_id, session, kind):
+    """Starts the detailed strategy or the post ideas, adopting the speculative job if it was started from the same inputs."""
+    inputs = next_step_inputs(session, kind)
+    if job_queue.promote(session_id, kind, inputs):
+        return
+    job_queue.submit(session_id, kind, *next_step_task(session, kind), inputs=inputs)
+
+def apply_job_result(session_id, session, job):
+    """Merges a finished background job into the session it was submitted for."""
+    is_current = session_id == st.session_state.current_session_id
+    st.session_state.idea_parsers.pop(job.id, None)
+    if job.kind == "profile":
+        # Prompts keep using the raw background if distillation fails or returns something unusable
+        profile = parse_profile(job.result) if job.status == "done" else None
+        if profile:
+            session["profile"] = {"source_hash": job.meta["source_hash"], "data": profile}
+        return
+
+    if job.status == "failed":
+        if job.kind in DRAFT_JOB_KINDS:
+            session["conversation_state"] = "strategy_approved" # Revert state
+            session["selected_idea"] = None # Clear selected idea
+            if is_current:
+                st.session_state.qa_critique = ""
+        elif job.kind in STRATEGY_JOB_KINDS:
+            session["messages"].append({"role": "assistant", "content": f"Sorry, something went wrong while working on that. Please try again. Error: {job.error}"})
+        st.toast(f"A background task for '{session['title']}' failed: {job.error}", icon="⚠️")
+        return
+
+    if job.kind in ("strategy", "refined_strategy"):
+        strategy = job.result
+        version = add_version(session["strategy_history"], strategy, version=len(session["strategy_history"]) + 1)
+        if job.kind == "strategy":
+            response = version_message("Here is the detailed brand strategy:\n\n---\n\n", version, "\n\n---\n\nDoes this feel like the right direction? Please provide feedback for refinement, or type 'looks good' to approve.")
+            session["conversation_state"] = "awaiting_refinement"
+            title_agent = agents.title_agent()
+            job_queue.submit(session_id, "title", title_agent, tasks.title_task(title_agent, strategy))
         else:
-            last_line = lines[-1].strip() if lines else ""
-            if "THEME:" in last_line:
-                current_theme = last_line.replace("THEME:", "").strip()
-                lines.pop()
-            else:
-                current_theme = "Uncategorized Ideas"
-        
-        if current_theme not in ideas_dict:
-            ideas_dict[current_theme] = []
-
-        for line in lines:
-            line = line.strip()
-            if line.startswith('- '):
-                idea = line[2:].strip()
-                ideas_dict[current_theme].append({"text": idea, "checked": False})
-            elif len(ideas_dict[current_theme]) > 0:
-                ideas_dict[current_theme][-1]["text"] += " " + line
-    return ideas_dict
-
-def parse_quick_ideas(text):
-    """Parses a simple bulleted list of ideas with no theme header."""
-    ideas_list = []
-    lines = text.strip().split('\n')
-    for line in lines:
-        line = line.strip()
-        if line.startswith('- '):
-            idea = line[2:].strip()
-            ideas_list.append({"text": idea, "checked": False})
-    return ideas_list
+            response = version_message("I've updated the strategy based on your feedback:\n\n---\n\n", version, "\n\n---\n\nHow does this new version look?")
+        session["messages"].append(response)
+    elif job.kind == "title":
+        session["title"] = job.result
+        st.toast(f"Session renamed to: {session['title']}")
+    elif job.kind in IDEA_JOB_KINDS:
+        try:
+            post_ideas = parse_ideas_output(job.result)
+        except IdeaFormatError as e:
+            if job.meta.get("repaired"):
+                if job.kind == "ideas":
+                    session["messages"].append({"role": "assistant", "content": f"Sorry, I couldn't read the post ideas I generated. Please try again. Error: {e}"})
+                st.toast(f"Post ideas for '{session['title']}' could not be parsed.", icon="⚠️")
+                return
+            # Ask for the output to be fixed rather than regenerating the ideas from scratch
+            fixer = agents.content_ideation_agent()
+            job_queue.submit(session_id, job.kind, fixer, tasks.fix_ideas_output_task(fixer, job.result, e), **job.meta, repaired=True)
+            return
+        if job.kind == "theme_ideas":
+            apply_theme_ideas(session_id, session, split_theme_ideas(job.meta["requests"], post_ideas))
+            return
+        # The new ideas replace the current ones, so they are only checked against each other and the drafts
+        session["post_ideas"] = drop_near_duplicates(session, post_ideas, exclude=idea_texts(session["post_ideas"]))
+        session["messages"].append({"role": "assistant", "content": "Great! The strategy is finalized. I've also generated some initial post ideas for you. You can view them now in the **💡 Post Ideas** tab."})
+        session["conversation_state"] = "strategy_approved"
+        st.toast("Post ideas generated! Go to the 'Post Ideas' tab to view them.")
+    elif job.kind == "draft":
+        session["draft"] = job.result
+        # Immediately run the QA check on the new draft
+        qa_agent = agents.quality_assurance_agent()
+        job_queue.submit(session_id, "qa", qa_agent, tasks.qa_critique_task(qa_agent, job.result), idea=job.meta.get("idea"))
+    elif job.kind == "qa":
+        if is_current:
+            st.session_state.qa_critique = job.result
+        session["conversation_state"] = "post_drafted"
+
+def merge_finished_jobs():
+    """Merges the results of every finished background job into the sessions they belong to."""
+    for session_id, session in st.session_state.sessions.items():
+        for job in job_queue.pop_finished(session_id):
+            apply_job_result(session_id, session, job)
+
+@st.fragment(run_every=JOB_POLL_INTERVAL)
+def job_progress(session_id, kinds, waiting_message):
+    """Shows the live output of a session's background jobs and reruns the app once they have finished."""
+    jobs = job_queue.pending(session_id, kinds)
+    if not jobs or any(job.done for job in jobs):
+        st.rerun()
+    st.caption(f"⏳ {waiting_message} You can keep working in other tabs or sessions in the meantime.")
+    for job in jobs:
+        if job.kind == "ideas":
+            render_streamed_ideas(job)
+        elif job.partial:
+            st.markdown(job.partial)
+
+def is_fragment_run():
+    """Whether this script run only reruns fragments, rather than the whole page."""
+    ctx = get_script_run_ctx()
+    return bool(ctx and ctx.fragment_ids_this_run)
+
+def page_section(name):
+    """Turns a page section (the sidebar or a tab) into a fragment that reruns on its own.
+
+    Widgets inside the section rerun only the section. Each run's time is recorded on the
+    Metrics page, and a run of just the section merges finished background jobs first and
+    saves what it changed to session_store, as a full page run does.
+    """
+    def decorate(render):
+        @st.fragment(key=name)
+        @functools.wraps(render)
+        def section():
+            fragment_run = is_fragment_run()
+            started = time.perf_counter()
+            if fragment_run:
+                begin_memory_accounting()
+                # Only a full page run merges jobs at the top, and a section may be rerun on its own for a long time
+                merge_finished_jobs()
+            try:
+                render()
+                if fragment_run:
+                    persist_sessions()
+                    end_memory_accounting()
+            finally:
+                metrics.record_render(name, time.perf_counter() - started, "fragment" if fragment_run else "page")
+        return section
+    return decorate
+
+def rerun_sections(*sections):
+    """Reruns the page sections that show what an action changed, starting with the section that called this.
+
+    When the calling section is the only one, just its fragment reruns; a change that
+    other sections show reruns the whole page.
+    """
+    if len(sections) == 1 and is_fragment_run():
+        st.rerun(scope="fragment")
+    st.rerun()
+
+def start_writing(idea_text):
+    """Write button callback: selects an idea and reruns only the Final Post tab, which starts drafting it."""
+    session = get_current_session()
+    session["selected_idea"] = idea_text
+    session["conversation_state"] = "drafting_post"
+    st.session_state.qa_critique = "" # Clear critique
+    st.rerun("writer")
+
+def add_version(history, text, **fields):
+    """Appends a strategy or draft version to a history list and returns the entry.
+
+    The text goes to version_store, stored as a delta against the previous version, and
+    the entry only keeps its content ID.
+    """
+    base_id = history[-1].get("content_id") if history else None
+    entry = {**fields, "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"), "content_id": version_store.put(text, base_id)}
+    history.append(entry)
+    return entry
+
+def version_message(before, version, after):
+    """Returns a chat message that shows a stored version between two bits of text, without copying the version."""
+    return {"role": "assistant", "content": before, "content_id": version["content_id"], "suffix": after}
+
+def version_text(entry):
+    """Returns the text of a version entry or message, rebuilding it from version_store if it only has a content ID."""
+    if "content_id" not in entry:
+        return entry["content"]
+    return entry.get("content", "") + version_store.get(entry["content_id"]) + entry.get("suffix", "")
+
+def current_strategy(session):
+    return version_text(session["strategy_history"][-1]) if session["strategy_history"] else ""
+
+def idea_texts(ideas):
+    """Returns the text of every idea in a {theme: ideas} dict or a list of ideas."""
+    if isinstance(ideas, dict):
+        return [idea["text"] for theme_ideas in ideas.values() for idea in theme_ideas]
+    return [idea["text"] for idea in ideas]
+
+def existing_idea_texts(session):
+    """Returns what new ideas are checked against: every idea in the session, and each draft's idea and opening line."""
+    texts = idea_texts(session.get("post_ideas", {})) + idea_texts(session.get("quick_ideas", []))
+    drafts = session.get("draft_history", []) + [{"content": session.get("draft", ""), "idea": session.get("selected_idea")}]
+    for entry in drafts:
+        if entry.get("idea"):
+            texts.append(entry["idea"])
+        content = version_text(entry).strip()
+        if content:
+            texts.append(content.splitlines()[0])
+    return texts
+
+def drop_near_duplicates(session, new_ideas, exclude=()):
+    """Checks new ideas against the session's ideas and drafts (except the `exclude` texts) and against each other.
+
+    Takes a {theme: ideas} dict or a list of ideas and returns it without near-duplicates,
+    or with them flagged when ASCENT_DUPLICATE_MODE is "flag".
+    """
+    excluded = set(exclude)
+    existing = [text for text in existing_idea_texts(session) if text not in excluded]
+    flat = [idea for theme_ideas in new_ideas.values() for idea in theme_ideas] if isinstance(new_ideas, dict) else new_ideas
+    kept, duplicates = filter_new_ideas(flat, existing)
+    if duplicates:
+        action = "Flagged" if DUPLICATE_MODE == "flag" else "Left out"
+        st.toast(f"{action} {duplicates} new idea{'s' if duplicates > 1 else ''} too similar to ones you already have.", icon="♻️")
+    if not isinstance(new_ideas, dict):
+        return kept
+    kept_ids = {id(idea) for idea in kept}
+    return {theme: [idea for idea in theme_ideas if id(idea) in kept_ids] for theme, theme_ideas in new_ideas.items()}
+
+def apply_theme_ideas(session_id, session, results):
+    """Files the ideas generated for each per-theme request under its theme.
+
+    Near-duplicates are dropped, and a request that lost ideas that way is topped up once
+    with a follow-up request that lists the theme's ideas to steer clear of.
+    """
+    for request, new_ideas in results:
+        theme_ideas = session["post_ideas"].get(request["theme"])
+        if theme_ideas is None: # The theme is gone, e.g. the ideas were regenerated in the meantime
+            continue
+        new_ideas = drop_near_duplicates(session, new_ideas)
+        if request["mode"] == "new":
+            theme_ideas[:] = [idea for idea in theme_ideas if idea["text"] not in request["replace"]]
+        theme_ideas.extend(new_ideas)
+        missing = request["count"] - len(new_ideas)
+        if missing > 0 and DUPLICATE_MODE == "drop" and DUPLICATE_TOP_UP and not request.get("top_up") and session["strategy_history"]:
+            theme_idea_batcher.add(session_id, current_strategy(session), {
+                "theme": request["theme"], "mode": "new", "count": missing, "idea": None, "replace": [],
+                "avoid": idea_texts(theme_ideas), "top_up": True,
+            })
+
+@st.fragment(run_every=JOB_POLL_INTERVAL)
+def theme_ideas_progress(session_id):
+    """Shows the per-theme idea requests that are queued or running and reruns the app once they are in."""
+    queued = theme_idea_batcher.pending(session_id)
+    jobs = job_queue.pending(session_id, ("theme_ideas",))
+    if not queued and (not jobs or any(job.done for job in jobs)):
+        st.rerun()
+    themes = list(dict.fromkeys(request["theme"] for request in queued + [r for job in jobs for r in job.meta["requests"]]))
+    st.caption(f"⏳ Generating new ideas for {', '.join(themes)}. Keep clicking to add more themes; requests made within a moment of each other are sent together.")
+
+def render_streamed_ideas(job):
+    """Shows the ideas of a running ideation job theme by theme as they stream in."""
+    if job.partial.lstrip()[:1] in ("{", "`"):
+        post_ideas = parse_partial_ideas(job.partial)
+    else:
+        parser = st.session_state.idea_parsers.setdefault(job.id, IdeaStreamParser())
+        parser.feed(job.partial[parser.consumed:])
+        post_ideas = parser.ideas
+    for theme_index, (theme, ideas) in enumerate(post_ideas.items()):
+        st.markdown(f"**{theme_index + 1}. {theme}**")
+        for idea in ideas:
+            st.markdown(f'- "{idea["text"]}"')
+
+def generate_ideas(session, agent, task, use_cache=True, quick=False, exclude=()):
+    """Runs an idea task and returns its ideas without near-duplicates (see drop_near_duplicates).
+
+    Returns no ideas (after showing an error) if the task's output can't be read.
+    """
+    try:
+        new_ideas = run_ideas_task(agent, task, use_cache=use_cache, quick=quick)
+    except IdeaFormatError as e:
+        st.toast(f"Couldn't read the generated ideas. Please try again. Error: {e}", icon="⚠️")
+        return [] if quick else {}
+    return drop_near_duplicates(session, new_ideas, exclude=exclude)
+
+def collect_checked_ideas(session):
+    """Returns the text of every checked idea in the Post Ideas and Quick Ideas tabs."""
+    checked = [idea["text"] for ideas in session.get("post_ideas", {}).values() for idea in ideas if idea["checked"]]
+    checked += [idea["text"] for idea in session.get("quick_ideas", []) if idea["checked"]]
+    return list(dict.fromkeys(checked))
+
+def draft_all_selected(session):
+    """Drafts every checked idea concurrently and saves each result to the draft history as it finishes.
+
+    Returns True when every idea was drafted successfully.
+    """
+    selected_ideas = collect_checked_ideas(session)
+    if not selected_ideas:
+        st.warning("Please select at least one idea to draft.")
+        return False
+
+    progress = st.progress(0.0, text=f"Drafting {len(selected_ideas)} posts...")
+    completed, failed = 0, 0
+    for idea_text, draft, critique, error in draft_ideas(agents, tasks, selected_ideas):
+        completed += 1
+        if error:
+            failed += 1
+            st.error(f"Failed to draft \"{idea_text}\". Error: {error}")
+        else:
+            add_version(session["draft_history"], draft, idea=idea_text, critique=critique)
+            if not session.get("draft"):
+                session["draft"] = draft
+                st.session_state.qa_critique = critique
+        progress.progress(completed / len(selected_ideas), text=f"Drafted {completed} of {len(selected_ideas)} posts...")
+
+    st.toast(f"{completed - failed} drafts saved! Find them under 'Saved Drafts History' in the 'Final Post' tab.", icon="✍️")
+    return failed == 0
 
 # --- AGENT & TASK DEFINITIONS ---
-agents = BrandingAgents()
-tasks = BrandingTasks()
+# Shared across reruns and sessions; agents are leased from a process-wide pool (see pool.py)
+agents = pooled_agents
+tasks = branding_tasks
+
+# Results of background jobs and changes made before the last rerun are saved before the history is listed
+begin_memory_accounting()
+merge_finished_jobs()
+persist_sessions()
 
 # --- SIDEBAR: SESSION MANAGEMENT ---
-with st.sidebar:
+@page_section("sidebar")
+def sidebar_section():
     st.title("🚀 Ascent AI")
     st.markdown("Intelligent Branding for Your Career Ascent")
 
@@ -186,11 +594,26 @@ with st.sidebar:
         create_mock_session()
 
     st.divider()
-    if st.session_state.sessions:
+    owner_id = st.session_state.owner_id
+    if session_store.delete_expired():
+        delete_unused_versions()
+    if session_store.count_sessions(owner_id):
         st.subheader("📜 Session History")
-        for session_id, session_data in reversed(list(st.session_state.sessions.items())):
+        history_search = st.text_input(
+            "Search sessions", key="history_search", placeholder="🔍 Search by title", label_visibility="collapsed",
+            on_change=lambda: st.session_state.update(history_page=0),
+        )
+        # Only one page of the history is read and rendered, however many sessions there are
+        page_count = max(1, -(-session_store.count_sessions(owner_id, history_search) // SESSION_PAGE_SIZE))
+        st.session_state.history_page = min(st.session_state.history_page, page_count - 1)
+        session_history = session_store.list_sessions(
+            owner_id, history_search, limit=SESSION_PAGE_SIZE, offset=st.session_state.history_page * SESSION_PAGE_SIZE
+        )
+        if not session_history:
+            st.caption("No sessions match your search.")
+        for session_id, title, updated_at in session_history:
             is_active = (session_id == st.session_state.current_session_id)
-            label = f"**▶ {session_data['title']}**" if is_active else session_data['title']
+            label = f"**▶ {title}**" if is_active else title
             col1, col2, col3 = st.columns([0.7, 0.15, 0.15])
             with col1:
                 if st.button(label, key=f"load_{session_id}", use_container_width=True):
@@ -202,766 +625,760 @@ with st.sidebar:
             with col2.container(border=False):
                 if st.button("✏️", key=f"start_edit_{session_id}", use_container_width=True):
                     st.session_state.editing_session_id = session_id
-                    st.rerun()
+                    rerun_sections("sidebar")
             with col3.container(border=False):
                 if st.button("🗑️", key=f"delete_{session_id}", use_container_width=True):
-                    del st.session_state.sessions[session_id]
+                    st.session_state.sessions.pop(session_id, None)
+                    session_store.delete(session_id)
+                    delete_unused_versions()
+                    job_queue.discard(session_id)
+                    theme_idea_batcher.discard(session_id)
                     if st.session_state.current_session_id == session_id:
                         st.session_state.current_session_id = None
-                    st.session_state.qa_critique = "" # Clear critique
-                    st.rerun()
+                        st.session_state.qa_critique = "" # Clear critique
+                        st.rerun()
+                    rerun_sections("sidebar")
 
             if st.session_state.editing_session_id == session_id:
-                new_title = st.text_input("New title", value=session_data["title"], key=f"edit_{session_id}", label_visibility="collapsed")
-                if new_title != session_data["title"]:
-                    st.session_state.sessions[session_id]["title"] = new_title
+                new_title = st.text_input("New title", value=title, key=f"edit_{session_id}", label_visibility="collapsed")
+                if new_title != title:
+                    if session_id in st.session_state.sessions:
+                        st.session_state.sessions[session_id]["title"] = new_title
+                    session_store.rename(session_id, new_title)
                     st.session_state.editing_session_id = None
-                    st.rerun()
-
-# --- MAIN CONTENT AREA ---
-session = get_current_session()
-
-if not session:
-    st.info("Start a new session from the sidebar to begin your branding journey.")
-else:
-    st.title("Create Your Personal Branding Strategy") 
-
-    strategy_tab, posts_tab, quick_ideas_tab, writer_tab = st.tabs(["📝 Brand Strategy", "💡 Post Ideas", "✨ Quick Ideas", "✍️ Final Post"])
+                    rerun_sections("sidebar")
+
+        if page_count > 1:
+            prev_col, page_col, next_col = st.columns([0.3, 0.4, 0.3])
+            with prev_col:
+                if st.button("◀", key="history_prev", use_container_width=True, disabled=st.session_state.history_page == 0):
+                    st.session_state.history_page -= 1
+                    rerun_sections("sidebar")
+            page_col.caption(f"Page {st.session_state.history_page + 1} of {page_count}")
+            with next_col:
+                if st.button("▶", key="history_next", use_container_width=True, disabled=st.session_state.history_page >= page_count - 1):
+                    st.session_state.history_page += 1
+                    rerun_sections("sidebar")
+
+    kept = f"deleted {RETENTION_DAYS:g} days after their last change" if RETENTION_DAYS else "kept until you delete them"
+    st.caption(
+        f"🔒 Your sessions, including your resume and writing samples, are stored on this server and {kept}. "
+        "A cookie ties them to this browser; delete a session any time with 🗑️."
+    )
 
-    with strategy_tab:
-        all_states = [
-            "start", "awaiting_resume_choice", "awaiting_resume_upload", "awaiting_intro",
-            "awaiting_confirmation", "awaiting_target", "awaiting_audience",
-            "awaiting_positioning", "awaiting_samples", "awaiting_duration",
-            "generating_strategy", "awaiting_outline_approval", "awaiting_refinement", "strategy_approved", "drafting_post", "post_drafted"
-        ]
-
-        # Define the states that are part of the core strategy progress
-        strategy_states = [
-            "start", "awaiting_resume_choice", "awaiting_resume_upload", "awaiting_intro",
-            "awaiting_confirmation", "awaiting_target", "awaiting_audience",
-            "awaiting_positioning", "awaiting_samples", "awaiting_duration",
-            "generating_strategy", "awaiting_outline_approval", "awaiting_refinement", "strategy_approved"
-        ]
-        
-        progress_steps = [
-            "Resume & Background", "Goals & Positioning",
-            "Strategy Generation", "Strategy Approval"
-        ]
+with st.sidebar:
+    sidebar_section()
+
+# --- BRAND STRATEGY TAB ---
+@page_section("strategy")
+def strategy_section():
+    session = get_current_session()
+    all_states = [
+        "start", "awaiting_resume_choice", "awaiting_resume_upload", "awaiting_intro",
+        "awaiting_confirmation", "awaiting_target", "awaiting_audience",
+        "awaiting_positioning", "awaiting_samples", "awaiting_duration",
+        "generating_strategy", "awaiting_outline_approval", "awaiting_refinement", "strategy_approved", "drafting_post", "post_drafted"
+    ]
+
+    # Define the states that are part of the core strategy progress
+    strategy_states = [
+        "start", "awaiting_resume_choice", "awaiting_resume_upload", "awaiting_intro",
+        "awaiting_confirmation", "awaiting_target", "awaiting_audience",
+        "awaiting_positioning", "awaiting_samples", "awaiting_duration",
+        "generating_strategy", "awaiting_outline_approval", "awaiting_refinement", "strategy_approved"
+    ]
+    
+    progress_steps = [
+        "Resume & Background", "Goals & Positioning",
+        "Strategy Generation", "Strategy Approval"
+    ]
 
-        current_state = session.get("conversation_state", "start")
-        
-        # Calculate progress based only on strategy-related states
-        if current_state in strategy_states:
-            current_state_index = strategy_states.index(current_state)
-            progress_value = current_state_index / (len(strategy_states) - 1)
+    current_state = session.get("conversation_state", "start")
+    
+    # Calculate progress based only on strategy-related states
+    if current_state in strategy_states:
+        current_state_index = strategy_states.index(current_state)
+        progress_value = current_state_index / (len(strategy_states) - 1)
+    else:
+        # Once the strategy is approved, the progress bar is considered full
+        progress_value = 1.0
+
+    st.progress(progress_value)
+
+    cols = st.columns(len(progress_steps))
+    for i, step_title in enumerate(progress_steps):
+        with cols[i]:
+            is_active = False
+            if step_title == "Resume & Background" and current_state in ["awaiting_resume_choice", "awaiting_resume_upload", "awaiting_intro", "awaiting_confirmation"]:
+                is_active = True
+            elif step_title == "Goals & Positioning" and current_state in ["awaiting_target", "awaiting_audience", "awaiting_positioning", "awaiting_samples", "awaiting_duration"]:
+                is_active = True
+            elif step_title == "Strategy Generation" and current_state in ["generating_strategy", "awaiting_outline_approval"]:
+                is_active = True
+            elif step_title == "Strategy Approval" and current_state in ["awaiting_refinement", "strategy_approved"]:
+                is_active = True
+            
+            if is_active:
+                st.markdown(f"**{step_title}**")
+            else:
+                st.markdown(f"_{step_title}_")
+
+    st.header("Strategy Development")
+
+    for message in session.get("messages", []):
+        with st.chat_message(message["role"]):
+            st.markdown(version_text(message))
+
+    state = session.get("conversation_state", "start")
+
+    if job_queue.pending(st.session_state.current_session_id, STRATEGY_JOB_KINDS):
+        with st.chat_message("assistant"):
+            job_progress(st.session_state.current_session_id, STRATEGY_JOB_KINDS, "The Strategist is working on this in the background.")
+
+    elif state == "awaiting_resume_choice":
+        col1, col2, _ = st.columns([1, 2, 2])
+        with col1:
+            if st.button("📄 Upload Resume"):
+                session["messages"].append({"role": "user", "content": "I'll upload my resume."})
+                session["conversation_state"] = "awaiting_resume_upload"
+                rerun_sections("strategy")
+        with col2:
+            if st.button("📝 Skip & Describe Yourself"):
+                session["messages"].append({"role": "user", "content": "I'll skip and describe myself."})
+                session["conversation_state"] = "awaiting_intro"
+                rerun_sections("strategy")
+
+    elif state == "awaiting_resume_upload":
+        uploaded_file = st.file_uploader("Please upload your resume (PDF, TXT, MD)", type=['pdf', 'txt', 'md'])
+        if uploaded_file:
+            with st.spinner("Analyzing your document..."):
+                file_text = process_uploaded_files([uploaded_file])
+                session["context"]["user_context"] = file_text
+                summarizer_agent = agents.resume_summarizer_agent()
+                summary_task = tasks.summarize_resume_task(summarizer_agent, file_text)
+                summary = run_task(summarizer_agent, summary_task)
+                session["messages"].append({"role": "assistant", "content": summary})
+                session["conversation_state"] = "awaiting_confirmation"
+                rerun_sections("strategy")
+
+    elif state == "awaiting_intro":
+        if prompt := st.chat_input("Please provide a brief summary of your professional background and goals."):
+            session["messages"].append({"role": "user", "content": prompt})
+            session["context"]["user_context"] = prompt
+            request_profile(st.session_state.current_session_id, session)
+            session["messages"].append({"role": "assistant", "content": "Thank you. Now, what’s the target role you’re aiming for?"})
+            session["conversation_state"] = "awaiting_target"
+            rerun_sections("strategy")
+
+    elif state == "awaiting_confirmation":
+        if prompt := st.chat_input("Did I get that right? Is there anything else to add?"):
+            session["messages"].append({"role": "user", "content": prompt})
+            session["context"]["user_context"] += f"\n\nAdditional User Notes:\n{prompt}"
+            request_profile(st.session_state.current_session_id, session)
+            session["messages"].append({"role": "assistant", "content": "Excellent, thank you. What is the target role you're aiming for?"})
+            session["conversation_state"] = "awaiting_target"
+            rerun_sections("strategy")
+
+    elif state in ["awaiting_target", "awaiting_audience", "awaiting_positioning", "awaiting_samples", "awaiting_duration"]:
+        prompt_map = {
+            "awaiting_target": "What is your target role? (e.g., AI Product Manager)",
+            "awaiting_audience": "Who is your target audience? (e.g., Hiring managers at top tech firms, fellow developers in the open-source community, venture capitalists interested in AI)",
+            "awaiting_positioning": "How do you want to come across? (e.g., authoritative, data-driven, innovative, visionary, approachable and community-focused)",
+            "awaiting_samples": "To learn your unique voice, please upload 1-3 writing samples (blog posts, articles, etc.). You can also skip this step.",
+            "awaiting_duration": "How many weeks for the content plan? (e.g., '4 weeks')"
+        }
+        key_map = {
+            "awaiting_target": "target_role",
+            "awaiting_audience": "target_audience",
+            "awaiting_positioning": "positioning",
+            "awaiting_duration": "duration"
+        }
+        next_state_map = {
+            "awaiting_target": "awaiting_audience",
+            "awaiting_audience": "awaiting_positioning",
+            "awaiting_positioning": "awaiting_samples",
+            "awaiting_samples": "awaiting_duration",
+            "awaiting_duration": "generating_strategy"
+        }
+
+        if state == "awaiting_samples":
+            st.info(prompt_map[state])
+            uploaded_files = st.file_uploader("Upload your writing samples (PDF, TXT, MD)", type=['pdf', 'txt', 'md'], accept_multiple_files=True)
+            
+            if st.button("Skip for now"):
+                session["context"]["writing_samples"] = ""
+                session["messages"].append({"role": "user", "content": "Skipped uploading writing samples."})
+                session["conversation_state"] = next_state_map[state]
+                session["messages"].append({"role": "assistant", "content": prompt_map[session["conversation_state"]]})
+                rerun_sections("strategy")
+
+            if uploaded_files:
+                with st.spinner("Analyzing writing style..."):
+                    file_text = process_uploaded_files(uploaded_files)
+                    session["context"]["writing_samples"] = file_text
+                    session["messages"].append({"role": "user", "content": f"Uploaded {len(uploaded_files)} writing sample(s)."})
+                    session["conversation_state"] = next_state_map[state]
+                    session["messages"].append({"role": "assistant", "content": prompt_map[session["conversation_state"]]})
+                    rerun_sections("strategy")
         else:
-            # Once the strategy is approved, the progress bar is considered full
-            progress_value = 1.0
-
-        st.progress(progress_value)
-
-        cols = st.columns(len(progress_steps))
-        for i, step_title in enumerate(progress_steps):
-            with cols[i]:
-                is_active = False
-                if step_title == "Resume & Background" and current_state in ["awaiting_resume_choice", "awaiting_resume_upload", "awaiting_intro", "awaiting_confirmation"]:
-                    is_active = True
-                elif step_title == "Goals & Positioning" and current_state in ["awaiting_target", "awaiting_audience", "awaiting_positioning", "awaiting_samples", "awaiting_duration"]:
-                    is_active = True
-                elif step_title == "Strategy Generation" and current_state in ["generating_strategy", "awaiting_outline_approval"]:
-                    is_active = True
-                elif step_title == "Strategy Approval" and current_state in ["awaiting_refinement", "strategy_approved"]:
-                    is_active = True
+            if prompt := st.chat_input(prompt_map.get(state)):
+                session["messages"].append({"role": "user", "content": prompt})
+                context_key = key_map.get(state)
+                if context_key:
+                    session["context"][context_key] = prompt
+                session["conversation_state"] = next_state_map[state]
+                if session["conversation_state"] != "generating_strategy":
+                    session["messages"].append({"role": "assistant", "content": prompt_map[session["conversation_state"]]})
+                rerun_sections("strategy")
+
+    elif state == "generating_strategy":
+        with st.chat_message("assistant"):
+            with st.spinner("Perfect, I have everything I need. The Strategist is now crafting a high-level outline..."):
+                if "platform" not in session["context"]:
+                    session["context"]["platform"] = "LinkedIn"
+                apply_profile(st.session_state.current_session_id, session)
                 
-                if is_active:
-                    st.markdown(f"**{step_title}**")
-                else:
-                    st.markdown(f"_{step_title}_")
-
-        st.header("Strategy Development")
+                outline_context = task_context(session, exclude=("writing_samples",))
+                
+                strategist_agent = agents.personal_branding_strategist()
+                intermediate_outline_task = tasks.intermediate_outline_task(strategist_agent, **outline_context)
+                intermediate_outline = write_task_stream(strategist_agent, intermediate_outline_task)
+                
+                response = f"Here is a high-level outline for your content strategy:\n\n---\n\n{intermediate_outline}\n\n---\n\nDoes this feel like the right direction? Please provide feedback for refinement, or type 'looks good' to proceed with the full strategy."
+                session["messages"].append({"role": "assistant", "content": response})
+                session["conversation_state"] = "awaiting_outline_approval"
+                rerun_sections("strategy")
+
+    elif state == "awaiting_outline_approval":
+        # Most outlines are approved as they are, so the detailed strategy starts while this one is read
+        speculate(st.session_state.current_session_id, session, "strategy")
+        if prompt := st.chat_input("Provide feedback to refine the outline, or type 'looks good' to approve..."):
+            session["messages"].append({"role": "user", "content": prompt})
+            with st.chat_message("user"):
+                st.markdown(prompt)
+            if any(word in prompt.lower() for word in ["good", "approve", "perfect", "continue"]):
+                # The detailed strategy runs in the background; it is saved to history and the
+                # session is renamed once the job finishes (see apply_job_result)
+                start_next_step(st.session_state.current_session_id, session, "strategy")
+                rerun_sections("strategy")
+            else:
+                job_queue.cancel_speculative(st.session_state.current_session_id, ("strategy",))
+                with st.chat_message("assistant"), st.spinner("Refining the outline based on your feedback..."):
+                    strategist_agent = agents.personal_branding_strategist()
+                    refine_task = tasks.refine_strategy_task(strategist_agent, current_strategy(session), prompt, **task_context(session))
+                    new_outline = write_task_stream(strategist_agent, refine_task)
+                    
+                    # Save refined outline to history
+                    version = add_version(session["strategy_history"], new_outline, version=len(session["strategy_history"]) + 1)
+                    response = version_message("I've updated the outline based on your feedback:\n\n---\n\n", version, "\n\n---\n\nHow does this new version look?")
+                session["messages"].append(response)
+                rerun_sections("strategy")
+
+    elif state == "awaiting_refinement":
+        # Likewise, the post ideas for this version start while it is read
+        speculate(st.session_state.current_session_id, session, "ideas")
+        if prompt := st.chat_input("Provide feedback to refine the strategy, or type 'looks good' to approve..."):
+            session["messages"].append({"role": "user", "content": prompt})
+            with st.chat_message("user"):
+                st.markdown(prompt)
+            if any(word in prompt.lower() for word in ["good", "approve", "perfect", "continue"]):
+                # Finalize the strategy and brainstorm post ideas in the background
+                start_next_step(st.session_state.current_session_id, session, "ideas")
+                # The Post Ideas tab shows the ideas as they stream in
+                rerun_sections("strategy", "posts")
+            else:
+                job_queue.cancel_speculative(st.session_state.current_session_id, ("ideas",))
+                # Refine the strategy in the background; the new version is appended to history when it is ready
+                strategist_agent = agents.personal_branding_strategist()
+                refine_task = tasks.refine_strategy_task(strategist_agent, current_strategy(session), prompt, **task_context(session))
+                job_queue.submit(st.session_state.current_session_id, "refined_strategy", strategist_agent, refine_task)
+                rerun_sections("strategy")
+
+    elif state == "strategy_approved":
+        st.success("Strategy approved! You can now generate post ideas or proceed to the other tabs.")
+
+    # --- Display Strategy History ---
+    if session["strategy_history"]:
+        st.markdown("---")
+        st.subheader("Strategy History")
+        
+        with st.expander("📜 Saved Strategy History"):
+            if session.get("strategy_history"):
+                for i, strategy_entry in enumerate(reversed(session["strategy_history"])):
+                    display_index = len(session['strategy_history']) - i
+                    st.markdown(f"**Version {display_index}** saved at `{strategy_entry['timestamp']}`")
+                    
+                    hist_col1, hist_col2 = st.columns([0.8, 0.2])
+                    with hist_col1:
+                        # The version is only rebuilt while its expander is open
+                        view = st.expander("View Content", key=f"view_strategy_{display_index}", on_change="rerun")
+                        with view:
+                            if view.open:
+                                st.markdown(version_text(strategy_entry))
 
-        for message in session.get("messages", []):
-            with st.chat_message(message["role"]):
-                st.markdown(message["content"])
+                    with hist_col2:
+                        if st.button("🗑️ Delete", key=f"delete_strategy_{display_index}", use_container_width=True):
+                            del session["strategy_history"][len(session["strategy_history"]) - i - 1]
+                            st.success("Strategy version deleted!")
+                            rerun_sections("strategy")
+            else:
+                st.info("No strategies have been saved yet.")
 
-        state = session.get("conversation_state", "start")
 
-        if state == "awaiting_resume_choice":
-            col1, col2, _ = st.columns([1, 2, 2])
-            with col1:
-                if st.button("📄 Upload Resume"):
-                    session["messages"].append({"role": "user", "content": "I'll upload my resume."})
-                    session["conversation_state"] = "awaiting_resume_upload"
-                    st.rerun()
-            with col2:
-                if st.button("📝 Skip & Describe Yourself"):
-                    session["messages"].append({"role": "user", "content": "I'll skip and describe myself."})
-                    session["conversation_state"] = "awaiting_intro"
-                    st.rerun()
+# --- POST IDEAS TAB ---
+@page_section("posts")
+def posts_section():
+    session = get_current_session()
+    st.header("Your Content Ideas")
+    st.markdown("These ideas are based on your personal branding strategy. Use the options below to refine and select your favorites.")
 
-        elif state == "awaiting_resume_upload":
-            uploaded_file = st.file_uploader("Please upload your resume (PDF, TXT, MD)", type=['pdf', 'txt', 'md'])
-            if uploaded_file:
-                with st.spinner("Analyzing your document..."):
-                    file_text = process_uploaded_files([uploaded_file])
-                    session["context"]["user_context"] = file_text
-                    summarizer_agent = agents.resume_summarizer_agent()
-                    summary_task = tasks.summarize_resume_task(summarizer_agent, file_text)
-                    crew = Crew(agents=[summarizer_agent], tasks=[summary_task], process=Process.sequential)
-                    summary = crew.kickoff().raw
-                    session["messages"].append({"role": "assistant", "content": summary})
-                    session["conversation_state"] = "awaiting_confirmation"
-                    st.rerun()
+    if session.get("post_ideas"):
+        post_ideas = session["post_ideas"]
+        session_id = st.session_state.current_session_id
+        if theme_idea_batcher.pending(session_id) or job_queue.pending(session_id, ("theme_ideas",)):
+            theme_ideas_progress(session_id)
 
-        elif state == "awaiting_intro":
-            if prompt := st.chat_input("Please provide a brief summary of your professional background and goals."):
-                session["messages"].append({"role": "user", "content": prompt})
-                session["context"]["user_context"] = prompt
-                session["messages"].append({"role": "assistant", "content": "Thank you. Now, what’s the target role you’re aiming for?"})
-                session["conversation_state"] = "awaiting_target"
-                st.rerun()
+        # Loop through each theme to display per-theme sections and ideas
+        for theme_index, (theme, ideas) in enumerate(post_ideas.items()):
+            st.subheader(f"{theme_index + 1}. {theme}")
+            
+            # Loop through each idea within the theme
+            for i, idea in enumerate(ideas):
+                col1, col2, col3, col4, col5 = st.columns([0.05, 0.65, 0.05, 0.20, 0.10])
+                
+                with col1:
+                    idea["checked"] = st.checkbox("Select idea", value=idea["checked"], key=f"check_{theme}_{i}", label_visibility="collapsed")
+                
+                with col2:
+                    st.markdown(f'"{idea["text"]}"')
+                    if idea.get("duplicate_of"):
+                        st.caption(f'♻️ {idea["similarity"]:.0%} similar to "{idea["duplicate_of"]}"')
+                
+                with col3:
+                    if st.button("🗑️", key=f"delete_{theme}_{i}", use_container_width=True):
+                        st.session_state.sessions[st.session_state.current_session_id]["post_ideas"][theme].pop(i)
+                        rerun_sections("posts")
+
+                with col4:
+                    if st.button("➕3 More like this", key=f"more_{theme}_{i}", use_container_width=True):
+                        theme_idea_batcher.add(session_id, current_strategy(session), {"theme": theme, "mode": "similar", "count": 3, "idea": idea["text"], "replace": []})
+                        rerun_sections("posts")
+                            
+                with col5:
+                    st.button("✍️ Write", key=f"write_{theme}_{i}", on_click=start_writing, args=(idea["text"],))
 
-        elif state == "awaiting_confirmation":
-            if prompt := st.chat_input("Did I get that right? Is there anything else to add?"):
-                session["messages"].append({"role": "user", "content": prompt})
-                session["context"]["user_context"] += f"\n\nAdditional User Notes:\n{prompt}"
-                session["messages"].append({"role": "assistant", "content": "Excellent, thank you. What is the target role you're aiming for?"})
-                session["conversation_state"] = "awaiting_target"
-                st.rerun()
-
-        elif state in ["awaiting_target", "awaiting_audience", "awaiting_positioning", "awaiting_samples", "awaiting_duration"]:
-            prompt_map = {
-                "awaiting_target": "What is your target role? (e.g., AI Product Manager)",
-                "awaiting_audience": "Who is your target audience? (e.g., Hiring managers at top tech firms, fellow developers in the open-source community, venture capitalists interested in AI)",
-                "awaiting_positioning": "How do you want to come across? (e.g., authoritative, data-driven, innovative, visionary, approachable and community-focused)",
-                "awaiting_samples": "To learn your unique voice, please upload 1-3 writing samples (blog posts, articles, etc.). You can also skip this step.",
-                "awaiting_duration": "How many weeks for the content plan? (e.g., '4 weeks')"
-            }
-            key_map = {
-                "awaiting_target": "target_role",
-                "awaiting_audience": "target_audience",
-                "awaiting_positioning": "positioning",
-                "awaiting_duration": "duration"
-            }
-            next_state_map = {
-                "awaiting_target": "awaiting_audience",
-                "awaiting_audience": "awaiting_positioning",
-                "awaiting_positioning": "awaiting_samples",
-                "awaiting_samples": "awaiting_duration",
-                "awaiting_duration": "generating_strategy"
-            }
-
-            if state == "awaiting_samples":
-                st.info(prompt_map[state])
-                uploaded_files = st.file_uploader("Upload your writing samples (PDF, TXT, MD)", type=['pdf', 'txt', 'md'], accept_multiple_files=True)
+            # Per-theme refinement section
+            with st.container():
+                st.markdown(f"**Refine Ideas for This Theme**")
                 
-                if st.button("Skip for now"):
-                    session["context"]["writing_samples"] = ""
-                    session["messages"].append({"role": "user", "content": "Skipped uploading writing samples."})
-                    session["conversation_state"] = next_state_map[state]
-                    session["messages"].append({"role": "assistant", "content": prompt_map[session["conversation_state"]]})
-                    st.rerun()
+                refinement_feedback = st.text_area("Provide feedback:", key=f"per_theme_feedback_{theme}")
+                
+                refinement_cols = st.columns(2)
+                with refinement_cols[0]:
+                    if st.button("Refine Selected Topics", key=f"refine_{theme}", use_container_width=True):
+                        selected_ideas_to_refine = [idea["text"] for idea in post_ideas[theme] if idea["checked"]]
+                        
+                        if selected_ideas_to_refine and refinement_feedback:
+                            with st.spinner("Refining selected ideas..."):
+                                ideator_agent = agents.content_ideation_agent()
+                                refine_task = tasks.refine_ideas_with_feedback_task(ideator_agent, current_strategy(session), refinement_feedback, selected_ideas_to_refine)
+                                refined_ideas_dict = generate_ideas(session, ideator_agent, refine_task, exclude=selected_ideas_to_refine)
+                                
+                                refined_ideas_list = list(refined_ideas_dict.values())[0] if refined_ideas_dict else []
+                                
+                                kept_ideas = [idea for idea in post_ideas[theme] if not idea["checked"]]
+                                
+                                session["post_ideas"][theme] = kept_ideas + refined_ideas_list
+                            
+                            rerun_sections("posts")
+                        else:
+                            st.warning("Please select topics and provide feedback to refine.")
 
-                if uploaded_files:
-                    with st.spinner("Analyzing writing style..."):
-                        file_text = process_uploaded_files(uploaded_files)
-                        session["context"]["writing_samples"] = file_text
-                        session["messages"].append({"role": "user", "content": f"Uploaded {len(uploaded_files)} writing sample(s)."})
-                        session["conversation_state"] = next_state_map[state]
-                        session["messages"].append({"role": "assistant", "content": prompt_map[session["conversation_state"]]})
-                        st.rerun()
-            else:
-                if prompt := st.chat_input(prompt_map.get(state)):
-                    session["messages"].append({"role": "user", "content": prompt})
-                    context_key = key_map.get(state)
-                    if context_key:
-                        session["context"][context_key] = prompt
-                    session["conversation_state"] = next_state_map[state]
-                    if session["conversation_state"] != "generating_strategy":
-                        session["messages"].append({"role": "assistant", "content": prompt_map[session["conversation_state"]]})
-                    st.rerun()
+                with refinement_cols[1]:
+                    if st.button("🔄 Generate New Ideas for Unselected Topics", key=f"regenerate_{theme}", use_container_width=True):
+                        unselected_ideas_count = sum(1 for idea in post_ideas[theme] if not idea["checked"])
+                        if unselected_ideas_count > 0:
+                            unselected_ideas = [idea["text"] for idea in post_ideas[theme] if not idea["checked"]]
+                            theme_idea_batcher.add(session_id, current_strategy(session), {"theme": theme, "mode": "new", "count": unselected_ideas_count, "idea": None, "replace": unselected_ideas})
+                            rerun_sections("posts")
+                        else:
+                            st.warning("Please unselect at least one idea to regenerate.")
 
-        elif state == "generating_strategy":
-            with st.chat_message("assistant"):
-                with st.spinner("Perfect, I have everything I need. The Strategist is now crafting a high-level outline..."):
-                    if "platform" not in session["context"]:
-                        session["context"]["platform"] = "LinkedIn"
-                    
-                    outline_context = {k: v for k, v in session["context"].items() if k != 'writing_samples'}
-                    
-                    strategist_agent = agents.personal_branding_strategist()
-                    intermediate_outline_task = tasks.intermediate_outline_task(strategist_agent, **outline_context)
-                    crew = Crew(agents=[strategist_agent], tasks=[intermediate_outline_task], process=Process.sequential)
-                    intermediate_outline = crew.kickoff().raw
-                    
-                    response = f"Here is a high-level outline for your content strategy:\n\n---\n\n{intermediate_outline}\n\n---\n\nDoes this feel like the right direction? Please provide feedback for refinement, or type 'looks good' to proceed with the full strategy."
-                    st.markdown(response)
-                    session["messages"].append({"role": "assistant", "content": response})
-                    session["conversation_state"] = "awaiting_outline_approval"
-                    st.rerun()
 
-        elif state == "awaiting_outline_approval":
-            if prompt := st.chat_input("Provide feedback to refine the outline, or type 'looks good' to approve..."):
-                session["messages"].append({"role": "user", "content": prompt})
-                if any(word in prompt.lower() for word in ["good", "approve", "perfect", "continue"]):
-                    with st.spinner("Great! Now creating the detailed strategy based on the outline..."):
-                        strategist_agent = agents.personal_branding_strategist()
-                        strategy_task = tasks.strategy_task(strategist_agent, **session["context"])
-                        crew = Crew(agents=[strategist_agent], tasks=[strategy_task], process=Process.sequential)
-                        strategy = crew.kickoff().raw
-                        
-                        # Save the first detailed strategy to history
-                        session["strategy_history"].append({
-                            "version": len(session["strategy_history"]) + 1,
-                            "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                            "content": strategy
-                        })
+            
+        # Start of the Overall Strategy Refinement section
+        st.subheader("Overall Strategy Refinement")
+        st.markdown("Actions that apply across all themes.")
+
+        overall_feedback = st.text_area("Provide feedback to refine all topics or generate new ones only for the unselected topics. Feedback will modify the selected ideas; generating new ideas will replace all unselected ones with a fresh batch.", key="overall_feedback_area")
+        overall_cols = st.columns(2)
+
+        with overall_cols[0]:
+            if st.button("Refine All Ideas with Feedback", key="refine_all_selected_btn", use_container_width=True):
+                selected_ideas = []
+                for theme, ideas in session["post_ideas"].items():
+                    for idea in ideas:
+                        if idea["checked"]:
+                            selected_ideas.append(f"THEME: {theme}\n- {idea['text']}")
+
+                if selected_ideas and overall_feedback:
+                    with st.spinner("Refining all selected ideas..."):
+                        ideator_agent = agents.content_ideation_agent()
+                        refine_task = tasks.refine_selected_ideas_across_themes_task(ideator_agent, current_strategy(session), overall_feedback, selected_ideas)
+                        refined_ideas = generate_ideas(session, ideator_agent, refine_task, exclude=[idea["text"] for ideas in session["post_ideas"].values() for idea in ideas if idea["checked"]])
 
-                        title_agent = agents.title_agent()
-                        title_task = tasks.title_task(title_agent, strategy)
-                        title_crew = Crew(agents=[title_agent], tasks=[title_task], process=Process.sequential)
-                        session["title"] = title_crew.kickoff().raw
-                        st.toast(f"Session renamed to: {session['title']}")
-                        
-                        response = f"Here is the detailed brand strategy:\n\n---\n\n{strategy}\n\n---\n\nDoes this feel like the right direction? Please provide feedback for refinement, or type 'looks good' to approve."
-                        st.markdown(response)
-                        session["messages"].append({"role": "assistant", "content": response})
-                        session["conversation_state"] = "awaiting_refinement"
-                        st.rerun()
+                        for refined_theme, new_ideas in refined_ideas.items():
+                            ideas_to_keep = [idea for idea in session["post_ideas"][refined_theme] if idea["text"] not in [s.replace(f"THEME: {refined_theme}\n- ", "") for s in selected_ideas]]
+                            session["post_ideas"][refined_theme] = ideas_to_keep + new_ideas
+                        rerun_sections("posts")
                 else:
-                    with st.spinner("Refining the outline based on your feedback..."):
-                        strategist_agent = agents.personal_branding_strategist()
-                        refine_task = tasks.refine_strategy_task(strategist_agent, session["strategy_history"][-1]["content"] if session["strategy_history"] else "", prompt, **session["context"])
-                        crew = Crew(agents=[strategist_agent], tasks=[refine_task], process=Process.sequential)
-                        new_outline = crew.kickoff().raw
-                        
-                        # Save refined outline to history
-                        session["strategy_history"].append({
-                            "version": len(session["strategy_history"]) + 1,
-                            "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                            "content": new_outline
-                        })
-                        
-                        response = f"I've updated the outline based on your feedback:\n\n---\n\n{new_outline}\n\n---\n\nHow does this new version look?"
-                    session["messages"].append({"role": "assistant", "content": response})
-                    st.rerun()
-
-        elif state == "awaiting_refinement":
-            if prompt := st.chat_input("Provide feedback to refine the strategy, or type 'looks good' to approve..."):
-                session["messages"].append({"role": "user", "content": prompt})
-                if any(word in prompt.lower() for word in ["good", "approve", "perfect", "continue"]):
-                    with st.spinner("Finalizing strategy and brainstorming post ideas..."):
+                    st.warning("Please select ideas and provide feedback to refine.")
+
+        with overall_cols[1]:
+            if st.button("🔄 Generate New Ideas for All Unselected Topics", key="regenerate_all_unselected_btn", use_container_width=True):
+                themes_to_regenerate = []
+                for theme, ideas in session["post_ideas"].items():
+                    if not any(idea["checked"] for idea in ideas):
+                        themes_to_regenerate.append(theme)
+                
+                if themes_to_regenerate:
+                    with st.spinner("Generating new ideas for all unselected themes..."):
                         ideator_agent = agents.content_ideation_agent()
-                        ideation_task = tasks.ideation_task(ideator_agent, session["strategy_history"][-1]["content"])
-                        crew = Crew(agents=[ideator_agent], tasks=[ideation_task], process=Process.sequential)
-                        ideas_text = crew.kickoff().raw
-                        session["post_ideas"] = parse_ideas(ideas_text)
-                        response = "Great! The strategy is finalized. I've also generated some initial post ideas for you. You can view them now in the **💡 Post Ideas** tab."
-                        st.toast("Post ideas generated! Go to the 'Post Ideas' tab to view them.")
-                        session["conversation_state"] = "strategy_approved"
+                        regenerate_task = tasks.regenerate_ideas_for_all_unselected_topics_task(ideator_agent, current_strategy(session), themes_to_regenerate)
+                        newly_generated_ideas = generate_ideas(session, ideator_agent, regenerate_task, use_cache=False)
+
+                        for theme, new_ideas in newly_generated_ideas.items():
+                            kept_ideas = [idea for idea in session["post_ideas"][theme] if idea["checked"]]
+                            session["post_ideas"][theme] = kept_ideas + new_ideas
+                        rerun_sections("posts")
                 else:
-                    with st.spinner("Refining the strategy based on your feedback..."):
-                        current_strategy = session["strategy_history"][-1]["content"]
-                        strategist_agent = agents.personal_branding_strategist()
-                        refine_task = tasks.refine_strategy_task(strategist_agent, current_strategy, prompt, **session["context"])
-                        crew = Crew(agents=[strategist_agent], tasks=[refine_task], process=Process.sequential)
-                        new_strategy = crew.kickoff().raw
-                        
-                        # Append new strategy to history
-                        session["strategy_history"].append({
-                            "version": len(session["strategy_history"]) + 1,
-                            "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                            "content": new_strategy
-                        })
+                    st.warning("All ideas are selected. Please unselect ideas to regenerate.")
+
+        if st.button("✍️ Draft All Selected", key="draft_all_selected_btn", use_container_width=True, help="Drafts every checked idea from the Post Ideas and Quick Ideas tabs in parallel."):
+            if draft_all_selected(session):
+                rerun_sections("posts", "writer")
+
+    elif job_queue.pending(st.session_state.current_session_id, ("ideas",)):
+        job_progress(st.session_state.current_session_id, ("ideas",), "Brainstorming post ideas from your strategy...")
+    else:
+        st.info("Your generated post ideas will appear here once the strategy is finalized.")
+
+
+# --- QUICK IDEAS TAB ---
+@page_section("quick_ideas")
+def quick_ideas_section():
+    session = get_current_session()
+    st.header("✨ Quick Ideas")
+    st.markdown("Generate on-demand post ideas on any topic, without needing a full brand strategy.")
+
+    # --- GENERATE IDEAS SECTION ---
+    with st.expander("🚀 Generate New Ideas", expanded=True):
+        with st.form("quick_idea_generation_form"):
+            topic = st.text_input("What topic or theme are the ideas about?", placeholder="e.g., The future of AI in content marketing")
+            generation_type = st.radio("Choose idea type:", ["Single Ideas", "3-Part Series"], horizontal=True)
+            
+            num_ideas = 3
+            if generation_type == "Single Ideas":
+                num_ideas = st.number_input("Number of ideas to generate:", min_value=1, max_value=10, value=3)
 
-                        response = f"I've updated the strategy based on your feedback:\n\n---\n\n{new_strategy}\n\n---\n\nHow does this new version look?"
+            submitted = st.form_submit_button("🚀 Generate Ideas")
 
-                session["messages"].append({"role": "assistant", "content": response})
-                st.rerun()
+        if submitted and topic:
+            with st.spinner("Generating ideas..."):
+                ideator_agent = agents.content_ideation_agent()
+                
+                if generation_type == "Single Ideas":
+                    task = tasks.single_post_ideas_task(
+                        ideator_agent, 
+                        user_context=profile_context(session),
+                        target_role=session["context"].get("target_role", ""),
+                        target_audience=session["context"].get("target_audience", ""),
+                        positioning=session["context"].get("positioning", ""),
+                        topic=topic,
+                        num_ideas=num_ideas
+                    )
+                else:
+                    task = tasks.short_series_ideas_task(
+                        ideator_agent,
+                        user_context=profile_context(session),
+                        target_role=session["context"].get("target_role", ""),
+                        target_audience=session["context"].get("target_role", ""),
+                        positioning=session["context"].get("positioning", ""),
+                        topic=topic
+                    )
+                new_ideas = generate_ideas(session, ideator_agent, task, quick=True, exclude=idea_texts(session["quick_ideas"]))
+                session["quick_ideas"] = new_ideas
+                st.success("Ideas generated!")
+                rerun_sections("quick_ideas")
+
+    # --- MANAGE & REFINE IDEAS SECTION ---
+    with st.expander("🛠️ Manage & Refine Ideas"):
+        if session.get("quick_ideas"):
+            st.markdown("Use the checkboxes to select ideas for refinement or regeneration.")
+            
+            # Display ideas with checkboxes and actions
+            for i, idea in enumerate(session["quick_ideas"]):
+                col1, col2, col3, col4, col5, col6 = st.columns([0.05, 0.55, 0.05, 0.10, 0.15, 0.10])
+                
+                with col1:
+                    idea["checked"] = st.checkbox("Select idea", value=idea["checked"], key=f"current_idea_check_{i}", label_visibility="collapsed")
+                
+                with col2:
+                    st.markdown(f'"{idea["text"]}"')
+                    if idea.get("duplicate_of"):
+                        st.caption(f'♻️ {idea["similarity"]:.0%} similar to "{idea["duplicate_of"]}"')
+                
+                with col3: # Trash can
+                    if st.button("🗑️", key=f"current_idea_delete_{i}", use_container_width=True):
+                        session["quick_ideas"].pop(i)
+                        rerun_sections("quick_ideas")
+                
+                with col4: # Save button
+                    if st.button("💾 Save", key=f"current_idea_save_{i}", use_container_width=True):
+                        if "quick_ideas_history" not in session:
+                            session["quick_ideas_history"] = []
+                        session["quick_ideas_history"].append({
+                            "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                            "content": idea["text"]
+                        })
+                        st.success("Idea saved!")
 
-        elif state == "strategy_approved":
-            st.success("Strategy approved! You can now generate post ideas or proceed to the other tabs.")
+                with col5: # More like this button
+                    if st.button("➕3 More like this", key=f"current_idea_more_{i}", use_container_width=True):
+                        with st.spinner("Generating more ideas..."):
+                            ideator_agent = agents.content_ideation_agent()
+                            similar_ideas_task = tasks.generate_similar_ideas_task(ideator_agent, "", "Quick Ideas", idea["text"])
+                            newly_generated_ideas = generate_ideas(session, ideator_agent, similar_ideas_task, use_cache=False, quick=True)
+                            session["quick_ideas"].extend(newly_generated_ideas)
+                            rerun_sections("quick_ideas")
 
-        # --- Display Strategy History ---
-        if session["strategy_history"]:
+                with col6: # Write button
+                    st.button("✍️ Write", key=f"current_idea_write_{i}", on_click=start_writing, args=(idea["text"],))
+            
             st.markdown("---")
-            st.subheader("Strategy History")
             
-            with st.expander("📜 Saved Strategy History"):
-                if session.get("strategy_history"):
-                    for i, strategy_entry in enumerate(reversed(session["strategy_history"])):
-                        display_index = len(session['strategy_history']) - i
-                        st.markdown(f"**Version {display_index}** saved at `{strategy_entry['timestamp']}`")
-                        
-                        hist_col1, hist_col2 = st.columns([0.8, 0.2])
-                        with hist_col1:
-                            with st.expander("View Content"):
-                                st.markdown(strategy_entry['content'])
-
-                        with hist_col2:
-                            if st.button("🗑️ Delete", key=f"delete_strategy_{display_index}", use_container_width=True):
-                                del session["strategy_history"][len(session["strategy_history"]) - i - 1]
-                                st.success("Strategy version deleted!")
-                                st.rerun()
-                else:
-                    st.info("No strategies have been saved yet.")
-           
-    with posts_tab:
-        st.header("Your Content Ideas")
-        st.markdown("These ideas are based on your personal branding strategy. Use the options below to refine and select your favorites.")
-
-        if session.get("post_ideas"):
-            post_ideas = session["post_ideas"]
+            # Overall Refinement Section
+            st.subheader("Overall Refinement")
+            st.markdown("Actions that apply across all ideas.")
 
-            # Loop through each theme to display per-theme sections and ideas
-            for theme_index, (theme, ideas) in enumerate(post_ideas.items()):
-                st.subheader(f"{theme_index + 1}. {theme}")
-                
-                # Loop through each idea within the theme
-                for i, idea in enumerate(ideas):
-                    col1, col2, col3, col4, col5 = st.columns([0.05, 0.65, 0.05, 0.20, 0.10])
-                    
-                    with col1:
-                        idea["checked"] = st.checkbox("", value=idea["checked"], key=f"check_{theme}_{i}")
-                    
-                    with col2:
-                        st.markdown(f'"{idea["text"]}"')
-                    
-                    with col3:
-                        if st.button("🗑️", key=f"delete_{theme}_{i}", use_container_width=True):
-                            st.session_state.sessions[st.session_state.current_session_id]["post_ideas"][theme].pop(i)
-                            st.rerun()
-
-                    with col4:
-                        if st.button("➕3 More like this", key=f"more_{theme}_{i}", use_container_width=True):
-                            with st.spinner("Generating more ideas..."):
-                                ideator_agent = agents.content_ideation_agent()
-                                similar_ideas_task = tasks.generate_similar_ideas_task(ideator_agent, session["strategy_history"][-1]["content"], theme, idea["text"])
-                                crew = Crew(agents=[ideator_agent], tasks=[similar_ideas_task], process=Process.sequential)
-                                similar_ideas_text = crew.kickoff().raw
-                                
-                                newly_generated_ideas = parse_ideas(similar_ideas_text)
-                                new_ideas_list = newly_generated_ideas.get(theme, [])
-                                
-                                session["post_ideas"][theme].extend(new_ideas_list)
-                                st.rerun()
-                                
-                    with col5:
-                        if st.button("✍️ Write", key=f"write_{theme}_{i}"):
-                            session["selected_idea"] = idea['text']
-                            session["conversation_state"] = "drafting_post"
-                            st.toast("Drafting post... go to the 'Final Post' tab to see it!", icon="✍️")
-                            st.session_state.qa_critique = "" # Clear critique
-                            st.rerun()
-
-                # Per-theme refinement section
-                with st.container():
-                    st.markdown(f"**Refine Ideas for This Theme**")
-                    
-                    refinement_feedback = st.text_area("Provide feedback:", key=f"per_theme_feedback_{theme}")
-                    
-                    refinement_cols = st.columns(2)
-                    with refinement_cols[0]:
-                        if st.button("Refine Selected Topics", key=f"refine_{theme}", use_container_width=True):
-                            selected_ideas_to_refine = [idea["text"] for idea in post_ideas[theme] if idea["checked"]]
-                            
-                            if selected_ideas_to_refine and refinement_feedback:
-                                with st.spinner("Refining selected ideas..."):
-                                    ideator_agent = agents.content_ideation_agent()
-                                    refine_task = tasks.refine_ideas_with_feedback_task(ideator_agent, session["strategy_history"][-1]["content"], refinement_feedback, selected_ideas_to_refine)
-                                    crew = Crew(agents=[ideator_agent], tasks=[refine_task], process=Process.sequential)
-                                    refined_ideas_text = crew.kickoff().raw
-                                    
-                                    refined_ideas_dict = parse_ideas(refined_ideas_text)
-                                    
-                                    refined_ideas_list = list(refined_ideas_dict.values())[0] if refined_ideas_dict else []
-                                    
-                                    kept_ideas = [idea for idea in post_ideas[theme] if not idea["checked"]]
-                                    
-                                    session["post_ideas"][theme] = kept_ideas + refined_ideas_list
-                                
-                                st.rerun()
-                            else:
-                                st.warning("Please select topics and provide feedback to refine.")
-
-                    with refinement_cols[1]:
-                        if st.button("🔄 Generate New Ideas for Unselected Topics", key=f"regenerate_{theme}", use_container_width=True):
-                            unselected_ideas_count = sum(1 for idea in post_ideas[theme] if not idea["checked"])
-                            if unselected_ideas_count > 0:
-                                with st.spinner(f"Generating {unselected_ideas_count} new ideas..."):
-                                    ideator_agent = agents.content_ideation_agent()
-                                    generate_task = tasks.generate_new_ideas_for_theme_task(ideator_agent, session["strategy_history"][-1]["content"], theme, unselected_ideas_count)
-                                    crew = Crew(agents=[ideator_agent], tasks=[generate_task], process=Process.sequential)
-                                    new_ideas_text = crew.kickoff().raw
-                                    newly_generated_ideas = parse_ideas(new_ideas_text)
-
-                                    kept_ideas = [idea for idea in post_ideas[theme] if idea["checked"]]
-                                    session["post_ideas"][theme] = kept_ideas + newly_generated_ideas.get(theme, [])
-                                    st.rerun()
-                            else:
-                                st.warning("Please unselect at least one idea to regenerate.")
-    
-
-                
-            # Start of the Overall Strategy Refinement section
-            st.subheader("Overall Strategy Refinement")
-            st.markdown("Actions that apply across all themes.")
-
-            overall_feedback = st.text_area("Provide feedback to refine all topics or generate new ones only for the unselected topics. Feedback will modify the selected ideas; generating new ideas will replace all unselected ones with a fresh batch.", key="overall_feedback_area")
+            overall_feedback = st.text_area("Provide feedback to refine all selected ideas or regenerate all unselected ideas.", key="quick_overall_feedback_area")
             overall_cols = st.columns(2)
 
             with overall_cols[0]:
-                if st.button("Refine All Ideas with Feedback", key="refine_all_selected_btn", use_container_width=True):
-                    selected_ideas = []
-                    for theme, ideas in session["post_ideas"].items():
-                        for idea in ideas:
-                            if idea["checked"]:
-                                selected_ideas.append(f"THEME: {theme}\n- {idea['text']}")
-
-                    if selected_ideas and overall_feedback:
-                        with st.spinner("Refining all selected ideas..."):
+                if st.button("Refine Selected Ideas", use_container_width=True, key="quick_refine_selected_btn"):
+                    selected_ideas_to_refine = [idea["text"] for idea in session["quick_ideas"] if idea["checked"]]
+                    if selected_ideas_to_refine and overall_feedback:
+                        with st.spinner("Refining selected ideas..."):
                             ideator_agent = agents.content_ideation_agent()
-                            refine_task = tasks.refine_selected_ideas_across_themes_task(ideator_agent, session["strategy_history"][-1]["content"], overall_feedback, selected_ideas)
-                            crew = Crew(agents=[ideator_agent], tasks=[refine_task], process=Process.sequential)
-                            refined_ideas_text = crew.kickoff().raw
-                            refined_ideas = parse_ideas(refined_ideas_text)
-
-                            for refined_theme, new_ideas in refined_ideas.items():
-                                ideas_to_keep = [idea for idea in session["post_ideas"][refined_theme] if idea["text"] not in [s.replace(f"THEME: {refined_theme}\n- ", "") for s in selected_ideas]]
-                                session["post_ideas"][refined_theme] = ideas_to_keep + new_ideas
-                            st.rerun()
+                            refine_task = tasks.refine_ideas_with_feedback_task(ideator_agent, "", overall_feedback, selected_ideas_to_refine)
+                            refined_ideas_list = generate_ideas(session, ideator_agent, refine_task, quick=True, exclude=selected_ideas_to_refine)
+                            kept_ideas = [idea for idea in session["quick_ideas"] if not idea["checked"]]
+                            
+                            session["quick_ideas"] = kept_ideas + refined_ideas_list
+                            rerun_sections("quick_ideas")
                     else:
                         st.warning("Please select ideas and provide feedback to refine.")
 
             with overall_cols[1]:
-                if st.button("🔄 Generate New Ideas for All Unselected Topics", key="regenerate_all_unselected_btn", use_container_width=True):
-                    themes_to_regenerate = []
-                    for theme, ideas in session["post_ideas"].items():
-                        if not any(idea["checked"] for idea in ideas):
-                            themes_to_regenerate.append(theme)
-                    
-                    if themes_to_regenerate:
-                        with st.spinner("Generating new ideas for all unselected themes..."):
+                if st.button("🔄 Generate New Ideas for Unselected", use_container_width=True, key="quick_regenerate_unselected_btn"):
+                    unselected_ideas_count = sum(1 for idea in session["quick_ideas"] if not idea["checked"])
+                    if unselected_ideas_count > 0:
+                        with st.spinner(f"Generating {unselected_ideas_count} new ideas..."):
                             ideator_agent = agents.content_ideation_agent()
-                            regenerate_task = tasks.regenerate_ideas_for_all_unselected_topics_task(ideator_agent, session["strategy_history"][-1]["content"], themes_to_regenerate)
-                            crew = Crew(agents=[ideator_agent], tasks=[regenerate_task], process=Process.sequential)
-                            new_ideas_text = crew.kickoff().raw
-                            newly_generated_ideas = parse_ideas(new_ideas_text)
-
-                            for theme, new_ideas in newly_generated_ideas.items():
-                                kept_ideas = [idea for idea in session["post_ideas"][theme] if idea["checked"]]
-                                session["post_ideas"][theme] = kept_ideas + new_ideas
-                            st.rerun()
+                            # Assuming we saved the original topic, or using a generic placeholder
+                            original_topic = topic or "general professional insights"
+                            generate_task = tasks.single_post_ideas_task(
+                                ideator_agent, 
+                                user_context=profile_context(session),
+                                target_role=session["context"].get("target_role", ""),
+                                target_audience=session["context"].get("target_audience", ""),
+                                positioning=session["context"].get("positioning", ""),
+                                topic=original_topic,
+                                num_ideas=unselected_ideas_count
+                            )
+                            newly_generated_ideas = generate_ideas(session, ideator_agent, generate_task, use_cache=False, quick=True)
+
+                            kept_ideas = [idea for idea in session["quick_ideas"] if idea["checked"]]
+                            session["quick_ideas"] = kept_ideas + newly_generated_ideas
+                            rerun_sections("quick_ideas")
                     else:
                         st.warning("All ideas are selected. Please unselect ideas to regenerate.")
 
+            if st.button("✍️ Draft All Selected", key="quick_draft_all_selected_btn", use_container_width=True, help="Drafts every checked idea from the Post Ideas and Quick Ideas tabs in parallel."):
+                if draft_all_selected(session):
+                    rerun_sections("quick_ideas", "writer")
         else:
-            st.info("Your generated post ideas will appear here once the strategy is finalized.")
-
-    with quick_ideas_tab:
-        st.header("✨ Quick Ideas")
-        st.markdown("Generate on-demand post ideas on any topic, without needing a full brand strategy.")
-
-        # --- GENERATE IDEAS SECTION ---
-        with st.expander("🚀 Generate New Ideas", expanded=True):
-            with st.form("quick_idea_generation_form"):
-                topic = st.text_input("What topic or theme are the ideas about?", placeholder="e.g., The future of AI in content marketing")
-                generation_type = st.radio("Choose idea type:", ["Single Ideas", "3-Part Series"], horizontal=True)
-                
-                num_ideas = 3
-                if generation_type == "Single Ideas":
-                    num_ideas = st.number_input("Number of ideas to generate:", min_value=1, max_value=10, value=3)
-
-                submitted = st.form_submit_button("🚀 Generate Ideas")
+            st.info("Start by generating ideas using the form above.")
 
-            if submitted and topic:
-                with st.spinner("Generating ideas..."):
-                    ideator_agent = agents.content_ideation_agent()
-                    
-                    if generation_type == "Single Ideas":
-                        task = tasks.single_post_ideas_task(
-                            ideator_agent, 
-                            user_context=session["context"].get("user_context", ""),
-                            target_role=session["context"].get("target_role", ""),
-                            target_audience=session["context"].get("target_audience", ""),
-                            positioning=session["context"].get("positioning", ""),
-                            topic=topic,
-                            num_ideas=num_ideas
-                        )
-                    else:
-                        task = tasks.short_series_ideas_task(
-                            ideator_agent,
-                            user_context=session["context"].get("user_context", ""),
-                            target_role=session["context"].get("target_role", ""),
-                            target_audience=session["context"].get("target_role", ""),
-                            positioning=session["context"].get("positioning", ""),
-                            topic=topic
-                        )
-                    crew = Crew(agents=[ideator_agent], tasks=[task], process=Process.sequential)
-                    ideas_text = crew.kickoff().raw
-                    
-                    new_ideas = parse_quick_ideas(ideas_text)
-                    session["quick_ideas"] = new_ideas
-                    st.success("Ideas generated!")
-                    st.rerun()
-
-        # --- MANAGE & REFINE IDEAS SECTION ---
-        with st.expander("🛠️ Manage & Refine Ideas"):
-            if session.get("quick_ideas"):
-                st.markdown("Use the checkboxes to select ideas for refinement or regeneration.")
-                
-                # Display ideas with checkboxes and actions
-                for i, idea in enumerate(session["quick_ideas"]):
-                    col1, col2, col3, col4, col5, col6 = st.columns([0.05, 0.55, 0.05, 0.10, 0.15, 0.10])
-                    
-                    with col1:
-                        idea["checked"] = st.checkbox("", value=idea["checked"], key=f"current_idea_check_{i}")
-                    
-                    with col2:
-                        st.markdown(f'"{idea["text"]}"')
-                    
-                    with col3: # Trash can
-                        if st.button("🗑️", key=f"current_idea_delete_{i}", use_container_width=True):
-                            session["quick_ideas"].pop(i)
-                            st.rerun()
-                    
-                    with col4: # Save button
-                        if st.button("💾 Save", key=f"current_idea_save_{i}", use_container_width=True):
-                            if "quick_ideas_history" not in session:
-                                session["quick_ideas_history"] = []
-                            session["quick_ideas_history"].append({
-                                "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                                "content": idea["text"]
-                            })
-                            st.success("Idea saved!")
-
-                    with col5: # More like this button
-                        if st.button("➕3 More like this", key=f"current_idea_more_{i}", use_container_width=True):
-                            with st.spinner("Generating more ideas..."):
-                                ideator_agent = agents.content_ideation_agent()
-                                similar_ideas_task = tasks.generate_similar_ideas_task(ideator_agent, "", "Quick Ideas", idea["text"])
-                                crew = Crew(agents=[ideator_agent], tasks=[similar_ideas_task], process=Process.sequential)
-                                similar_ideas_text = crew.kickoff().raw
-                                
-                                newly_generated_ideas = parse_quick_ideas(similar_ideas_text)
-                                session["quick_ideas"].extend(newly_generated_ideas)
-                                st.rerun()
-
-                    with col6: # Write button
-                        if st.button("✍️ Write", key=f"current_idea_write_{i}"):
-                            session["selected_idea"] = idea['text']
-                            session["conversation_state"] = "drafting_post"
-                            st.toast("Drafting post... go to the 'Final Post' tab to see it!", icon="✍️")
-                            st.session_state.qa_critique = ""
-                            st.rerun()
-                
-                st.markdown("---")
+    # --- SAVED IDEAS HISTORY SECTION ---
+    with st.expander("📜 Saved Ideas History"):
+        if "quick_ideas_history" not in session:
+            session["quick_ideas_history"] = []
+        
+        if session.get("quick_ideas_history"):
+            for i, saved_idea in enumerate(reversed(session["quick_ideas_history"])):
+                display_index = len(session['quick_ideas_history']) - i
+                st.markdown(f"**Saved Idea {display_index}** at `{saved_idea['timestamp']}`")
                 
-                # Overall Refinement Section
-                st.subheader("Overall Refinement")
-                st.markdown("Actions that apply across all ideas.")
-
-                overall_feedback = st.text_area("Provide feedback to refine all selected ideas or regenerate all unselected ideas.", key="quick_overall_feedback_area")
-                overall_cols = st.columns(2)
-
-                with overall_cols[0]:
-                    if st.button("Refine Selected Ideas", use_container_width=True, key="quick_refine_selected_btn"):
-                        selected_ideas_to_refine = [idea["text"] for idea in session["quick_ideas"] if idea["checked"]]
-                        if selected_ideas_to_refine and overall_feedback:
-                            with st.spinner("Refining selected ideas..."):
-                                ideator_agent = agents.content_ideation_agent()
-                                refine_task = tasks.refine_ideas_with_feedback_task(ideator_agent, "", overall_feedback, selected_ideas_to_refine)
-                                crew = Crew(agents=[ideator_agent], tasks=[refine_task], process=Process.sequential)
-                                refined_ideas_text = crew.kickoff().raw
-                                
-                                refined_ideas_list = parse_quick_ideas(refined_ideas_text)
-                                kept_ideas = [idea for idea in session["quick_ideas"] if not idea["checked"]]
-                                
-                                session["quick_ideas"] = kept_ideas + refined_ideas_list
-                                st.rerun()
-                        else:
-                            st.warning("Please select ideas and provide feedback to refine.")
-
-                with overall_cols[1]:
-                    if st.button("🔄 Generate New Ideas for Unselected", use_container_width=True, key="quick_regenerate_unselected_btn"):
-                        unselected_ideas_count = sum(1 for idea in session["quick_ideas"] if not idea["checked"])
-                        if unselected_ideas_count > 0:
-                            with st.spinner(f"Generating {unselected_ideas_count} new ideas..."):
-                                ideator_agent = agents.content_ideation_agent()
-                                # Assuming we saved the original topic, or using a generic placeholder
-                                original_topic = topic or "general professional insights"
-                                generate_task = tasks.single_post_ideas_task(
-                                    ideator_agent, 
-                                    user_context=session["context"].get("user_context", ""),
-                                    target_role=session["context"].get("target_role", ""),
-                                    target_audience=session["context"].get("target_audience", ""),
-                                    positioning=session["context"].get("positioning", ""),
-                                    topic=original_topic,
-                                    num_ideas=unselected_ideas_count
-                                )
-                                crew = Crew(agents=[ideator_agent], tasks=[generate_task], process=Process.sequential)
-                                new_ideas_text = crew.kickoff().raw
-                                newly_generated_ideas = parse_quick_ideas(new_ideas_text)
-
-                                kept_ideas = [idea for idea in session["quick_ideas"] if idea["checked"]]
-                                session["quick_ideas"] = kept_ideas + newly_generated_ideas
-                                st.rerun()
-                        else:
-                            st.warning("All ideas are selected. Please unselect ideas to regenerate.")
+                hist_col1, hist_col2, hist_col3 = st.columns([0.7, 0.15, 0.15])
+                with hist_col1:
+                    with st.expander("View Content"):
+                        st.markdown(f'"{saved_idea["content"]}"')
+                with hist_col2:
+                    if st.button("↩️ Reactivate", key=f"quick_history_restore_{i}", use_container_width=True):
+                        session["quick_ideas"].append({"text": saved_idea["content"], "checked": False})
+                        st.success("Idea reactivated!")
+                        rerun_sections("quick_ideas")
+                with hist_col3:
+                    if st.button("🗑️ Delete", key=f"quick_history_delete_{i}", use_container_width=True):
+                        del session["quick_ideas_history"][len(session["quick_ideas_history"]) - i - 1]
+                        st.success("Idea deleted!")
+                        rerun_sections("quick_ideas")
+        else:
+            st.info("No quick ideas have been saved yet.")
+
+
+# --- FINAL POST TAB ---
+@page_section("writer")
+def writer_section():
+    session = get_current_session()
+    st.subheader("Your Final Workspace ✨")
+    st.markdown("Review, refine, and save drafts of your content. Use the tools below to get AI-powered feedback and download a local copy of your work.")
+
+    # This single block now handles drafting AND critiquing
+    if session.get("conversation_state") == "drafting_post" and session.get("selected_idea"):
+        # Draft the post in the background; the QA check is queued as soon as the draft is ready
+        session_id = st.session_state.current_session_id
+        draft_jobs = job_queue.pending(session_id, DRAFT_JOB_KINDS)
+        if not any(job.meta.get("idea") == session["selected_idea"] for job in draft_jobs):
+            job_queue.discard(session_id, DRAFT_JOB_KINDS)
+            writer_agent = agents.linkedin_ghostwriter_agent()
+            writing_task_instance = tasks.writing_task(writer_agent, session["selected_idea"])
+            job_queue.submit(session_id, "draft", writer_agent, writing_task_instance, idea=session["selected_idea"])
+            st.toast("Drafting post... go to the 'Final Post' tab to see it!", icon="✍️")
+
+        st.subheader("Post Preview")
+        with st.container(border=True):
+            job_progress(session_id, DRAFT_JOB_KINDS, "The Ghostwriter is drafting your post...")
+
+    elif session.get("draft"):
+        # Post Preview and Actions
+        st.subheader("Post Preview")
+        st.markdown(f"""
+            <div style="border:1px solid #ddd; border-radius:8px; padding:20px; background-color:#fafafa; box-shadow: 0 4px 6px rgba(0, 0, 0, 0.1);">
+                {session['draft']}
+            </div>
+        """, unsafe_allow_html=True)
+        
+        copy_col, save_col, download_col = st.columns(3)
+        with copy_col:
+            if st.button("📋 Copy to Clipboard", use_container_width=True):
+                st.code(session["draft"], language="text")
+                st.toast("Post copied! Use CTRL+C to paste.")
+        with save_col:
+            if st.button("💾 Save Draft", use_container_width=True):
+                add_version(session["draft_history"], session["draft"])
+                st.success("Draft saved successfully!")
+        with download_col:
+            st.download_button("⬇️ Download as Text", 
+                                data=session["draft"], 
+                                file_name=f"linkedin_post_{datetime.now().strftime('%Y%m%d%H%M')}.txt",
+                                mime="text/plain",
+                                use_container_width=True)
+        
+        # Quality Check & Refinement Expander
+        with st.expander("🛠️ Quality Check & Refinement", expanded=True):
+            st.markdown("#### Agent Feedback")
+            if st.session_state.qa_critique:
+                st.markdown(f"""
+                    <div style="border:1px solid #ccc; border-radius:6px; padding:12px; background-color:#f9f9f9; font-style:italic;">
+                        {st.session_state.qa_critique}
+                    </div>
+                """, unsafe_allow_html=True)
             else:
-                st.info("Start by generating ideas using the form above.")
-
-        # --- SAVED IDEAS HISTORY SECTION ---
-        with st.expander("📜 Saved Ideas History"):
-            if "quick_ideas_history" not in session:
-                session["quick_ideas_history"] = []
+                # Show this message if the QA has been cleared or not run yet
+                st.info("The QA agent will provide feedback here after the draft is created or refined.")
+            
+            st.markdown("#### Refine with Your Own Feedback")
+            feedback = st.text_area("✏️ What would you like to change?", height=100)
             
-            if session.get("quick_ideas_history"):
-                for i, saved_idea in enumerate(reversed(session["quick_ideas_history"])):
-                    display_index = len(session['quick_ideas_history']) - i
-                    st.markdown(f"**Saved Idea {display_index}** at `{saved_idea['timestamp']}`")
+            if st.button("✨ Refine Draft", use_container_width=True):
+                if feedback:
+                    with st.spinner("Refining draft based on your feedback..."):
+                        writer_agent = agents.linkedin_ghostwriter_agent()
+                        refine_task = tasks.refine_writing_task(writer_agent, session["draft"], feedback)
+                        try:
+                            with st.container(border=True):
+                                new_draft = write_task_stream(writer_agent, refine_task)
+                            session["draft"] = new_draft
+
+                            # 🔄 Immediately run QA critique on the refined draft
+                            qa_agent = agents.quality_assurance_agent()
+                            qa_task = tasks.qa_critique_task(qa_agent, new_draft)
+                            critique = run_task(qa_agent, qa_task)
+                            st.session_state.qa_critique = critique
+
+                            st.success("Draft refined and re-critiqued!")
+                            rerun_sections("writer")
+                        except Exception as e:
+                            st.error(f"Failed to refine draft. Please try again. Error: {e}")
+                else:
+                    st.error("Please provide feedback before refining.")
+
+        # Saved Drafts History
+        with st.expander("📜 Saved Drafts History"):
+            if session.get("draft_history"):
+                for i, draft_entry in enumerate(reversed(session["draft_history"])):
+                    display_index = len(session['draft_history']) - i
+                    st.markdown(f"**Draft {display_index}** saved at `{draft_entry['timestamp']}`")
                     
                     hist_col1, hist_col2, hist_col3 = st.columns([0.7, 0.15, 0.15])
                     with hist_col1:
-                        with st.expander("View Content"):
-                            st.markdown(f'"{saved_idea["content"]}"')
+                        view = st.expander("View Content", key=f"view_draft_{display_index}", on_change="rerun")
+                        with view:
+                            if view.open:
+                                st.markdown(version_text(draft_entry))
                     with hist_col2:
-                        if st.button("↩️ Reactivate", key=f"quick_history_restore_{i}", use_container_width=True):
-                            session["quick_ideas"].append({"text": saved_idea["content"], "checked": False})
-                            st.success("Idea reactivated!")
-                            st.rerun()
+                        if st.button("↩️ Restore", key=f"restore_{i}", use_container_width=True):
+                            session["draft"] = version_text(draft_entry)
+                            st.session_state.qa_critique = ""
+                            st.success("Draft restored!")
+                            rerun_sections("writer")
                     with hist_col3:
-                        if st.button("🗑️ Delete", key=f"quick_history_delete_{i}", use_container_width=True):
-                            del session["quick_ideas_history"][len(session["quick_ideas_history"]) - i - 1]
-                            st.success("Idea deleted!")
-                            st.rerun()
+                        if st.button("🗑️ Delete", key=f"delete_draft_{i}", use_container_width=True):
+                            del session["draft_history"][len(session["draft_history"]) - i - 1]
+                            st.success("Draft deleted!")
+                            rerun_sections("writer")
             else:
-                st.info("No quick ideas have been saved yet.")
+                st.info("No drafts have been saved yet. Click the 'Save Draft' button to create a history.")
+    else:
+        st.info("💡 Select an idea from the 'Post Ideas' tab to start writing.")
+
+
+# --- MAIN CONTENT AREA ---
+session = get_current_session()
+
+if not session:
+    st.info("Start a new session from the sidebar to begin your branding journey.")
+else:
+    st.title("Create Your Personal Branding Strategy") 
+
+    strategy_tab, posts_tab, quick_ideas_tab, writer_tab = st.tabs(["📝 Brand Strategy", "💡 Post Ideas", "✨ Quick Ideas", "✍️ Final Post"])
+
+    with strategy_tab:
+        strategy_section()
+
+    with posts_tab:
+        posts_section()
+
+    with quick_ideas_tab:
+        quick_ideas_section()
 
     with writer_tab:
-        st.subheader("Your Final Workspace ✨")
-        st.markdown("Review, refine, and save drafts of your content. Use the tools below to get AI-powered feedback and download a local copy of your work.")
-
-        # This single block now handles drafting AND critiquing
-        if session.get("conversation_state") == "drafting_post" and session.get("selected_idea"):
-            with st.spinner("The Ghostwriter is drafting your post..."):
-                try:
-                    # 1. Draft the post
-                    writer_agent = agents.linkedin_ghostwriter_agent()
-                    writing_task_instance = tasks.writing_task(writer_agent, session["selected_idea"])
-                    writing_crew = Crew(agents=[writer_agent], tasks=[writing_task_instance], process=Process.sequential)
-                    draft = writing_crew.kickoff().raw
-                    session["draft"] = draft
-
-                    # 2. Immediately run the QA check on the new draft
-                    qa_agent = agents.quality_assurance_agent()
-                    qa_task = tasks.qa_critique_task(qa_agent, draft)
-                    qa_crew = Crew(agents=[qa_agent], tasks=[qa_task], process=Process.sequential)
-                    critique = qa_crew.kickoff().raw
-                    st.session_state.qa_critique = critique
-
-                    session["conversation_state"] = "post_drafted"
-                    st.rerun()
-                except Exception as e:
-                    st.error(f"An error occurred. Please try again. Error: {e}")
-                    session["conversation_state"] = "strategy_approved" # Revert state
-                    session["selected_idea"] = None # Clear selected idea
-                    st.session_state.qa_critique = ""
-                    st.rerun()
+        writer_section()
 
-        if session.get("draft"):
-            # Post Preview and Actions
-            st.subheader("Post Preview")
-            st.markdown(f"""
-                <div style="border:1px solid #ddd; border-radius:8px; padding:20px; background-color:#fafafa; box-shadow: 0 4px 6px rgba(0, 0, 0, 0.1);">
-                    {session['draft']}
-                </div>
-            """, unsafe_allow_html=True)
-            
-            copy_col, save_col, download_col = st.columns(3)
-            with copy_col:
-                if st.button("📋 Copy to Clipboard", use_container_width=True):
-                    st.code(session["draft"], language="text")
-                    st.toast("Post copied! Use CTRL+C to paste.")
-            with save_col:
-                if st.button("💾 Save Draft", use_container_width=True):
-                    session["draft_history"].append({
-                        "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                        "content": session["draft"]
-                    })
-                    st.success("Draft saved successfully!")
-            with download_col:
-                st.download_button("⬇️ Download as Text", 
-                                    data=session["draft"], 
-                                    file_name=f"linkedin_post_{datetime.now().strftime('%Y%m%d%H%M')}.txt",
-                                    mime="text/plain",
-                                    use_container_width=True)
-            
-            # Quality Check & Refinement Expander
-            with st.expander("🛠️ Quality Check & Refinement", expanded=True):
-                st.markdown("#### Agent Feedback")
-                if st.session_state.qa_critique:
-                    st.markdown(f"""
-                        <div style="border:1px solid #ccc; border-radius:6px; padding:12px; background-color:#f9f9f9; font-style:italic;">
-                            {st.session_state.qa_critique}
-                        </div>
-                    """, unsafe_allow_html=True)
-                else:
-                    # Show this message if the QA has been cleared or not run yet
-                    st.info("The QA agent will provide feedback here after the draft is created or refined.")
-                
-                st.markdown("#### Refine with Your Own Feedback")
-                feedback = st.text_area("✏️ What would you like to change?", height=100)
-                
-                if st.button("✨ Refine Draft", use_container_width=True):
-                    if feedback:
-                        with st.spinner("Refining draft based on your feedback..."):
-                            writer_agent = agents.linkedin_ghostwriter_agent()
-                            refine_task = tasks.refine_writing_task(writer_agent, session["draft"], feedback)
-                            refine_crew = Crew(agents=[writer_agent], tasks=[refine_task], process=Process.sequential)
-                            try:
-                                new_draft = refine_crew.kickoff().raw
-                                session["draft"] = new_draft
-
-                                # 🔄 Immediately run QA critique on the refined draft
-                                qa_agent = agents.quality_assurance_agent()
-                                qa_task = tasks.qa_critique_task(qa_agent, new_draft)
-                                qa_crew = Crew(agents=[qa_agent], tasks=[qa_task], process=Process.sequential)
-                                critique = qa_crew.kickoff().raw
-                                st.session_state.qa_critique = critique
-
-                                st.success("Draft refined and re-critiqued!")
-                                st.rerun()
-                            except Exception as e:
-                                st.error(f"Failed to refine draft. Please try again. Error: {e}")
-                    else:
-                        st.error("Please provide feedback before refining.")
-
-            # Saved Drafts History
-            with st.expander("📜 Saved Drafts History"):
-                if session.get("draft_history"):
-                    for i, draft_entry in enumerate(reversed(session["draft_history"])):
-                        display_index = len(session['draft_history']) - i
-                        st.markdown(f"**Draft {display_index}** saved at `{draft_entry['timestamp']}`")
-                        
-                        hist_col1, hist_col2, hist_col3 = st.columns([0.7, 0.15, 0.15])
-                        with hist_col1:
-                            with st.expander("View Content"):
-                                st.markdown(draft_entry['content'])
-                        with hist_col2:
-                            if st.button("↩️ Restore", key=f"restore_{i}", use_container_width=True):
-                                session["draft"] = draft_entry["content"]
-                                st.session_state.qa_critique = ""
-                                st.success("Draft restored!")
-                                st.rerun()
-                        with hist_col3:
-                            if st.button("🗑️ Delete", key=f"delete_draft_{i}", use_container_width=True):
-                                del session["draft_history"][len(session["draft_history"]) - i - 1]
-                                st.success("Draft deleted!")
-                                st.rerun()
-                else:
-                    st.info("No drafts have been saved yet. Click the 'Save Draft' button to create a history.")
-        else:
-            st.info("💡 Select an idea from the 'Post Ideas' tab to start writing.")
-           
\ No newline at end of file
+# Warm up crewai and the LLM clients in the background now that the page has rendered
+prewarm()
+persist_sessions()
+end_memory_accounting()
+metrics.record_render("page", time.perf_counter() - page_started, "page")
@@ -0,0 +1,112 @@
+import streamlit as st
+from datetime import datetime
+from idea_parsing import format_outcomes
+from jobs import SPECULATIVE, speculation_outcomes
+from metrics import metrics, percentile
+from pool import agent_pool
+from ratelimit import rate_limiter
+from runner import kickoff_cache
+from session_memory import session_memory
+
+# --- PAGE CONFIGURATION ---
+st.set_page_config(page_title="Ascent AI - Metrics", page_icon="📊", layout="wide")
+
+st.title("📊 Performance Metrics")
+st.markdown("Latency, token usage and estimated cost of every agent task run by this server process.")
+
+if st.button("🔄 Refresh"):
+    st.rerun()
+
+records = metrics.records()
+cache_stats = kickoff_cache.stats()
+
+# --- OVERVIEW ---
+timed = [r["wall_seconds"] for r in records if r["outcome"] not in ("cache_hit", "cancelled")]
+col1, col2, col3, col4 = st.columns(4)
+col1.metric("Task Runs", len(records))
+col2.metric("Cache Hit Rate", f"{cache_stats['hit_rate']:.0%}", help=f"{cache_stats['hits']} hits, {cache_stats['misses']} misses")
+col3.metric("p95 Latency", f"{percentile(timed, 95):.2f}s" if timed else "–")
+col4.metric("Estimated Cost", f"${sum(r['cost_usd'] for r in records):.4f}")
+
+if records:
+    st.subheader("By Task Type")
+    st.dataframe(metrics.summary("task"), use_container_width=True, hide_index=True)
+
+    st.subheader("By Provider")
+    st.dataframe(metrics.summary("provider"), use_container_width=True, hide_index=True)
+
+    with st.expander("🕒 Recent Runs"):
+        recent = [
+            {**r, "timestamp": datetime.fromtimestamp(r["timestamp"]).strftime("%Y-%m-%d %H:%M:%S")}
+            for r in reversed(records[-100:])
+        ]
+        st.dataframe(recent, use_container_width=True, hide_index=True)
+else:
+    st.info("No agent tasks have run in this process yet. Metrics will appear here once the app generates something.")
+
+# --- RATE LIMITS ---
+st.subheader("Rate Limits")
+st.caption("Requests and tokens per minute allowed for each model, how many calls are queued for budget right now, and how long admitted calls waited.")
+st.dataframe(
+    [{"model": model, **stats} for model, stats in rate_limiter.stats().items()],
+    use_container_width=True,
+    hide_index=True,
+)
+
+# --- IDEA OUTPUT PARSING ---
+st.subheader("Idea Output Parsing")
+st.caption("How idea outputs were read: valid JSON, JSON repaired locally, the plain THEME:/- layout, or unreadable. Re-asked counts the outputs sent back to the model to be fixed.")
+outcome_cols = st.columns(5)
+for col, outcome in zip(outcome_cols, ("json", "json_repaired", "layout", "unparseable", "reasked")):
+    col.metric(outcome.replace("_", " ").title(), format_outcomes[outcome])
+
+# --- SPECULATION ---
+st.subheader("Speculation")
+st.caption("The detailed strategy and the post ideas start while the user is still reviewing the outline or strategy. Used counts the ones that were approved, whether they had finished or were still running. Cancelled counts the ones dropped because the user gave feedback instead.")
+if not SPECULATIVE:
+    st.info("Speculation is turned off (ASCENT_SPECULATIVE=0).")
+speculation_cols = st.columns(4)
+for col, outcome in zip(speculation_cols, ("started", "used_finished", "used_running", "cancelled")):
+    col.metric(outcome.replace("_", " ").title(), speculation_outcomes[outcome])
+
+# --- PAGE RERUNS ---
+st.subheader("Page Reruns")
+st.caption("Script time of the app page. \"page\" rows are full page runs (and each section's share of them); \"fragment\" rows are runs of just the sidebar or one tab, which is all most interactions rerun.")
+render_summary = metrics.render_summary()
+if render_summary:
+    st.dataframe(render_summary, use_container_width=True, hide_index=True)
+else:
+    st.info("The app page hasn't run in this process yet.")
+
+# --- SESSION MEMORY ---
+st.subheader("Session Memory")
+st.caption("Sessions browser tabs hold in memory. Sessions of tabs left idle, or over their user's memory budget, are released and reloaded from disk when opened again.")
+memory_stats = session_memory.stats()
+memory_cols = st.columns(4)
+memory_cols[0].metric("Open Tabs", memory_stats["tabs"], help=f"{memory_stats['owners']} users")
+memory_cols[1].metric("Sessions In Memory", memory_stats["sessions"])
+memory_cols[2].metric("Session Memory", f"{memory_stats['bytes'] / 1024 / 1024:.1f} MB")
+memory_cols[3].metric(
+    "Released",
+    memory_stats["released_over_budget"] + memory_stats["released_idle"],
+    help=f"{memory_stats['released_idle']} idle, {memory_stats['released_over_budget']} over budget, {memory_stats['released_bytes'] / 1024 / 1024:.1f} MB",
+)
+if memory_stats["largest"]:
+    st.dataframe(memory_stats["largest"], use_container_width=True, hide_index=True)
+
+# --- CACHE & POOL ---
+cache_col, pool_col = st.columns(2)
+with cache_col:
+    st.subheader("Kickoff Cache")
+    st.json(cache_stats)
+with pool_col:
+    st.subheader("Agent Pool")
+    st.json(agent_pool.stats())
+
+# --- EXPORTS ---
+st.subheader("Export")
+export_col1, export_col2 = st.columns(2)
+with export_col1:
+    st.download_button("⬇️ Prometheus Text", data=metrics.to_prometheus(), file_name="ascent_metrics.prom", mime="text/plain", use_container_width=True)
+with export_col2:
+    st.download_button("⬇️ JSONL", data=metrics.to_jsonl(), file_name=f"ascent_metrics_{datetime.now().strftime('%Y%m%d%H%M')}.jsonl", mime="application/json", use_container_width=True)
@@ -0,0 +1,113 @@
+import hashlib
+import io
+import multiprocessing
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+import config  # noqa: F401
+
+MAX_UPLOAD_BYTES = int(os.getenv("ASCENT_MAX_UPLOAD_BYTES", 25 * 1024 * 1024))
+MAX_PDF_PAGES = int(os.getenv("ASCENT_MAX_PDF_PAGES", 1000))
+# Below this many pages the process pool costs more than it saves
+PARALLEL_PAGE_THRESHOLD = int(os.getenv("ASCENT_PARALLEL_PAGE_THRESHOLD", 24))
+MAX_WORKERS = int(os.getenv("ASCENT_PDF_WORKERS", min(8, os.cpu_count() or 1)))
+CACHE_MAX_ENTRIES = 128
+
+_executor = None
+_executor_lock = threading.Lock()
+_text_cache = OrderedDict()
+_text_cache_lock = threading.Lock()
+# In a worker process: the (path, PdfReader) of the document it is extracting, parsed once per document
+_worker_reader = None
+
+
+class UploadTooLargeError(ValueError):
+    """Raised when an upload exceeds the byte or page limits."""
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            # spawn rather than fork: the Streamlit server is multi-threaded
+            _executor = ProcessPoolExecutor(max_workers=MAX_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+        return _executor
+
+
+def _extract_page_range(path, start, stop):
+    """Extracts the text of pages [start, stop) from the PDF at `path`. Runs in a worker process.
+
+    The worker parses each document once and reuses it for every range it is given.
+    """
+    global _worker_reader
+    if _worker_reader is None or _worker_reader[0] != path:
+        from pypdf import PdfReader
+
+        _worker_reader = None  # Let the previous document go before reading the next
+        _worker_reader = (path, PdfReader(path))
+    reader = _worker_reader[1]
+    return [reader.pages[i].extract_text() for i in range(start, stop)]
+
+
+def extract_pdf_text(data, max_pages=MAX_PDF_PAGES, parallel_threshold=PARALLEL_PAGE_THRESHOLD):
+    """Returns the text of every page of a PDF, each followed by a blank line.
+
+    Small documents are read page by page in-process. Larger ones are written to a
+    temporary file once and split into page ranges that are extracted across a process
+    pool, so workers receive only the file's path and a range, not the document itself,
+    and the text is joined once at the end.
+    """
+    from pypdf import PdfReader
+
+    reader = PdfReader(io.BytesIO(data))
+    num_pages = len(reader.pages)
+    if num_pages > max_pages:
+        raise UploadTooLargeError(f"PDF has {num_pages} pages; the limit is {max_pages}.")
+
+    if num_pages < parallel_threshold or MAX_WORKERS < 2:
+        return "".join(f"{page.extract_text()}\n\n" for page in reader.pages)
+
+    chunk_size = -(-num_pages // (MAX_WORKERS * 2))
+    ranges = [(start, min(start + chunk_size, num_pages)) for start in range(0, num_pages, chunk_size)]
+    with tempfile.NamedTemporaryFile(suffix=".pdf", delete=False) as f:
+        f.write(data)
+    try:
+        executor = _get_executor()
+        futures = [executor.submit(_extract_page_range, f.name, start, stop) for start, stop in ranges]
+        return "".join(f"{text}\n\n" for future in futures for text in future.result())
+    finally:
+        os.remove(f.name)
+
+
+def extract_file_text(file, max_bytes=MAX_UPLOAD_BYTES):
+    """Returns the text of an upload-like file (with .size, .type and .getbuffer()); raises if it can't be read."""
+    # Fail fast on oversized uploads before reading them
+    if getattr(file, "size", 0) > max_bytes:
+        raise UploadTooLargeError(f"File is larger than the {max_bytes / (1024 * 1024):.0f} MB limit.")
+    # getbuffer() exposes the upload without copying it
+    return extract_text(file.getbuffer(), file.type, max_bytes)
+
+
+def extract_text(data, mime_type, max_bytes=MAX_UPLOAD_BYTES):
+    """Returns the text of an uploaded PDF, TXT or MD file, memoized by content hash."""
+    if len(data) > max_bytes:
+        raise UploadTooLargeError(f"File is {len(data) / (1024 * 1024):.1f} MB; the limit is {max_bytes / (1024 * 1024):.0f} MB.")
+
+    key = (mime_type == "application/pdf", hashlib.sha256(data).hexdigest())
+    with _text_cache_lock:
+        if key in _text_cache:
+            _text_cache.move_to_end(key)
+            return _text_cache[key]
+
+    if mime_type == "application/pdf":
+        text = extract_pdf_text(bytes(data))
+    else:  # Assumes .txt, .md, etc.
+        text = bytes(data).decode("utf-8") + "\n\n"
+
+    with _text_cache_lock:
+        _text_cache[key] = text
+        while len(_text_cache) > CACHE_MAX_ENTRIES:
+            _text_cache.popitem(last=False)
+    return text
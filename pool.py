@@ -0,0 +1,116 @@
+import threading
+import time
+from collections import defaultdict
+from agents import BrandingAgents, rebind_agent
+from tasks import BrandingTasks
+
+# Idle agents kept per agent type; extra agents returned to a full pool are dropped
+MAX_IDLE_PER_AGENT = 8
+
+
+class AgentPool:
+    """A thread-safe, process-wide pool of BrandingAgents agents.
+
+    Agents are expensive to construct, so each one is built once and then leased out
+    to a single crew run at a time. The LLM clients they wrap (and the provider HTTP
+    connections behind them) are module-level in agents.py and are shared by every agent.
+    The pool also records how long agent construction and each model's first call take.
+    """
+
+    def __init__(self, factory=None):
+        self._factory = factory or BrandingAgents()
+        self._idle = defaultdict(list)
+        self._leased = {}
+        self._lock = threading.Lock()
+        self._construction = defaultdict(list)
+        self._calls = {}
+
+    def acquire(self, name):
+        """Leases an agent built by the BrandingAgents method of the given name."""
+        return self._acquire(name, getattr(self._factory, name))
+
+    def acquire_rebound(self, agent, llm, model):
+        """Leases an agent with the same persona as the given one that runs on another model."""
+        return self._acquire(f"{agent.role} @ {model}", lambda: rebind_agent(agent, llm))
+
+    def _acquire(self, name, build):
+        with self._lock:
+            agent = self._idle[name].pop() if self._idle[name] else None
+        if agent is None:
+            start = time.perf_counter()
+            agent = build()
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                self._construction[name].append(elapsed)
+        with self._lock:
+            self._leased[id(agent)] = (name, agent)
+        return agent
+
+    def release(self, agent):
+        """Returns a leased agent to the pool. Agents that were not leased from the pool are ignored."""
+        with self._lock:
+            lease = self._leased.pop(id(agent), None)
+            if lease is None:
+                return
+            name, _ = lease
+            if len(self._idle[name]) < MAX_IDLE_PER_AGENT:
+                self._idle[name].append(agent)
+
+    def discard(self, agent):
+        """Forgets a leased agent without returning it to the pool.
+
+        For agents whose crew was abandoned: crewai may still be running it, and an agent's
+        executor can't run two crews at once, so it must never be leased again.
+        """
+        with self._lock:
+            self._leased.pop(id(agent), None)
+
+    def record_call(self, model, seconds):
+        """Records the latency of an LLM call so first-call overhead can be compared with later calls."""
+        with self._lock:
+            if model not in self._calls:
+                self._calls[model] = {"first_call_seconds": seconds, "calls": 0, "total_seconds": 0.0}
+            stats = self._calls[model]
+            stats["calls"] += 1
+            stats["total_seconds"] += seconds
+
+    def stats(self):
+        """Returns construction and call timings along with the current pool occupancy."""
+        with self._lock:
+            return {
+                "construction": {
+                    name: {"built": len(times), "avg_seconds": sum(times) / len(times), "max_seconds": max(times)}
+                    for name, times in self._construction.items() if times
+                },
+                "calls": {
+                    model: {
+                        "calls": stats["calls"],
+                        "first_call_seconds": stats["first_call_seconds"],
+                        "avg_seconds": stats["total_seconds"] / stats["calls"],
+                    }
+                    for model, stats in self._calls.items()
+                },
+                "idle": {name: len(agents) for name, agents in self._idle.items()},
+                "leased": len(self._leased),
+            }
+
+
+class PooledBrandingAgents:
+    """Drop-in replacement for BrandingAgents whose methods lease agents from a pool.
+
+    Leased agents are handed back by run_task/stream_task once their crew run finishes.
+    """
+
+    def __init__(self, pool):
+        self._pool = pool
+
+    def __getattr__(self, name):
+        if name.startswith("_") or not callable(getattr(BrandingAgents, name, None)):
+            raise AttributeError(name)
+        return lambda: self._pool.acquire(name)
+
+
+# Shared by every session served from this process
+agent_pool = AgentPool()
+pooled_agents = PooledBrandingAgents(agent_pool)
+branding_tasks = BrandingTasks()
@@ -0,0 +1,35 @@
+import os
+import threading
+import config  # noqa: F401
+
+_prewarm_started = False
+_prewarm_lock = threading.Lock()
+
+
+def prewarm():
+    """Imports the heavy dependencies and builds the LLM clients on a background thread.
+
+    Call it once a page has rendered so the first agent call doesn't pay the import cost.
+    It only ever starts once per process and can be disabled with ASCENT_PREWARM=0. This
+    module imports nothing of the app itself, so pages that don't run agents (like Home.py)
+    can call it without loading runner and its caches on their own thread.
+    """
+    global _prewarm_started
+    if os.getenv("ASCENT_PREWARM", "1") == "0":
+        return
+    with _prewarm_lock:
+        if _prewarm_started:
+            return
+        _prewarm_started = True
+    threading.Thread(target=_prewarm, name="ascent-prewarm", daemon=True).start()
+
+
+def _prewarm():
+    from crewai import Crew  # noqa: F401
+    from crewai.types.streaming import StreamChunkType  # noqa: F401
+    from pypdf import PdfReader  # noqa: F401
+    import runner  # noqa: F401
+    from agents import get_gemini_llm, get_groq_llm
+
+    get_gemini_llm()
+    get_groq_llm()
@@ -0,0 +1,193 @@
+import os
+import sqlite3
+import threading
+import time
+from collections import defaultdict, deque
+import config  # noqa: F401
+from agents import GEMINI_MODEL, GROQ_MODEL
+from metrics import percentile
+
+# (requests per minute, tokens per minute) per model; 0 disables that budget. The defaults
+# are the providers' free-tier limits.
+RATE_LIMITS = {
+    GEMINI_MODEL: (int(os.getenv("GEMINI_RPM", 15)), int(os.getenv("GEMINI_TPM", 250_000))),
+    GROQ_MODEL: (int(os.getenv("GROQ_RPM", 30)), int(os.getenv("GROQ_TPM", 6_000))),
+}
+# Set to a SQLite file to share the budgets between processes (e.g. several app servers)
+SHARED_PATH = os.getenv("ASCENT_RATE_LIMIT_PATH")
+# Share of a budget that may go out at once. Within any one window a bucket can let through
+# its capacity plus a window's worth of refill, so capacity and refill together add up to
+# the budget and even a burst stays within the provider's own limit.
+BURST_FRACTION = float(os.getenv("ASCENT_RATE_LIMIT_BURST", 0.1))
+MAX_RECENT_WAITS = 1000
+
+
+def _capacity(limit):
+    return max(1.0, limit * BURST_FRACTION)
+
+
+def _take(state, rpm, tpm, tokens, window, now):
+    """Takes one request and `tokens` tokens from a model's buckets once both can cover them.
+
+    `state` is (requests_level, tokens_level, updated), or None for full buckets. Returns
+    the new state and how long to wait before retrying (0 if the budget was taken).
+    """
+    request_capacity, request_rate = _capacity(rpm), rpm * (1 - BURST_FRACTION) / window
+    token_capacity, token_rate = _capacity(tpm), tpm * (1 - BURST_FRACTION) / window
+    if state is None:
+        state = (request_capacity, token_capacity, now)
+    requests_level, tokens_level, updated = state
+    requests_level = min(request_capacity, requests_level + (now - updated) * request_rate)
+    tokens_level = min(token_capacity, tokens_level + (now - updated) * token_rate)
+
+    wait = 0.0
+    if rpm and requests_level < 1:
+        wait = max(wait, (1 - requests_level) / request_rate)
+    # A request larger than the bucket goes out once the bucket is full and leaves it in debt
+    needed = min(tokens, token_capacity)
+    if tpm and tokens_level < needed:
+        wait = max(wait, (needed - tokens_level) / token_rate)
+    if wait == 0:
+        requests_level -= 1
+        tokens_level -= tokens
+    return (requests_level, tokens_level, now), wait
+
+
+def _charge(state, tpm, tokens):
+    """Charges extra tokens to (or refunds them from) a model's token bucket."""
+    requests_level, tokens_level, updated = state
+    return requests_level, min(_capacity(tpm), max(-tpm, tokens_level - tokens)), updated
+
+
+class _LocalBuckets:
+    """Token buckets held in this process."""
+
+    def __init__(self):
+        self._state = {}
+
+    def take(self, model, rpm, tpm, tokens, window):
+        now = time.time()
+        self._state[model], wait = _take(self._state.get(model), rpm, tpm, tokens, window, now)
+        return wait
+
+    def adjust(self, model, rpm, tpm, tokens):
+        if model in self._state:
+            self._state[model] = _charge(self._state[model], tpm, tokens)
+
+
+class _SharedBuckets:
+    """Token buckets kept in a SQLite file so that several processes draw from the same budget."""
+
+    def __init__(self, path):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30, isolation_level=None)
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS buckets (
+                model TEXT PRIMARY KEY,
+                requests_level REAL NOT NULL,
+                tokens_level REAL NOT NULL,
+                updated REAL NOT NULL
+            )"""
+        )
+
+    def _update(self, model, change):
+        # BEGIN IMMEDIATE serializes the read-modify-write across processes
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            now = time.time()
+            row = self._conn.execute(
+                "SELECT requests_level, tokens_level, updated FROM buckets WHERE model = ?", (model,)
+            ).fetchone()
+            state, result = change(row, now)
+            if state is not None:
+                self._conn.execute("INSERT OR REPLACE INTO buckets VALUES (?, ?, ?, ?)", (model, *state))
+            self._conn.execute("COMMIT")
+            return result
+        except Exception:
+            self._conn.execute("ROLLBACK")
+            raise
+
+    def take(self, model, rpm, tpm, tokens, window):
+        return self._update(model, lambda state, now: _take(state, rpm, tpm, tokens, window, now))
+
+    def adjust(self, model, rpm, tpm, tokens):
+        self._update(model, lambda state, now: (_charge(state, tpm, tokens) if state else None, None))
+
+
+class RateLimiter:
+    """Enforces per-model requests-per-minute and tokens-per-minute budgets.
+
+    Callers reserve an estimated number of tokens before an LLM call and settle the
+    difference with the actual usage afterwards. Callers for the same model are admitted
+    strictly in arrival order, so a burst of sessions is smoothed into a steady stream of
+    calls instead of a wave of 429s and retries. Budgets are per process unless a shared
+    SQLite path is given. `window_seconds` only needs changing to simulate a faster clock.
+    """
+
+    def __init__(self, limits=None, path=SHARED_PATH, window_seconds=60):
+        self.limits = RATE_LIMITS if limits is None else limits
+        self.window_seconds = window_seconds
+        self._buckets = _SharedBuckets(path) if path else _LocalBuckets()
+        self._cond = threading.Condition()
+        self._queues = defaultdict(deque)
+        self._admitted = defaultdict(int)
+        self._wait_total = defaultdict(float)
+        self._waits = defaultdict(lambda: deque(maxlen=MAX_RECENT_WAITS))
+
+    def acquire(self, model, tokens):
+        """Blocks until the model's budget covers one request of `tokens` tokens. Returns the time waited."""
+        rpm, tpm = self.limits.get(model, (0, 0))
+        if not rpm and not tpm:
+            return 0.0
+        start = time.perf_counter()
+        ticket = object()
+        with self._cond:
+            queue = self._queues[model]
+            queue.append(ticket)
+            try:
+                while True:
+                    if queue[0] is ticket:
+                        wait = self._buckets.take(model, rpm, tpm, tokens, self.window_seconds)
+                        if wait == 0:
+                            break
+                        self._cond.wait(wait)
+                    else:
+                        self._cond.wait()
+            finally:
+                queue.remove(ticket)
+                self._cond.notify_all()
+            waited = time.perf_counter() - start
+            self._admitted[model] += 1
+            self._wait_total[model] += waited
+            self._waits[model].append(waited)
+        return waited
+
+    def settle(self, model, reserved, used):
+        """Charges (or refunds) the difference between the reserved and the actual token usage."""
+        rpm, tpm = self.limits.get(model, (0, 0))
+        if tpm and used != reserved:
+            with self._cond:
+                self._buckets.adjust(model, rpm, tpm, used - reserved)
+                self._cond.notify_all()
+
+    def stats(self):
+        """Returns the budgets, queue depth and wait times per model."""
+        with self._cond:
+            return {
+                model: {
+                    "rpm": rpm,
+                    "tpm": tpm,
+                    "queue_depth": len(self._queues[model]),
+                    "admitted": self._admitted[model],
+                    "avg_wait_seconds": self._wait_total[model] / self._admitted[model] if self._admitted[model] else 0.0,
+                    "p95_wait_seconds": percentile(list(self._waits[model]), 95) or 0.0,
+                    "max_wait_seconds": max(self._waits[model], default=0.0),
+                }
+                for model, (rpm, tpm) in self.limits.items()
+            }
+
+
+# Shared by every session served from this process
+rate_limiter = RateLimiter()
@@ -0,0 +1,375 @@
+import os
+import threading
+import time
+from contextlib import contextmanager
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+import config  # noqa: F401
+from cache import KickoffCache
+from idea_parsing import IdeaFormatError, format_outcomes, parse_ideas_output, parse_quick_ideas_output
+from metrics import metrics, percentile
+from pool import agent_pool, branding_tasks
+from ratelimit import rate_limiter
+
+# Shared by every session served from this process
+kickoff_cache = KickoffCache()
+
+# Maximum number of in-flight LLM calls per provider across all sessions and worker threads
+PROVIDER_CONCURRENCY = {
+    "gemini": int(os.getenv("GEMINI_MAX_CONCURRENCY", 4)),
+    "groq": int(os.getenv("GROQ_MAX_CONCURRENCY", 4)),
+}
+# The same for any other provider, e.g. an OpenAI-compatible endpoint set with ASCENT_LLM_BASE_URL
+DEFAULT_PROVIDER_CONCURRENCY = int(os.getenv("ASCENT_DEFAULT_MAX_CONCURRENCY", 4))
+# Rough token accounting used to reserve rate limit budget before a call: crewai's prompt
+# scaffolding around the agent and task text, and the completion length to expect
+PROMPT_OVERHEAD_TOKENS = 400
+EXPECTED_COMPLETION_TOKENS = 1000
+
+# Interactive tasks that are also sent to the other provider when the first one is slow
+HEDGED_TASKS = tuple(name for name in os.getenv("ASCENT_HEDGED_TASKS", "refine_writing_task,qa_critique_task").split(",") if name)
+# The duplicate request goes out once the primary has been running longer than this
+# percentile of its recent successful calls for the same task
+HEDGE_PERCENTILE = float(os.getenv("ASCENT_HEDGE_PERCENTILE", 90))
+# Used until a task/model pair has HEDGE_MIN_SAMPLES successful calls on record
+HEDGE_DEFAULT_DELAY = float(os.getenv("ASCENT_HEDGE_DEFAULT_DELAY", 8))
+HEDGE_MIN_SAMPLES = 20
+# Streamed text held back while waiting for the agent's 'Final Answer:' before it is shown as is
+FINAL_ANSWER_BUFFER_CHARS = 2000
+
+_provider_semaphores = {}
+_provider_semaphores_lock = threading.Lock()
+_hedge_executor = ThreadPoolExecutor(max_workers=int(os.getenv("ASCENT_HEDGE_MAX_WORKERS", 16)), thread_name_prefix="ascent-hedge")
+
+
+def model_id(llm):
+    """Returns the provider-qualified model string (e.g. 'groq/llama-3.1-8b-instant') for an LLM."""
+    model = llm.model if hasattr(llm, "model") else str(llm)
+    provider = getattr(llm, "provider", None)
+    if provider and not model.startswith(f"{provider}/"):
+        return f"{provider}/{model}"
+    return model
+
+
+def provider_of(llm):
+    return model_id(llm).split("/", 1)[0]
+
+
+def provider_semaphore(provider):
+    """Returns the process-wide semaphore bounding concurrent calls to a provider."""
+    with _provider_semaphores_lock:
+        if provider not in _provider_semaphores:
+            limit = PROVIDER_CONCURRENCY.get(provider, DEFAULT_PROVIDER_CONCURRENCY)
+            _provider_semaphores[provider] = threading.BoundedSemaphore(limit)
+        return _provider_semaphores[provider]
+
+
+def estimate_tokens(agent, task):
+    """Estimates the total tokens of a call at roughly four characters per token."""
+    text = "".join(str(part or "") for part in (agent.role, agent.goal, agent.backstory, task.description, task.expected_output))
+    return len(text) // 4 + PROMPT_OVERHEAD_TOKENS + EXPECTED_COMPLETION_TOKENS
+
+
+class _Slot:
+    def __init__(self, reserved):
+        self.reserved = reserved
+        self.output = None
+
+
+@contextmanager
+def provider_slot(agent, task):
+    """Waits for the model's rate limit budget and then for a provider concurrency slot.
+
+    Set .output on the yielded slot to the crew output so the reserved token budget can be
+    settled against the actual usage.
+    """
+    model = model_id(agent.llm)
+    slot = _Slot(estimate_tokens(agent, task))
+    rate_limiter.acquire(model, slot.reserved)
+    try:
+        with provider_semaphore(provider_of(agent.llm)):
+            yield slot
+    finally:
+        usage = getattr(slot.output, "token_usage", None)
+        used = getattr(usage, "total_tokens", 0) or 0
+        # Failed or cancelled calls keep their reservation, since the provider may have counted them
+        rate_limiter.settle(model, slot.reserved, used or slot.reserved)
+
+
+def _cache_key(agent, task):
+    return KickoffCache.make_key(agent.role, model_id(agent.llm), task.description, task.expected_output)
+
+
+def _record_metrics(agent, task, model, start, output=None, first_token_at=None, outcome="ok"):
+    usage = getattr(output, "token_usage", None)
+    metrics.record(
+        task=task.name or "unnamed_task",
+        role=agent.role,
+        model=model,
+        wall_seconds=time.perf_counter() - start,
+        ttft_seconds=None if first_token_at is None else first_token_at - start,
+        prompt_tokens=getattr(usage, "prompt_tokens", 0) or 0,
+        completion_tokens=getattr(usage, "completion_tokens", 0) or 0,
+        retries=getattr(task, "retry_count", 0) or 0,
+        outcome=outcome,
+    )
+
+
+def run_task(agent, task, use_cache=True):
+    """Runs a single-agent crew for the task and returns the raw output.
+
+    Results are cached by agent role, model and the rendered task prompt. Pass
+    use_cache=False for "regenerate" actions; the fresh result still replaces the cached one.
+    Agents leased from the agent pool are returned to it once the run finishes, and every
+    run is recorded in the metrics registry. Tasks listed in HEDGED_TASKS go through run_hedged.
+    """
+    model = model_id(agent.llm)
+    start = time.perf_counter()
+    # run_hedged takes over releasing the agent and recording its runs
+    owns_agent = True
+    try:
+        key = _cache_key(agent, task)
+        if use_cache:
+            cached = kickoff_cache.get(key)
+            if cached is not None:
+                _record_metrics(agent, task, model, start, outcome="cache_hit")
+                return cached
+        else:
+            kickoff_cache.record_bypass()
+
+        if task.name in HEDGED_TASKS:
+            owns_agent = False
+            winner, output = run_hedged(agent, task)
+            # The answer may have come from the other provider; cache it under the model that wrote it
+            key = _cache_key(winner, task)
+        else:
+            from crewai import Crew, Process
+
+            with provider_slot(agent, task) as slot:
+                call_start = time.perf_counter()
+                crew = Crew(agents=[agent], tasks=[task], process=Process.sequential)
+                output = slot.output = crew.kickoff()
+                agent_pool.record_call(model, time.perf_counter() - call_start)
+            _record_metrics(agent, task, model, start, output=output)
+        kickoff_cache.set(key, output.raw)
+        return output.raw
+    except Exception:
+        if owns_agent:
+            _record_metrics(agent, task, model, start, outcome="error")
+        raise
+    finally:
+        if owns_agent:
+            agent_pool.release(agent)
+
+
+def run_ideas_task(agent, task, use_cache=True, quick=False):
+    """Runs an idea task and returns its ideas: a {theme: ideas} dict, or a list if quick.
+
+    Output that is not valid JSON is repaired locally first (see idea_parsing). Only when
+    that fails is the model asked, once, to fix its own output, which is a much smaller
+    prompt than regenerating the ideas.
+    """
+    return parse_or_repair_ideas(run_task(agent, task, use_cache=use_cache), use_cache=use_cache, quick=quick)
+
+
+def parse_or_repair_ideas(output, use_cache=True, quick=False):
+    """Parses an idea task's output, asking the model to fix it once if it can't be parsed."""
+    parse = parse_quick_ideas_output if quick else parse_ideas_output
+    try:
+        return parse(output)
+    except IdeaFormatError as e:
+        format_outcomes["reasked"] += 1
+        fixer = agent_pool.acquire("content_ideation_agent")
+        fixed = run_task(fixer, branding_tasks.fix_ideas_output_task(fixer, output, e, quick=quick), use_cache=use_cache)
+        return parse(fixed)
+
+
+def hedge_delay(task_name, model):
+    """Returns how long to wait for a model before hedging, from its recent latency percentile."""
+    latencies = metrics.latencies(task_name, model)
+    if len(latencies) < HEDGE_MIN_SAMPLES:
+        return HEDGE_DEFAULT_DELAY
+    return percentile(latencies, HEDGE_PERCENTILE)
+
+
+def _run_attempt(agent, task, cancelled):
+    """Streams one attempt of a hedged task and returns (agent, crew output).
+
+    The attempt is abandoned between chunks (and its stream closed) once `cancelled` is
+    set, in which case it returns None. When the attempt ends, the agent is released, or
+    discarded if its crew was abandoned while crewai may still be running it.
+    """
+    model = model_id(agent.llm)
+    start = time.perf_counter()
+    first_token_at = None
+    abandoned = False
+    try:
+        from crewai import Crew, Process
+
+        with provider_slot(agent, task) as slot:
+            if cancelled.is_set():
+                return None
+            call_start = time.perf_counter()
+            crew = Crew(agents=[agent], tasks=[task], process=Process.sequential, stream=True)
+            streaming = crew.kickoff()
+            for _ in streaming:
+                if cancelled.is_set():
+                    abandoned = True
+                    streaming.close()
+                    _record_metrics(agent, task, model, start, first_token_at=first_token_at, outcome="cancelled")
+                    return None
+                if first_token_at is None:
+                    first_token_at = time.perf_counter()
+            output = slot.output = streaming.result
+            agent_pool.record_call(model, time.perf_counter() - call_start)
+        _record_metrics(agent, task, model, start, output=output, first_token_at=first_token_at)
+        return agent, output
+    except Exception:
+        _record_metrics(agent, task, model, start, first_token_at=first_token_at, outcome="error")
+        raise
+    finally:
+        if abandoned:
+            agent_pool.discard(agent)
+        else:
+            agent_pool.release(agent)
+
+
+def _run_hedge_attempt(agent, task, cancelled):
+    """Sends the same task to the other provider through an agent with the same persona."""
+    from crewai import Task
+    from agents import fallback_llm
+
+    llm = fallback_llm(provider_of(agent.llm))
+    hedge_agent = agent_pool.acquire_rebound(agent, llm, model_id(llm))
+    hedge_task = Task(name=task.name, description=task.description, expected_output=task.expected_output, agent=hedge_agent)
+    return _run_attempt(hedge_agent, hedge_task, cancelled)
+
+
+def run_hedged(agent, task):
+    """Runs a task on its agent's model and, if that is slow, on the other provider too.
+
+    Once the first attempt has been running for longer than hedge_delay(), or as soon as
+    it fails, the same task is sent to the other provider through an agent with the same
+    persona. The first attempt to finish successfully wins and the other is cancelled.
+    Returns the winning attempt's agent and crew output.
+    """
+    cancelled = threading.Event()
+    attempts = [_hedge_executor.submit(_run_attempt, agent, task, cancelled)]
+    try:
+        wait(attempts, timeout=hedge_delay(task.name, model_id(agent.llm)))
+        if not attempts[0].done() or attempts[0].exception() is not None:
+            attempts.append(_hedge_executor.submit(_run_hedge_attempt, agent, task, cancelled))
+
+        pending = set(attempts)
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    return future.result()
+        # Both attempts failed; report the primary's error
+        raise attempts[0].exception()
+    finally:
+        cancelled.set()
+
+
+def _final_answer_chunks(chunks):
+    """Drops the agent's 'Thought: ... Final Answer:' preamble from a stream of text chunks.
+
+    A preamble that runs past FINAL_ANSWER_BUFFER_CHARS without a 'Final Answer:' is
+    streamed as it is, so a model that never writes one still shows its output as it comes.
+    """
+    buffer = ""
+    answering = False
+    for chunk in chunks:
+        if answering:
+            yield chunk
+            continue
+        buffer += chunk
+        if "Final Answer:" in buffer:
+            answering = True
+            answer = buffer.split("Final Answer:", 1)[1].lstrip()
+            if answer:
+                yield answer
+        elif not "Thought:".startswith(buffer.lstrip()[:8]) or len(buffer) > FINAL_ANSWER_BUFFER_CHARS:
+            answering = True
+            yield buffer
+    if not answering and buffer:
+        yield buffer
+
+
+class TaskStream:
+    """Streams a single-agent task as text chunks, e.g. for st.write_stream.
+
+    Once iteration completes, .result holds the same final string run_task would have
+    returned, and the cache is updated exactly as it is for run_task. Closing the
+    iterator before then abandons the crew run, and its agent is discarded rather than
+    released.
+    """
+
+    def __init__(self, agent, task, use_cache=True):
+        self.agent = agent
+        self.task = task
+        self.use_cache = use_cache
+        self.result = None
+
+    def __iter__(self):
+        if self.task.name in HEDGED_TASKS:
+            # Only the winning attempt's answer can be shown, so it arrives in one piece
+            self.result = run_task(self.agent, self.task, use_cache=self.use_cache)
+            yield self.result
+            return
+
+        model = model_id(self.agent.llm)
+        start = time.perf_counter()
+        # The crew run in flight, until its result has been read
+        streaming = None
+        first_token_at = None
+        try:
+            key = _cache_key(self.agent, self.task)
+            if self.use_cache:
+                cached = kickoff_cache.get(key)
+                if cached is not None:
+                    _record_metrics(self.agent, self.task, model, start, outcome="cache_hit")
+                    self.result = cached
+                    yield cached
+                    return
+            else:
+                kickoff_cache.record_bypass()
+
+            from crewai import Crew, Process
+            from crewai.types.streaming import StreamChunkType
+
+            with provider_slot(self.agent, self.task) as slot:
+                call_start = time.perf_counter()
+                crew = Crew(agents=[self.agent], tasks=[self.task], process=Process.sequential, stream=True)
+                streaming = crew.kickoff()
+                for chunk in _final_answer_chunks(chunk.content for chunk in streaming if chunk.chunk_type == StreamChunkType.TEXT):
+                    if first_token_at is None:
+                        first_token_at = time.perf_counter()
+                    yield chunk
+                output = slot.output = streaming.result
+                streaming = None
+                agent_pool.record_call(model, time.perf_counter() - call_start)
+            _record_metrics(self.agent, self.task, model, start, output=output, first_token_at=first_token_at)
+            self.result = output.raw
+            kickoff_cache.set(key, self.result)
+        except GeneratorExit:
+            # The reader stopped early, e.g. a cancelled job or a client that went away
+            if streaming is not None:
+                _record_metrics(self.agent, self.task, model, start, first_token_at=first_token_at, outcome="cancelled")
+            raise
+        except Exception:
+            _record_metrics(self.agent, self.task, model, start, outcome="error")
+            raise
+        finally:
+            if streaming is not None:
+                # Closing the stream doesn't stop crewai's run, and an agent's executor can't
+                # run two crews at once, so the agent is never handed out again
+                streaming.close()
+                agent_pool.discard(self.agent)
+            else:
+                agent_pool.release(self.agent)
+
+
+def stream_task(agent, task, use_cache=True):
+    """Returns a TaskStream for the task; iterate it to receive tokens as they arrive."""
+    return TaskStream(agent, task, use_cache=use_cache)
@@ -0,0 +1,146 @@
+import os
+import sys
+import threading
+import time
+import config  # noqa: F401
+from session_store import session_store
+
+# Memory the sessions one user has open (across all their tabs) may use before the least recently used are released, in MB (0 disables)
+SESSION_MEMORY_BUDGET_MB = float(os.getenv("ASCENT_SESSION_MEMORY_MB", 64))
+# Sessions held by a browser tab that hasn't run for this long are released, in seconds (0 disables)
+SESSION_IDLE_SECONDS = float(os.getenv("ASCENT_SESSION_IDLE_SECONDS", 15 * 60))
+# A run that never finished (the script raised) stops protecting its tab's sessions after this long
+MAX_RUN_SECONDS = 600
+# A tab this idle is taken to be closed (streamlit has dropped its session state) and is forgotten
+FORGET_TAB_SECONDS = 24 * 3600
+
+
+def session_size(session):
+    """Estimates the memory a session holds, in bytes: its strings and numbers plus the containers around them."""
+    size, stack = 0, [session]
+    while stack:
+        value = stack.pop()
+        size += sys.getsizeof(value)
+        if isinstance(value, dict):
+            stack.extend(value.keys())
+            stack.extend(value.values())
+        elif isinstance(value, (list, tuple)):
+            stack.extend(value)
+    return size
+
+
+class SessionMemory:
+    """Accounts for the sessions browser tabs hold in memory and releases the ones not worth keeping.
+
+    Each tab keeps its open session, and any with background work in flight, in its
+    st.session_state. The page registers that dict here when it runs and reports back when
+    the run ends. When a user's sessions outgrow the budget, the least recently used ones
+    held by their other tabs are released. A tab that has been idle for too long releases
+    all of its sessions. Everything a released session holds was already saved to
+    session_store, which loads it again the next time the session is opened.
+
+    Another tab's st.session_state is never changed from here: its callbacks run before
+    begin() and may be using the session. Releasing only marks the session, and the tab
+    drops it at the start of its next run.
+    """
+
+    def __init__(self, budget_bytes=SESSION_MEMORY_BUDGET_MB * 1024 * 1024, idle_seconds=SESSION_IDLE_SECONDS):
+        self.budget_bytes = budget_bytes
+        self.idle_seconds = idle_seconds
+        self._tabs = {}
+        self._lock = threading.Lock()
+        self._released = {"budget": 0, "idle": 0}
+        self._released_bytes = 0
+
+    def begin(self, tab_id, owner, sessions, busy=lambda session_id: False):
+        """Registers a tab's sessions at the start of a run, and drops the ones released since its last run.
+
+        They are not released while it runs. A released session is saved before it is
+        dropped, as a callback may have changed it since; one that has picked up
+        background work (see end()) is kept.
+        """
+        with self._lock:
+            tab = self._tabs.setdefault(tab_id, {"sizes": {}, "current": None, "released": set()})
+            tab.update(owner=owner, sessions=sessions, running=True, used_at=time.time())
+            released, tab["released"] = tab["released"], set()
+        for session_id in released:
+            if session_id in sessions and not busy(session_id):
+                session_store.save(session_id, sessions.pop(session_id), owner=owner)
+                session_store.forget(session_id)
+
+    def end(self, tab_id, current_id, busy=lambda session_id: False):
+        """Measures a tab's sessions after a run and releases sessions that are over budget or idle.
+
+        `busy(session_id)` tells whether a session has background work whose result still has
+        to be merged into it; such sessions are never released.
+        """
+        with self._lock:
+            tab = self._tabs.get(tab_id)
+            if tab is None:
+                return
+            sessions = tab["sessions"]
+        sizes = {session_id: session_size(session) for session_id, session in list(sessions.items())}
+        with self._lock:
+            tab.update(sizes=sizes, current=current_id, running=False, used_at=time.time())
+            now = time.time()
+            if self.idle_seconds:
+                for idle_id, idle_tab in list(self._tabs.items()):
+                    if now - idle_tab["used_at"] > self.idle_seconds and not self._in_use(idle_tab, now):
+                        for session_id in list(idle_tab["sizes"]):
+                            if not busy(session_id):
+                                self._release(idle_tab, session_id, "idle")
+                    if not idle_tab["sizes"] and now - idle_tab["used_at"] > FORGET_TAB_SECONDS:
+                        del self._tabs[idle_id]
+            if self.budget_bytes:
+                self._enforce_budget(tab, now, busy)
+
+    def _enforce_budget(self, tab, now, busy):
+        owner_tabs = [t for t in self._tabs.values() if t["owner"] == tab["owner"]]
+        used = sum(sum(t["sizes"].values()) for t in owner_tabs)
+        if used <= self.budget_bytes:
+            return
+        # Least recently used tabs first, their open session last; the tab that just ran keeps its open session
+        candidates = sorted(
+            (t["used_at"], session_id == t["current"], session_id, t)
+            for t in owner_tabs if not self._in_use(t, now)
+            for session_id in t["sizes"]
+            if not (t is tab and session_id == t["current"])
+        )
+        for _, _, session_id, owner_tab in candidates:
+            if used <= self.budget_bytes:
+                break
+            if not busy(session_id):
+                used -= self._release(owner_tab, session_id, "budget")
+
+    def _in_use(self, tab, now):
+        return tab["running"] and now - tab["used_at"] < MAX_RUN_SECONDS
+
+    def _release(self, tab, session_id, reason):
+        # Counted as released now, though the memory is only freed when the tab next runs
+        size = tab["sizes"].pop(session_id, 0)
+        tab["released"].add(session_id)
+        self._released[reason] += 1
+        self._released_bytes += size
+        return size
+
+    def stats(self):
+        """Returns the sessions held in memory and their size, overall and for the largest sessions, and what was released."""
+        with self._lock:
+            held = [
+                {"session_id": session_id, "owner": tab["owner"], "bytes": size, "idle_seconds": round(time.time() - tab["used_at"])}
+                for tab in self._tabs.values() for session_id, size in tab["sizes"].items()
+            ]
+            return {
+                "tabs": sum(1 for tab in self._tabs.values() if tab["sizes"]),
+                "owners": len({tab["owner"] for tab in self._tabs.values() if tab["sizes"]}),
+                "sessions": len(held),
+                "bytes": sum(entry["bytes"] for entry in held),
+                "largest": sorted(held, key=lambda entry: entry["bytes"], reverse=True)[:10],
+                "released_over_budget": self._released["budget"],
+                "released_idle": self._released["idle"],
+                "released_bytes": self._released_bytes,
+            }
+
+
+# Shared by every session served from this process
+session_memory = SessionMemory()
@@ -0,0 +1,317 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+import config  # noqa: F401
+
+DEFAULT_SESSION_DB_PATH = os.getenv("ASCENT_SESSION_DB_PATH", os.path.join(".cache", "sessions.sqlite3"))
+# Sessions not changed for this many days are deleted; 0 keeps them forever
+RETENTION_DAYS = float(os.getenv("ASCENT_SESSION_RETENTION_DAYS", 30))
+# Seconds between two looks for expired sessions
+EXPIRY_CHECK_INTERVAL = 3600
+
+# Session keys with a table of their own; every other key is kept as JSON on the session row
+LIST_TABLES = {
+    "messages": ("messages", ("role", "content", "content_id", "suffix")),
+    "strategy_history": ("strategy_versions", ("version", "timestamp", "content", "content_id")),
+    "draft_history": ("drafts", ("timestamp", "content", "content_id", "idea", "critique")),
+}
+ROW_KEYS = ("title", "conversation_state")
+IDEA_KEYS = ("post_ideas", "quick_ideas")
+
+
+def _digest(value):
+    return hash(json.dumps(value, sort_keys=True, ensure_ascii=False, default=str))
+
+
+def _extra(idea):
+    # Anything an idea carries besides its text and checkbox, e.g. near-duplicate flags
+    extra = {k: v for k, v in idea.items() if k not in ("text", "checked")}
+    return json.dumps(extra, ensure_ascii=False) if extra else None
+
+
+def _common_prefix(a, b):
+    length = 0
+    for x, y in zip(a, b):
+        if x != y:
+            break
+        length += 1
+    return length
+
+
+class SessionStore:
+    """Keeps sessions in a SQLite file, one row per message, strategy version, idea and draft.
+
+    Listing sessions only reads (id, title, updated_at); a session's content is loaded when
+    it is opened. The session row's remaining fields (the resume, writing samples and
+    other context) are stored zlib-compressed. save() compares the session with what was last written for it and only
+    writes the parts that changed: appended messages, versions and drafts are inserted,
+    and an edited idea rewrites just its theme. Sessions left unchanged for retention_days
+    are deleted by delete_expired().
+    """
+
+    def __init__(self, path=DEFAULT_SESSION_DB_PATH, retention_days=RETENTION_DAYS):
+        self.path = path
+        self.retention_days = retention_days
+        self._lock = threading.Lock()
+        self._expiry_checked_at = 0.0
+        # What was last written per session: digests of the row, of each list item and of each idea theme
+        self._saved = {}
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS sessions (
+                id TEXT PRIMARY KEY,
+                owner TEXT,
+                title TEXT NOT NULL,
+                conversation_state TEXT,
+                data TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                updated_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_sessions_owner_updated ON sessions (owner, updated_at);
+            CREATE TABLE IF NOT EXISTS messages (
+                session_id TEXT NOT NULL,
+                position INTEGER NOT NULL,
+                role TEXT,
+                content TEXT,
+                content_id TEXT,
+                suffix TEXT,
+                PRIMARY KEY (session_id, position)
+            );
+            CREATE TABLE IF NOT EXISTS strategy_versions (
+                session_id TEXT NOT NULL,
+                position INTEGER NOT NULL,
+                version INTEGER,
+                timestamp TEXT,
+                content TEXT,
+                content_id TEXT,
+                PRIMARY KEY (session_id, position)
+            );
+            CREATE TABLE IF NOT EXISTS drafts (
+                session_id TEXT NOT NULL,
+                position INTEGER NOT NULL,
+                timestamp TEXT,
+                content TEXT,
+                content_id TEXT,
+                idea TEXT,
+                critique TEXT,
+                PRIMARY KEY (session_id, position)
+            );
+            CREATE TABLE IF NOT EXISTS ideas (
+                session_id TEXT NOT NULL,
+                tab TEXT NOT NULL,
+                theme TEXT NOT NULL,
+                theme_position INTEGER NOT NULL,
+                position INTEGER NOT NULL,
+                text TEXT NOT NULL,
+                checked INTEGER NOT NULL,
+                extra TEXT,
+                PRIMARY KEY (session_id, tab, theme, position)
+            );
+            """
+        )
+        # Files written before versions moved to versions.py lack the content_id columns
+        for table, columns in LIST_TABLES.values():
+            existing = {row[1] for row in self._conn.execute(f"PRAGMA table_info({table})")}
+            for column in columns:
+                if column not in existing:
+                    self._conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} TEXT")
+        self._conn.commit()
+
+    def list_sessions(self, owner, search="", limit=None, offset=0):
+        """Returns (id, title, updated_at) for a page of an owner's sessions, most recently updated first.
+
+        `search` keeps the sessions whose title contains it, ignoring case.
+        """
+        where, params = self._filter(owner, search)
+        with self._lock:
+            return self._conn.execute(
+                f"SELECT id, title, updated_at FROM sessions WHERE {where} ORDER BY updated_at DESC LIMIT ? OFFSET ?",
+                (*params, -1 if limit is None else limit, offset),
+            ).fetchall()
+
+    def count_sessions(self, owner, search=""):
+        where, params = self._filter(owner, search)
+        with self._lock:
+            return self._conn.execute(f"SELECT COUNT(*) FROM sessions WHERE {where}", params).fetchone()[0]
+
+    @staticmethod
+    def _filter(owner, search):
+        if not search:
+            return "owner = ?", (owner,)
+        pattern = "%" + search.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+        return "owner = ? AND title LIKE ? ESCAPE '\\'", (owner, pattern)
+
+    def load(self, session_id):
+        """Returns the full session dict, or None if there is no such session."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT title, conversation_state, data FROM sessions WHERE id = ?", (session_id,)
+            ).fetchone()
+            if row is None:
+                return None
+            data = row[2]
+            # Rows written before the data was compressed hold plain JSON
+            if isinstance(data, bytes):
+                data = zlib.decompress(data).decode("utf-8")
+            session = {"title": row[0], "conversation_state": row[1], **json.loads(data)}
+            for key, (table, columns) in LIST_TABLES.items():
+                rows = self._conn.execute(
+                    f"SELECT {', '.join(columns)} FROM {table} WHERE session_id = ? ORDER BY position", (session_id,)
+                )
+                # Optional fields (e.g. a draft's critique) are only set on the items that had them
+                session[key] = [{c: v for c, v in zip(columns, r) if v is not None} for r in rows]
+            session["post_ideas"], session["quick_ideas"] = {}, []
+            rows = self._conn.execute(
+                "SELECT tab, theme, text, checked, extra FROM ideas WHERE session_id = ? ORDER BY theme_position, position",
+                (session_id,),
+            )
+            for tab, theme, text, checked, extra in rows:
+                idea = {"text": text, "checked": bool(checked), **json.loads(extra or "{}")}
+                if tab == "quick":
+                    session["quick_ideas"].append(idea)
+                else:
+                    session["post_ideas"].setdefault(theme, []).append(idea)
+            self._saved[session_id] = self._snapshot(session)
+        return session
+
+    def save(self, session_id, session, owner=None):
+        """Writes the parts of a session that changed since it was last loaded or saved. Returns True if anything was written."""
+        snapshot = self._snapshot(session)
+        with self._lock:
+            saved = self._saved.get(session_id) or self._stored_snapshot(session_id)
+            if saved == snapshot:
+                return False
+            try:
+                self._write(session_id, session, owner, saved, snapshot)
+                self._conn.commit()
+            except Exception:
+                self._conn.rollback()
+                raise
+            self._saved[session_id] = snapshot
+        return True
+
+    def rename(self, session_id, title):
+        with self._lock:
+            self._conn.execute("UPDATE sessions SET title = ?, updated_at = ? WHERE id = ?", (title, time.time(), session_id))
+            self._conn.commit()
+
+    def delete(self, session_id):
+        with self._lock:
+            self._delete(session_id)
+            self._conn.commit()
+
+    def delete_expired(self, force=False):
+        """Deletes the sessions not changed for retention_days and returns their IDs.
+
+        Looks at most once per EXPIRY_CHECK_INTERVAL unless `force` is set, so it can be
+        called on every page run.
+        """
+        now = time.time()
+        if not self.retention_days or (not force and now - self._expiry_checked_at < EXPIRY_CHECK_INTERVAL):
+            return []
+        with self._lock:
+            self._expiry_checked_at = now
+            expired = [row[0] for row in self._conn.execute(
+                "SELECT id FROM sessions WHERE updated_at < ?", (now - self.retention_days * 86400,)
+            )]
+            for session_id in expired:
+                self._delete(session_id)
+            self._conn.commit()
+        return expired
+
+    def content_ids(self):
+        """Returns the version_store content IDs that any stored session refers to."""
+        with self._lock:
+            return {
+                row[0]
+                for table, _ in LIST_TABLES.values()
+                for row in self._conn.execute(f"SELECT DISTINCT content_id FROM {table} WHERE content_id IS NOT NULL")
+            }
+
+    def forget(self, session_id):
+        """Drops what is remembered about a session that is no longer held in memory."""
+        with self._lock:
+            self._saved.pop(session_id, None)
+
+    def _delete(self, session_id):
+        for table in ("sessions", "messages", "strategy_versions", "drafts", "ideas"):
+            column = "id" if table == "sessions" else "session_id"
+            self._conn.execute(f"DELETE FROM {table} WHERE {column} = ?", (session_id,))
+        self._saved.pop(session_id, None)
+
+    @staticmethod
+    def _snapshot(session):
+        themes = [("post", theme, ideas) for theme, ideas in session.get("post_ideas", {}).items()]
+        themes.append(("quick", "", session.get("quick_ideas", [])))
+        return {
+            "row": _digest(
+                [session.get(key) for key in ROW_KEYS]
+                + [{k: v for k, v in session.items() if k not in ROW_KEYS + IDEA_KEYS and k not in LIST_TABLES}]
+            ),
+            "lists": {key: [_digest(item) for item in session.get(key, [])] for key in LIST_TABLES},
+            "themes": {(tab, theme): _digest([position, ideas]) for position, (tab, theme, ideas) in enumerate(themes)},
+        }
+
+    def _stored_snapshot(self, session_id):
+        # A session this process hasn't loaded or saved yet: new, or written before a restart
+        exists = self._conn.execute("SELECT 1 FROM sessions WHERE id = ?", (session_id,)).fetchone()
+        return {"row": None, "lists": {key: [] for key in LIST_TABLES}, "themes": {}, "exists": bool(exists)}
+
+    def _write(self, session_id, session, owner, saved, snapshot):
+        now = time.time()
+        if saved["row"] != snapshot["row"]:
+            data = {k: v for k, v in session.items() if k not in ROW_KEYS + IDEA_KEYS and k not in LIST_TABLES}
+            self._conn.execute(
+                """INSERT INTO sessions (id, owner, title, conversation_state, data, created_at, updated_at)
+                   VALUES (?, ?, ?, ?, ?, ?, ?)
+                   ON CONFLICT(id) DO UPDATE SET
+                       owner = COALESCE(excluded.owner, owner), title = excluded.title,
+                       conversation_state = excluded.conversation_state, data = excluded.data, updated_at = excluded.updated_at""",
+                (session_id, owner, session.get("title", ""), session.get("conversation_state"),
+                 zlib.compress(json.dumps(data, ensure_ascii=False, default=str).encode("utf-8")), now, now),
+            )
+        else:
+            self._conn.execute("UPDATE sessions SET updated_at = ? WHERE id = ?", (now, session_id))
+        if saved.get("exists"):
+            # Written before this process started: replace the content rather than trusting positions
+            for table in ("messages", "strategy_versions", "drafts", "ideas"):
+                self._conn.execute(f"DELETE FROM {table} WHERE session_id = ?", (session_id,))
+
+        for key, (table, columns) in LIST_TABLES.items():
+            old, new = saved["lists"][key], snapshot["lists"][key]
+            start = _common_prefix(old, new)
+            if start < len(old):
+                self._conn.execute(f"DELETE FROM {table} WHERE session_id = ? AND position >= ?", (session_id, start))
+            items = session.get(key, [])
+            self._conn.executemany(
+                f"INSERT INTO {table} (session_id, position, {', '.join(columns)}) VALUES ({', '.join('?' * (len(columns) + 2))})",
+                [(session_id, position, *(items[position].get(c) for c in columns)) for position in range(start, len(items))],
+            )
+
+        themes = [("post", theme, ideas) for theme, ideas in session.get("post_ideas", {}).items()]
+        themes.append(("quick", "", session.get("quick_ideas", [])))
+        for tab, theme in saved["themes"].keys() - snapshot["themes"].keys():
+            self._conn.execute("DELETE FROM ideas WHERE session_id = ? AND tab = ? AND theme = ?", (session_id, tab, theme))
+        for theme_position, (tab, theme, ideas) in enumerate(themes):
+            if saved["themes"].get((tab, theme)) == snapshot["themes"][(tab, theme)]:
+                continue
+            self._conn.execute("DELETE FROM ideas WHERE session_id = ? AND tab = ? AND theme = ?", (session_id, tab, theme))
+            self._conn.executemany(
+                "INSERT INTO ideas (session_id, tab, theme, theme_position, position, text, checked, extra) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (session_id, tab, theme, theme_position, position, idea["text"], int(bool(idea.get("checked"))), _extra(idea))
+                    for position, idea in enumerate(ideas)
+                ],
+            )
+
+
+# Shared by every session served from this process
+session_store = SessionStore()
@@ -0,0 +1,133 @@
+import os
+import re
+import zlib
+from functools import lru_cache
+import numpy as np
+import config  # noqa: F401
+
+# Ideas at least this similar (estimated Jaccard similarity of their shingles) count as near-duplicates
+DUPLICATE_THRESHOLD = float(os.getenv("ASCENT_DUPLICATE_THRESHOLD", 0.45))
+# "drop" removes near-duplicates, "flag" keeps them with a note, "off" skips the check
+DUPLICATE_MODE = os.getenv("ASCENT_DUPLICATE_MODE", "drop")
+# Whether per-theme requests that lost ideas to the check ask once for replacements
+DUPLICATE_TOP_UP = os.getenv("ASCENT_DUPLICATE_TOP_UP", "1") != "0"
+NUM_PERMUTATIONS = 64
+MAX_CACHED_SIGNATURES = 50_000
+
+# One random seed per hash function; each seeds a splitmix64 mix of the shingle's CRC32
+_SEEDS = np.random.RandomState(1).randint(0, 1 << 63, size=NUM_PERMUTATIONS, dtype=np.uint64)
+
+STOPWORDS = frozenset(
+    "a an and are as at be by can do for from has have how i if in into is it its me my of on or our so "
+    "that the their them this to we what when where which who why will with you your".split()
+)
+WORD = re.compile(r"[a-z0-9]+")
+
+
+def _stem(word):
+    for suffix in ("ing", "ed", "es", "s"):
+        if len(word) > len(suffix) + 3 and word.endswith(suffix):
+            return word[:-len(suffix)]
+    return word
+
+
+def shingles(text):
+    """Returns the set of shingles of a text: its content words and pairs of adjacent content words."""
+    words = [_stem(word) for word in WORD.findall(text.lower()) if word not in STOPWORDS]
+    return set(words) | {f"{a} {b}" for a, b in zip(words, words[1:])}
+
+
+def _mix(z):
+    # splitmix64's finalizer; uint64 arithmetic wraps around, which is what it relies on
+    z = (z ^ (z >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    z = (z ^ (z >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return z ^ (z >> np.uint64(31))
+
+
+@lru_cache(maxsize=MAX_CACHED_SIGNATURES)
+def signature(text):
+    """Returns the MinHash signature of a text, a read-only array of NUM_PERMUTATIONS uint32 values.
+
+    The share of positions where two signatures agree estimates the Jaccard similarity of
+    the texts' shingles. Signatures are cached, so re-checking the same ideas on every
+    rerun only costs the comparison. A text without content words has no shingles and
+    no signature (None).
+    """
+    hashes = np.fromiter((zlib.crc32(s.encode()) for s in shingles(text)), dtype=np.uint64)
+    if not len(hashes):
+        return None
+    sig = (_mix(hashes[:, None] ^ _SEEDS).min(axis=0) >> np.uint64(32)).astype(np.uint32)
+    sig.flags.writeable = False
+    return sig
+
+
+def signatures(texts):
+    """Returns the texts' signatures stacked into one array, and which texts have one.
+
+    Rows of texts without a signature are zeros and must not be compared.
+    """
+    sigs = [signature(text) for text in texts]
+    present = np.array([sig is not None for sig in sigs], dtype=bool)
+    stacked = np.zeros((len(sigs), NUM_PERMUTATIONS), dtype=np.uint32)
+    for i, sig in enumerate(sigs):
+        if sig is not None:
+            stacked[i] = sig
+    return stacked, present
+
+
+def similarity_matrix(texts, others):
+    """Returns the estimated Jaccard similarity of every text in `texts` to every text in `others`.
+
+    A text without content words is 0 similar to everything, including another such text.
+    """
+    (a, a_present), (b, b_present) = signatures(texts), signatures(others)
+    matches = np.zeros((len(a), len(b)), dtype=np.float32)
+    if not len(a) or not len(b):
+        return matches
+    for column in range(NUM_PERMUTATIONS):
+        matches += a[:, column, None] == b[None, :, column]
+    matches[~a_present, :] = 0
+    matches[:, ~b_present] = 0
+    return matches / NUM_PERMUTATIONS
+
+
+def find_near_duplicates(new_texts, existing_texts, threshold=DUPLICATE_THRESHOLD):
+    """Finds the new texts that closely match an existing text or an earlier new text.
+
+    Returns {index in new_texts: (matched text, similarity)}.
+    """
+    existing_texts = list(existing_texts)
+    duplicates = {}
+    if not new_texts:
+        return duplicates
+    against_existing = similarity_matrix(new_texts, existing_texts)
+    among_new = similarity_matrix(new_texts, new_texts)
+    for i, text in enumerate(new_texts):
+        best, match = 0.0, None
+        if existing_texts:
+            j = int(against_existing[i].argmax())
+            best, match = float(against_existing[i, j]), existing_texts[j]
+        # Compare with the earlier new texts that were kept, so one of two paraphrases survives
+        for j in range(i):
+            if j not in duplicates and among_new[i, j] > best:
+                best, match = float(among_new[i, j]), new_texts[j]
+        if best >= threshold:
+            duplicates[i] = (match, best)
+    return duplicates
+
+
+def filter_new_ideas(new_ideas, existing_texts, mode=DUPLICATE_MODE, threshold=DUPLICATE_THRESHOLD):
+    """Checks idea dicts against existing texts and returns (ideas to add, number of near-duplicates).
+
+    In "drop" mode near-duplicates are left out; in "flag" mode they are kept with
+    "duplicate_of" and "similarity" set, so the UI can point them out.
+    """
+    if mode == "off" or not new_ideas:
+        return new_ideas, 0
+    duplicates = find_near_duplicates([idea["text"] for idea in new_ideas], existing_texts, threshold)
+    if mode == "flag":
+        for i, (match, score) in duplicates.items():
+            new_ideas[i]["duplicate_of"] = match
+            new_ideas[i]["similarity"] = round(score, 2)
+        return new_ideas, len(duplicates)
+    return [idea for i, idea in enumerate(new_ideas) if i not in duplicates], len(duplicates)
@@ -1,9 +1,57 @@
-from crewai import Task
+import json
+import os
 import re
+import config  # noqa: F401
+from idea_parsing import IDEAS_SCHEMA, QUICK_IDEAS_SCHEMA
+
+# Idea tasks ask for JSON that follows a schema instead of the THEME:/- text layout
+STRUCTURED_IDEAS = os.getenv("ASCENT_STRUCTURED_IDEAS", "1") != "0"
+
+
+def _task(**kwargs):
+    # crewai is imported on first use so that importing this module stays cheap
+    from crewai import Task
+
+    return Task(**kwargs)
+
 
 class BrandingTasks:
+    def __init__(self, structured_ideas=STRUCTURED_IDEAS):
+        self.structured_ideas = structured_ideas
+
+    def _ideas_format(self, layout, theme=None):
+        """Output instructions for a themed idea task: the JSON schema, or the THEME:/- layout given."""
+        if not self.structured_ideas:
+            return layout
+        if theme:
+            # The app files the ideas under this exact theme name
+            example = {"themes": [{"theme": theme, "ideas": ["New Idea 1", "New Idea 2", "New Idea 3"]}]}
+        else:
+            example = {"themes": [
+                {"theme": "Name of the First Theme", "ideas": ["Idea 1", "Idea 2"]},
+                {"theme": "Name of the Second Theme", "ideas": ["Idea 1", "Idea 2", "Idea 3"]},
+            ]}
+        return f"""🚨 OUTPUT FORMAT (MANDATORY): Respond with a single JSON object and nothing else (no markdown, no code fences, no commentary). It must follow this JSON schema:
+            {json.dumps(IDEAS_SCHEMA)}
+            Example: {json.dumps(example, ensure_ascii=False)}"""
+
+    def _quick_ideas_format(self, layout):
+        """Output instructions for an untitled list of ideas: the JSON schema, or the bulleted layout given."""
+        if not self.structured_ideas:
+            return layout
+        return f"""🚨 OUTPUT FORMAT (MANDATORY): Respond with a single JSON object and nothing else (no markdown, no code fences, no commentary). It must follow this JSON schema:
+            {json.dumps(QUICK_IDEAS_SCHEMA)}
+            Example: {json.dumps({"ideas": ["Idea 1", "Idea 2", "Idea 3"]})}"""
+
+    def _ideas_expected(self, ideas, layout="A structured list of {ideas}."):
+        """Expected output for an idea task: the ideas described as JSON, or in the layout given (which names them {ideas})."""
+        if self.structured_ideas:
+            return f"A single JSON object that follows the given schema, holding {ideas}."
+        return layout.format(ideas=ideas)
+
     def summarize_resume_task(self, agent, context):
-        return Task(
+        return _task(
+            name="summarize_resume_task",
             description=f"""Summarize the provided resume or professional background. Identify the user's key skills, years of experience, primary industry, and infer their likely career goals.
 
             Frame the summary in a reflective, second-person tone. For example: 'I see you've worked in X for Y years... It looks like you're aiming for Z.'
@@ -17,9 +65,34 @@ class BrandingTasks:
             agent=agent
         )
 
+    # Task to distill the user's background into a compact profile that later prompts use instead of the raw resume
+    def distill_profile_task(self, agent, context):
+        return _task(
+            name="distill_profile_task",
+            description=f"""Distill the user's resume and notes below into a compact professional profile.
+
+            Return ONLY a JSON object with exactly these keys, and no other text:
+            {{
+                "skills": [up to 10 short skill phrases],
+                "years_experience": total years of professional experience as a number, or null if unknown,
+                "industry": "the user's primary industry",
+                "goals": [up to 5 short career goals or aspirations],
+                "notable_metrics": [up to 5 quantified achievements, keeping the original numbers],
+                "interests": [up to 5 interests or hobbies the user mentioned]
+            }}
+
+            Keep every entry short. Do not invent facts that are not in the background.
+
+            USER'S BACKGROUND:
+            {context}""",
+            expected_output="A single JSON object with the keys skills, years_experience, industry, goals, notable_metrics and interests.",
+            agent=agent
+        )
+
     # NEW: Task to create a more detailed, intermediate content outline
     def intermediate_outline_task(self, agent, user_context, target_role, target_audience, platform, duration, positioning):
-        return Task(
+        return _task(
+            name="intermediate_outline_task",
             description=f"""Analyze the user's comprehensive background and goals.
             Create an extremely concise, intermediate-level outline for a {duration}-week content plan to help them build their personal brand as a top-tier {target_role}.
             The outline should be tailored for the {target_audience} on the {platform} platform and reflect the user's desired positioning: '{positioning}'.
@@ -46,7 +119,8 @@ class BrandingTasks:
         )
 
     def strategy_task(self, agent, user_context, target_role, target_audience, platform, duration, positioning, writing_samples=""):
-        return Task(
+        return _task(
+            name="strategy_task",
             description=f"""Analyze the user's comprehensive background and writing samples provided below.
             Based on this, create a detailed {duration}-week content plan to help them build their personal brand as a top-tier {target_role}.
 
@@ -73,7 +147,8 @@ class BrandingTasks:
         )
 
     def refine_strategy_task(self, agent, context, critique, user_context, target_role, target_audience, platform, duration, positioning, writing_samples=""):
-        return Task(
+        return _task(
+            name="refine_strategy_task",
             description=f"""You are refining a personal branding content strategy based on user feedback. It is crucial that you create a new, updated plan that is significantly different from the previous version, based on the user's critique.
 
             USER'S FULL CONTEXT (for reference):
@@ -100,7 +175,18 @@ class BrandingTasks:
     
     # Task to refine a list of selected ideas based on feedback
     def refine_ideas_with_feedback_task(self, agent, context, critique, ideas_to_refine):
-            return Task(
+            layout = """The output must be structured exactly as follows, with each idea on a new line:
+                
+                THEME: [Name of the First Theme]
+                - [Refined Idea 1]
+                - [Refined Idea 2]
+                
+                THEME: [Name of the Second Theme]
+                - [Refined Idea 1]
+                - [Refined Idea 2]
+                - [Refined Idea 3]"""
+            return _task(
+                name="refine_ideas_with_feedback_task",
                 description=f"""You have been given a list of post ideas that a user wants to refine. Your task is to apply the user's critique to ONLY THESE SPECIFIC ideas and regenerate them. The new ideas must directly reflect the critique provided.
 
                 USER'S CRITIQUE:
@@ -112,52 +198,47 @@ class BrandingTasks:
                 REFERENCE CONTENT STRATEGY:
                 {context}
 
-                The output must be structured exactly as follows, with each idea on a new line:
-                
-                THEME: [Name of the First Theme]
-                - [Refined Idea 1]
-                - [Refined Idea 2]
-                
-                THEME: [Name of the Second Theme]
-                - [Refined Idea 1]
-                - [Refined Idea 2]
-                - [Refined Idea 3]
+                {self._ideas_format(layout)}
                 """,
-                expected_output="A structured list of refined one-liner post ideas grouped by their original theme.",
+                expected_output=self._ideas_expected("refined one-liner post ideas grouped by their original theme"),
                 agent=agent
             )
 
         # Task to generate new ideas for a specific theme
     def generate_new_ideas_for_theme_task(self, agent, context, theme, num_ideas):
-        return Task(
-            description=f"""Based on the provided content strategy, generate {num_ideas} new, concise, one-liner post ideas ONLY for the following theme: {theme}.
-
-            The output must be structured exactly as follows, with each idea on a new line:
+        layout = f"""The output must be structured exactly as follows, with each idea on a new line:
             
             THEME: {theme}
             - [New Idea 1]
             - [New Idea 2]
             - [New Idea 3]
-            ... and so on for {num_ideas} ideas.
+            ... and so on for {num_ideas} ideas."""
+        return _task(
+            name="generate_new_ideas_for_theme_task",
+            description=f"""Based on the provided content strategy, generate {num_ideas} new, concise, one-liner post ideas ONLY for the following theme: {theme}.
+
+            {self._ideas_format(layout, theme=theme)}
 
             FULL CONTENT STRATEGY (for context):
             {context}
             """,
-            expected_output=f"A structured list of {num_ideas} new one-liner post ideas for the specified theme.",
+            expected_output=self._ideas_expected(f"{num_ideas} new one-liner post ideas for the specified theme"),
             agent=agent
         )
     
     # Task for generating similar ideas to a selected one
     def generate_similar_ideas_task(self, agent, context, theme, selected_idea):
-        return Task(
-            description=f"""Based on the full content strategy and the user's selected post idea, generate 3 new, concise, one-liner post ideas that are thematically or stylistically similar to the selected idea.
-
-            Your output must be structured exactly as follows, with each idea on a new line:
+        layout = f"""Your output must be structured exactly as follows, with each idea on a new line:
 
             THEME: {theme}
             - [New Idea 1]
             - [New Idea 2]
-            - [New Idea 3]
+            - [New Idea 3]"""
+        return _task(
+            name="generate_similar_ideas_task",
+            description=f"""Based on the full content strategy and the user's selected post idea, generate 3 new, concise, one-liner post ideas that are thematically or stylistically similar to the selected idea.
+
+            {self._ideas_format(layout, theme=theme)}
 
             SELECTED IDEA:
             {selected_idea}
@@ -165,17 +246,57 @@ class BrandingTasks:
             FULL CONTENT STRATEGY (for context):
             {context}
             """,
-            expected_output="A structured list of 3 new, one-liner post ideas that are thematically or stylistically similar to the specified selected idea.",
+            expected_output=self._ideas_expected("3 new, one-liner post ideas that are thematically or stylistically similar to the specified selected idea"),
+            agent=agent
+        )
+
+    # Task that serves several per-theme requests ("Generate New Ideas", "More like this") in one call
+    def theme_ideas_batch_task(self, agent, context, requests):
+        instructions = []
+        for number, request in enumerate(requests, 1):
+            if request["mode"] == "similar":
+                instructions.append(f'{number}. THEME: {request["theme"]} - {request["count"]} new ideas that are thematically or stylistically similar to this selected idea: "{request["idea"]}"')
+            else:
+                instructions.append(f'{number}. THEME: {request["theme"]} - {request["count"]} new ideas for this theme')
+            if request.get("avoid"):
+                avoid = "; ".join(f'"{idea}"' for idea in request["avoid"])
+                instructions[-1] += f" (each clearly different in angle and wording from these existing ideas: {avoid})"
+        instructions = "\n            ".join(instructions)
+        layout = """The output must contain one THEME block per request, in the same order as the requests, with each idea on a new line:
+
+            THEME: [Exact Theme Name of Request 1]
+            - [New Idea 1]
+            - [New Idea 2]
+
+            THEME: [Exact Theme Name of Request 2]
+            - [New Idea 1]
+            - [New Idea 2]
+            - [New Idea 3]"""
+        if self.structured_ideas:
+            layout = f"""{self._ideas_format(layout)}
+            Add one entry to "themes" per request, in the same order as the requests."""
+        return _task(
+            name="theme_ideas_batch_task",
+            description=f"""Based on the provided content strategy, generate new, concise, one-liner post ideas for each of the following requests. Each request names a theme and how many ideas it needs.
+
+            REQUESTS:
+            {instructions}
+
+            Use each theme name exactly as written above and give every request exactly the number of ideas it asks for.
+
+            {layout}
+
+            FULL CONTENT STRATEGY (for context):
+            {context}
+            """,
+            expected_output=self._ideas_expected("new one-liner post ideas with one theme block per request, in request order"),
             agent=agent
         )
 
     def ideation_task(self, agent, context):
         themes = re.findall(r'^-\s*(?:Monday|Tuesday|Wednesday|Thursday|Friday|Saturday|Sunday):\s*(.*)', context, re.MULTILINE)
         
-        return Task(
-            description=f"""Based on the content strategy provided, generate 2-3 concise, one-liner post ideas for EACH of the following daily themes: {', '.join(themes)}.
-
-            The output must be structured exactly as follows, with each idea on a new line:
+        layout = """The output must be structured exactly as follows, with each idea on a new line:
             
             THEME: [Name of the First Theme]
             - [Idea 1]
@@ -184,18 +305,34 @@ class BrandingTasks:
             THEME: [Name of the Second Theme]
             - [Idea 1]
             - [Idea 2]
-            - [Idea 3]
+            - [Idea 3]"""
+        return _task(
+            name="ideation_task",
+            description=f"""Based on the content strategy provided, generate 2-3 concise, one-liner post ideas for EACH of the following daily themes: {', '.join(themes)}.
+
+            {self._ideas_format(layout)}
 
             CONTENT STRATEGY:
             {context}
             """,
-            expected_output="A structured list of one-liner post ideas grouped by their daily theme.",
+            expected_output=self._ideas_expected("one-liner post ideas grouped by their daily theme"),
             agent=agent
         )
 
     # NEW TASK: Refine a set of selected ideas across multiple themes
     def refine_selected_ideas_across_themes_task(self, agent, context, critique, ideas_to_refine):
-        return Task(
+        layout = """The output must be structured exactly as follows, with each idea on a new line. Only include the themes that contain refined ideas.
+            
+            THEME: [Name of the First Theme]
+            - [Refined Idea 1]
+            - [Refined Idea 2]
+            
+            THEME: [Name of the Second Theme]
+            - [Refined Idea 1]
+            - [Refined Idea 2]
+            - [Refined Idea 3]"""
+        return _task(
+            name="refine_selected_ideas_across_themes_task",
             description=f"""A user has provided feedback on a set of LinkedIn post ideas. Your task is to apply the user's critique to ONLY THE SPECIFIC SELECTED IDEAS provided below and regenerate them. These ideas can come from multiple themes.
 
             USER'S CRITIQUE:
@@ -207,23 +344,25 @@ class BrandingTasks:
             REFERENCE CONTENT STRATEGY:
             {context}
 
-            The output must be structured exactly as follows, with each idea on a new line. Only include the themes that contain refined ideas.
-            
-            THEME: [Name of the First Theme]
-            - [Refined Idea 1]
-            - [Refined Idea 2]
-            
-            THEME: [Name of the Second Theme]
-            - [Refined Idea 1]
-            - [Refined Idea 2]
-            - [Refined Idea 3]
+            {self._ideas_format(layout)}
             """,
-            expected_output="A structured list of refined one-liner post ideas grouped by their original theme. Only includes the themes with refined ideas.",
+            expected_output=self._ideas_expected("refined one-liner post ideas grouped by their original theme. Only includes the themes with refined ideas"),
             agent=agent
         )
 
     def refine_all_ideas_with_feedback_task(self, agent, context, critique):
-        return Task(
+        layout = """The output must be structured exactly as follows, with each idea on a new line:
+            
+            THEME: [Name of the First Theme]
+            - [Idea 1]
+            - [Idea 2]
+            
+            THEME: [Name of the Second Theme]
+            - [Idea 1]
+            - [Idea 2]
+            - [Idea 3]"""
+        return _task(
+            name="refine_all_ideas_with_feedback_task",
             description=f"""A user has provided feedback on a set of LinkedIn post ideas. Your task is to generate a completely new set of ideas based on their critique.
 
             The new ideas should be one-liners, grouped by the original themes from the content strategy.
@@ -234,26 +373,14 @@ class BrandingTasks:
             REFERENCE CONTENT STRATEGY:
             {context}
 
-            The output must be structured exactly as follows, with each idea on a new line:
-            
-            THEME: [Name of the First Theme]
-            - [Idea 1]
-            - [Idea 2]
-            
-            THEME: [Name of the Second Theme]
-            - [Idea 1]
-            - [Idea 2]
-            - [Idea 3]
+            {self._ideas_format(layout)}
             """,
-            expected_output="A completely new, structured list of one-liner post ideas based on user feedback.",
+            expected_output=self._ideas_expected("completely new one-liner post ideas based on user feedback"),
             agent=agent
         )
 
     def regenerate_ideas_for_all_unselected_topics_task(self, agent, context, ideas_to_regenerate):
-        return Task(
-            description=f"""Based on the provided content strategy, generate new, concise, one-liner post ideas ONLY for the ideas that the user did NOT select.
-
-            The output must be structured exactly as follows, with each idea on a new line:
+        layout = """The output must be structured exactly as follows, with each idea on a new line:
             
             THEME: [Name of the First Theme to Regenerate]
             - [New Idea 1]
@@ -262,7 +389,12 @@ class BrandingTasks:
             THEME: [Name of the Second Theme to Regenerate]
             - [New Idea 1]
             - [New Idea 2]
-            - [New Idea 3]
+            - [New Idea 3]"""
+        return _task(
+            name="regenerate_ideas_for_all_unselected_topics_task",
+            description=f"""Based on the provided content strategy, generate new, concise, one-liner post ideas ONLY for the ideas that the user did NOT select.
+
+            {self._ideas_format(layout)}
 
             UNSELECTED IDEAS TO REGENERATE:
             {ideas_to_regenerate}
@@ -270,12 +402,32 @@ class BrandingTasks:
             FULL CONTENT STRATEGY (for context):
             {context}
             """,
-            expected_output="A structured list of new one-liner post ideas, only for the specified themes.",
+            expected_output=self._ideas_expected("new one-liner post ideas, only for the specified themes"),
+            agent=agent
+        )
+
+    def fix_ideas_output_task(self, agent, output, error, quick=False):
+        schema = QUICK_IDEAS_SCHEMA if quick else IDEAS_SCHEMA
+        return _task(
+            name="fix_ideas_output_task",
+            description=f"""The following output was supposed to be a JSON object of LinkedIn post ideas, but it could not be read ({error}).
+            Rewrite it as a single valid JSON object that follows the schema below. Keep every idea (and theme) exactly as written; do not add, drop or reword ideas.
+
+            JSON SCHEMA:
+            {json.dumps(schema)}
+
+            OUTPUT TO FIX:
+            {output}
+
+            🚨 Respond with the JSON object only: no markdown, no code fences, no commentary.
+            """,
+            expected_output="A single JSON object that follows the schema and contains the same ideas as the original output.",
             agent=agent
         )
 
     def title_task(self, agent, context):
-        return Task(
+        return _task(
+            name="title_task",
             description=f"""From the provided content strategy, extract a single, concise title.
             The title must be between 3 and 5 words long.
             Do not include any other text or formatting.
@@ -287,7 +439,8 @@ class BrandingTasks:
         )
 
     def writing_task(self, agent, context):
-        return Task(
+        return _task(
+            name="writing_task",
             description=f"""Write a full, ready-to-publish LinkedIn post based on the following content idea.
             The post must be professional, engaging, and expand on the provided one-liner idea.
 
@@ -298,7 +451,8 @@ class BrandingTasks:
         )
 
     def qa_critique_task(self, agent, context):
-        return Task(
+        return _task(
+            name="qa_critique_task",
             description=f"""Review the following drafted LinkedIn post for clarity, tone, and strategic alignment. 
             Your goal is to provide **actionable feedback** to optimize it for maximum engagement and impact.
 
@@ -322,7 +476,8 @@ class BrandingTasks:
         )
 
     def refine_writing_task(self, agent, draft, user_critique):
-        return Task(
+        return _task(
+            name="refine_writing_task",
             description=f"""Refine the following draft of a LinkedIn post based on the user's feedback. Create a new, improved version that directly addresses their points.
 
             USER FEEDBACK:
@@ -336,7 +491,13 @@ class BrandingTasks:
     
     # NEW: Task for generating a specified number of single post ideas on a given topic
     def single_post_ideas_task(self, agent, user_context, target_role, target_audience, positioning, topic, num_ideas):
-        return Task(
+        layout = f"""The output must be structured exactly as follows, with each idea on a new line. Do not include a 'THEME:' header.
+            - [Idea 1]
+            - [Idea 2]
+            - [Idea 3]
+            ... and so on for {num_ideas} ideas."""
+        return _task(
+            name="single_post_ideas_task",
             description=f"""Based on the user's professional context and goals, generate {num_ideas} distinct, concise, one-liner LinkedIn post ideas.
             These ideas should revolve around the specified topic and align with the user's target role, audience, and desired positioning.
 
@@ -346,21 +507,22 @@ class BrandingTasks:
             Desired Positioning: {positioning}
             Specific Topic for Ideas: {topic if topic else 'general professional insights'}
 
-            The output must be structured exactly as follows, with each idea on a new line. Do not include a 'THEME:' header.
-            - [Idea 1]
-            - [Idea 2]
-            - [Idea 3]
-            ... and so on for {num_ideas} ideas.
+            {self._quick_ideas_format(layout)}
 
             Ensure the ideas are engaging and suitable for LinkedIn.
             """,
-            expected_output=f"A bulleted list of {num_ideas} distinct one-liner LinkedIn post ideas related to the specified topic, without a 'THEME:' header.",
+            expected_output=self._ideas_expected(f"{num_ideas} distinct one-liner LinkedIn post ideas related to the specified topic", layout="A bulleted list of {ideas}, without a 'THEME:' header."),
             agent=agent
         )
     
     # NEW: Task for generating a cohesive 3-part series of post ideas on a given topic
     def short_series_ideas_task(self, agent, user_context, target_role, target_audience, positioning, topic):
-        return Task(
+        layout = """The output must be structured exactly as follows. Do not include a 'THEME:' header.
+            - Part 1: [Concise idea for the first post]
+            - Part 2: [Concise idea for the second post, building on Part 1]
+            - Part 3: [Concise idea for the third post, concluding the series]"""
+        return _task(
+            name="short_series_ideas_task",
             description=f"""Based on the user's professional context and goals, generate a cohesive 3-part LinkedIn post series.
             Each part should be a concise, one-liner idea that builds upon the previous one, guiding the reader through a clear narrative or progression on the specified topic.
             The series should align with the user's target role, audience, and desired positioning.
@@ -371,13 +533,10 @@ class BrandingTasks:
             Desired Positioning: {positioning}
             Specific Topic for 3-Part Series: {topic}
 
-            The output must be structured exactly as follows. Do not include a 'THEME:' header.
-            - Part 1: [Concise idea for the first post]
-            - Part 2: [Concise idea for the second post, building on Part 1]
-            - Part 3: [Concise idea for the third post, concluding the series]
+            {self._quick_ideas_format(layout)}
 
             Ensure the ideas are engaging and suitable for LinkedIn, and that the series flows logically.
             """,
-            expected_output="A 3-part bulleted list, each starting with 'Part X:', providing concise one-liner LinkedIn post ideas for a cohesive series on the specified topic, without a 'THEME:' header.",
+            expected_output=self._ideas_expected("3 concise one-liner LinkedIn post ideas that form a cohesive series on the specified topic, in order", layout="A 3-part bulleted list, each starting with 'Part X:', of {ideas}, without a 'THEME:' header."),
             agent=agent
         )
\ No newline at end of file
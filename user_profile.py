@@ -0,0 +1,61 @@
+import hashlib
+import json
+import re
+
+PROFILE_LIST_FIELDS = ("skills", "goals", "notable_metrics", "interests")
+
+
+def context_fingerprint(user_context):
+    """Identifies the exact background text a profile was distilled from."""
+    return hashlib.sha256((user_context or "").encode("utf-8")).hexdigest()
+
+
+def parse_profile(raw):
+    """Parses the distillation task's output into a profile dict, or returns None if it isn't usable."""
+    match = re.search(r"\{.*\}", raw or "", re.DOTALL)
+    if not match:
+        return None
+    try:
+        data = json.loads(match.group(0))
+    except json.JSONDecodeError:
+        return None
+    if not isinstance(data, dict):
+        return None
+
+    profile = {"industry": str(data.get("industry") or "").strip(), "years_experience": data.get("years_experience")}
+    for field in PROFILE_LIST_FIELDS:
+        values = data.get(field) or []
+        if isinstance(values, str):
+            values = [values]
+        profile[field] = [str(value).strip() for value in values if str(value).strip()]
+    if not profile["industry"] and not profile["skills"]:
+        return None
+    return profile
+
+
+def format_profile(profile):
+    """Renders a profile as the compact text block that prompts use in place of the raw resume."""
+    lines = []
+    if profile.get("industry"):
+        lines.append(f"Industry: {profile['industry']}")
+    if profile.get("years_experience") not in (None, ""):
+        lines.append(f"Years of experience: {profile['years_experience']}")
+    labels = {"skills": "Key skills", "goals": "Career goals", "notable_metrics": "Notable metrics", "interests": "Interests"}
+    for field, label in labels.items():
+        if profile.get(field):
+            lines.append(f"{label}: {'; '.join(profile[field])}")
+    return "\n".join(lines)
+
+
+def profile_is_current(session):
+    """True when the session's profile was distilled from its current background text."""
+    profile = session.get("profile")
+    user_context = session.get("context", {}).get("user_context", "")
+    return bool(profile) and profile["source_hash"] == context_fingerprint(user_context)
+
+
+def profile_context(session):
+    """Returns the distilled profile text, or the raw background until a current profile is available."""
+    if profile_is_current(session):
+        return format_profile(session["profile"]["data"])
+    return session.get("context", {}).get("user_context", "")
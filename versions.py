@@ -0,0 +1,162 @@
+import difflib
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from collections import OrderedDict
+import config  # noqa: F401
+from session_store import DEFAULT_SESSION_DB_PATH
+
+# A version is stored as a full snapshot again once it would be this many deltas away from one
+MAX_DELTA_CHAIN = int(os.getenv("ASCENT_VERSION_MAX_CHAIN", 8))
+# Rebuilt texts kept in memory, in bytes
+CACHE_MAX_BYTES = int(os.getenv("ASCENT_VERSION_CACHE_BYTES", 8 * 1024 * 1024))
+# Unreferenced texts stored or reused this recently survive a sweep: their session may not be saved yet
+SWEEP_GRACE_SECONDS = 3600
+
+
+def content_id(text):
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def make_delta(base, text):
+    """Returns the line-level edits that turn `base` into `text`: [start, end] copies base lines, a string is new text."""
+    base_lines, lines = base.splitlines(keepends=True), text.splitlines(keepends=True)
+    ops = []
+    matcher = difflib.SequenceMatcher(None, base_lines, lines, autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == "equal":
+            ops.append([i1, i2])
+        elif j2 > j1:
+            ops.append("".join(lines[j1:j2]))
+    return ops
+
+
+def apply_delta(base, ops):
+    base_lines = base.splitlines(keepends=True)
+    return "".join("".join(base_lines[op[0]:op[1]]) if isinstance(op, list) else op for op in ops)
+
+
+class VersionStore:
+    """Content-addressed storage for strategy and draft versions.
+
+    Each distinct text is stored once under its SHA-256, either as a compressed snapshot or
+    as a compressed line delta against the version it was derived from, whichever is
+    smaller. Sessions keep only the IDs; texts are rebuilt when they are needed and the
+    most recently used ones are cached in memory. sweep() deletes the texts no session
+    refers to any more.
+    """
+
+    def __init__(self, path=DEFAULT_SESSION_DB_PATH, max_chain=MAX_DELTA_CHAIN, cache_max_bytes=CACHE_MAX_BYTES):
+        self.max_chain = max_chain
+        self.cache_max_bytes = cache_max_bytes
+        self._cache = OrderedDict()
+        self._cache_bytes = 0
+        self._lock = threading.RLock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS contents (
+                id TEXT PRIMARY KEY,
+                base_id TEXT,
+                depth INTEGER NOT NULL,
+                payload BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                used_at REAL
+            )"""
+        )
+        # Files written before sweeping existed lack used_at; their texts count as long unused
+        if "used_at" not in {row[1] for row in self._conn.execute("PRAGMA table_info(contents)")}:
+            self._conn.execute("ALTER TABLE contents ADD COLUMN used_at REAL")
+        self._conn.commit()
+
+    def put(self, text, base_id=None):
+        """Stores a text, as a delta against `base_id` if that is smaller, and returns its content ID."""
+        key = content_id(text)
+        with self._lock:
+            if self._conn.execute("SELECT 1 FROM contents WHERE id = ?", (key,)).fetchone():
+                self._conn.execute("UPDATE contents SET used_at = ? WHERE id = ?", (time.time(), key))
+                self._conn.commit()
+                return key
+            payload, stored_base, depth = zlib.compress(text.encode("utf-8")), None, 0
+            base = self._conn.execute("SELECT depth FROM contents WHERE id = ?", (base_id,)).fetchone() if base_id else None
+            if base and base[0] < self.max_chain:
+                delta = zlib.compress(json.dumps(make_delta(self.get(base_id), text), ensure_ascii=False).encode("utf-8"))
+                if len(delta) < len(payload):
+                    payload, stored_base, depth = delta, base_id, base[0] + 1
+            self._conn.execute(
+                "INSERT INTO contents (id, base_id, depth, payload, size, used_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (key, stored_base, depth, payload, len(text.encode("utf-8")), time.time()),
+            )
+            self._conn.commit()
+            self._remember(key, text)
+        return key
+
+    def get(self, key):
+        """Returns the text stored under a content ID, rebuilding it from its snapshot and deltas if needed."""
+        with self._lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                return self._cache[key]
+            row = self._conn.execute("SELECT base_id, payload FROM contents WHERE id = ?", (key,)).fetchone()
+            if row is None:
+                raise KeyError(key)
+            base_id, payload = row
+            data = zlib.decompress(payload).decode("utf-8")
+            text = apply_delta(self.get(base_id), json.loads(data)) if base_id else data
+            self._remember(key, text)
+            return text
+
+    def sweep(self, referenced_ids, grace_seconds=SWEEP_GRACE_SECONDS):
+        """Deletes the texts that are neither in `referenced_ids` nor the base of one that is kept, and returns how many.
+
+        Texts stored or reused within the last `grace_seconds` are kept too, so a version
+        whose session hasn't been saved yet isn't lost.
+        """
+        with self._lock:
+            cutoff = time.time() - grace_seconds
+            rows = self._conn.execute("SELECT id, base_id, COALESCE(used_at, 0) FROM contents").fetchall()
+            bases = {key: base_id for key, base_id, _ in rows}
+            keep = set()
+            for key, _, used_at in rows:
+                if key in referenced_ids or used_at >= cutoff:
+                    # A delta is rebuilt from its base, so the whole chain has to stay
+                    while key and key not in keep:
+                        keep.add(key)
+                        key = bases.get(key)
+            unused = [(key,) for key in bases if key not in keep]
+            self._conn.executemany("DELETE FROM contents WHERE id = ?", unused)
+            self._conn.commit()
+            for (key,) in unused:
+                text = self._cache.pop(key, None)
+                if text is not None:
+                    self._cache_bytes -= len(text)
+            return len(unused)
+
+    def stats(self):
+        """Returns the number of stored texts, their total size and the size actually stored."""
+        with self._lock:
+            count, size, stored, deltas = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0), COALESCE(SUM(LENGTH(payload)), 0), COALESCE(SUM(base_id IS NOT NULL), 0) FROM contents"
+            ).fetchone()
+            return {"versions": count, "deltas": deltas, "bytes": size, "stored_bytes": stored, "cached_bytes": self._cache_bytes}
+
+    def _remember(self, key, text):
+        size = len(text)
+        if size > self.cache_max_bytes:
+            return
+        self._cache[key] = text
+        self._cache_bytes += size
+        while self._cache_bytes > self.cache_max_bytes:
+            _, evicted = self._cache.popitem(last=False)
+            self._cache_bytes -= len(evicted)
+
+
+# Shared by every session served from this process
+version_store = VersionStore()